@@ -0,0 +1,90 @@
+"""
+This module is used to index the boards of every JIRA instance so the
+utility can tell which boards already exist without scanning them.
+"""
+# Build In Modules
+import logging
+import threading
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def board_name(quarter_string, team, glob=False):
+    """
+    Helper function to build the name of a team or global board.
+
+    :param String quarter_string: Quarter label e.g. 'Y20-Q4'
+    :param String team: Team name, or the global board title and instance
+    :param Bool glob: Is this a global board
+    :return: Board name
+    :rtype: String
+    """
+    if glob:
+        return f'{team} - {quarter_string} Board'
+    return f'{quarter_string} - {team} Board'
+
+
+class BoardIndex:
+
+    """ The boards of every JIRA instance, kept apart per instance so boards
+        with the same name on two instances do not hide each other. Board
+        names live in a dict per instance, so checking any number of names
+        is a set intersection rather than a scan.
+    """
+
+    def __init__(self):
+        """Returns a BoardIndex object
+        """
+        self.boards = {}
+        self.expected = {}
+        self._lock = threading.Lock()
+
+    def add(self, jira_instance, boards):
+        """ Index boards of an instance.
+        :param string jira_instance : JIRA instance name
+        :param dict boards : board names to IDs
+        """
+        with self._lock:
+            self.boards.setdefault(jira_instance, {}).update(boards)
+
+    def get(self, jira_instance, name):
+        """ Get the ID of a board.
+        :param string jira_instance : JIRA instance name
+        :param string name : board name
+        :return int board_id: board ID or None if there is no such board
+        """
+        return self.boards.get(jira_instance, {}).get(name)
+
+    def __len__(self):
+        return sum(len(index) for index in self.boards.values())
+
+    def expect(self, jira_instance, team, calender, glob=False):
+        """ Work out the boards a team would have for a calender.
+        :param string jira_instance : JIRA instance name
+        :param string team : team name, or the global board title and instance
+        :param dict calender : quarter index to sprints
+        :param bool glob : are these global boards
+        :return set names: expected board names
+        """
+        names = {board_name(sprints[0]['quarter_string'], team, glob=glob)
+                 for sprints in calender.values() if sprints}
+        with self._lock:
+            self.expected[(jira_instance, team)] = names
+        return names
+
+    def existing(self, jira_instance, names):
+        """ Which of some boards exist on an instance.
+        :param string jira_instance : JIRA instance name
+        :param iterable names : board names to check
+        :return set names: the names that exist
+        """
+        return self.boards.get(jira_instance, {}).keys() & set(names)
+
+    def existing_expected(self):
+        """ Which of every expected board exist, in one pass.
+        :return dict existing: (jira_instance, team) to the existing names
+        """
+        with self._lock:
+            expected = dict(self.expected)
+        return {key: self.existing(key[0], names) for key, names in expected.items()}
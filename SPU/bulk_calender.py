@@ -0,0 +1,146 @@
+"""
+This module is used to work out the sprints of every team at once with
+NumPy. It needs the optional numpy dependency (pip install spu[bulk]).
+"""
+# Build In Modules
+from datetime import timedelta
+import logging
+
+# 3rd Party Modules
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Local Modules
+from SPU.calender import (QUARTER_WEEKS, SPRINT_WEEKS, START_WINDOWS,
+                          Quarter, Sprint, parse_date)
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def require_numpy():
+    """
+    Helper function to fail clearly when numpy is not installed.
+
+    :return: Nothing
+    """
+    if np is None:
+        raise ImportError('The bulk calender needs numpy, install it with pip install spu[bulk]')
+
+
+def to_day(value):
+    """
+    Helper function to turn a config date into a NumPy day.
+
+    :param String value: Date in 'MM-DD-YY' format, or a datetime
+    :return: Day
+    :rtype: numpy.datetime64
+    """
+    return np.datetime64(parse_date(value).date(), 'D')
+
+
+def validate(names, global_start, starts, lengths):
+    """
+    Function to check every team the way Calender does.
+
+    :param List names: Team names
+    :param numpy.datetime64 global_start: Global Q1 start day
+    :param numpy.ndarray starts: Start day of every team
+    :param numpy.ndarray lengths: Sprint length of every team
+    :return: Nothing, raises ValueError naming the invalid teams
+    """
+    windows = np.array([START_WINDOWS.get(int(length), timedelta(weeks=int(length)) / 2)
+                        / timedelta(days=1) for length in lengths])
+    offsets = np.abs((starts - global_start).astype(int))
+    invalid = (lengths < 1) | (lengths > SPRINT_WEEKS) | (offsets > windows)
+    if invalid.any():
+        bad = [names[row] for row in np.flatnonzero(invalid)]
+        log.warning('Invalid sprint length or start date for %s', ', '.join(bad))
+        raise ValueError(bad)
+
+
+def build_bulk_calender(global_start, teams, years=9):
+    """
+    Function to work out the sprints of every team as team x sprint
+    matrices. Every quarter takes the same number of columns, the most
+    sprints any team has in a quarter, so column c is sprint
+    c % width + 1 of quarter c // width + 1. Teams with fewer sprints per
+    quarter have NaT in the columns they do not use.
+
+    :param String global_start: Global Q1 start date
+    :param Dict teams: Teams from config['SPU']['teams']
+    :param Int years: Number of years to build
+    :return: Team names and the start_dates, end_dates, quarter_ids,
+    sprint_indexes, sprint_years and valid matrices
+    :rtype: Dict
+    """
+    require_numpy()
+    names = list(teams)
+    # Most teams share a start date, so only parse each one once
+    days = {}
+    for value in teams.values():
+        if value['sprint_start_date'] not in days:
+            days[value['sprint_start_date']] = to_day(value['sprint_start_date'])
+    starts = np.array([days[value['sprint_start_date']] for value in teams.values()],
+                      dtype='datetime64[D]')
+    lengths = np.array([int(value['sprint_length']) for value in teams.values()], dtype=int)
+    validate(names, to_day(global_start), starts, lengths)
+
+    per_quarter = SPRINT_WEEKS // lengths
+    width = int(per_quarter.max()) if len(names) else 0
+    columns = np.arange(years * 4 * width)
+    quarter_ids = np.broadcast_to(columns // width + 1, (len(names), len(columns)))
+    sprint_indexes = np.broadcast_to(columns % width + 1, (len(names), len(columns)))
+    valid = sprint_indexes <= per_quarter[:, None]
+
+    # Each quarter starts 13 weeks after the last, leaving the gap week(s)
+    offsets = 7 * (QUARTER_WEEKS * (quarter_ids - 1) + lengths[:, None] * (sprint_indexes - 1))
+    start_dates = starts[:, None] + offsets.astype('timedelta64[D]')
+    end_dates = start_dates + (7 * lengths[:, None]).astype('timedelta64[D]')
+    start_dates = np.where(valid, start_dates, np.datetime64('NaT'))
+    end_dates = np.where(valid, end_dates, np.datetime64('NaT'))
+
+    # 2 week sprint names count operational years from the start date
+    start_years = starts.astype('datetime64[Y]').astype(int) + 1970
+    sprint_years = np.where(
+        lengths[:, None] == 2,
+        start_years[:, None] + (quarter_ids - 1) // 4,
+        start_dates.astype('datetime64[Y]').astype(int) + 1970) - 2000
+    return {
+        'teams': names,
+        'sprint_lengths': lengths,
+        'start_dates': start_dates,
+        'end_dates': end_dates,
+        'quarter_ids': quarter_ids,
+        'sprint_indexes': sprint_indexes,
+        'sprint_years': np.where(valid, sprint_years, 0),
+        'valid': valid,
+    }
+
+
+def team_calender(bulk, team):
+    """
+    Function to turn one team's row back into the dict Calender.as_dict
+    returns.
+
+    :param Dict bulk: Output of build_bulk_calender
+    :param String team: Team name
+    :return: Calender dict of quarter index to Quarter
+    :rtype: Dict
+    """
+    row = bulk['teams'].index(team)
+    length = int(bulk['sprint_lengths'][row])
+    valid = bulk['valid'][row]
+    start_dates = bulk['start_dates'][row][valid].astype('datetime64[us]').astype(object)
+    quarter_ids = bulk['quarter_ids'][row][valid].tolist()
+    sprint_indexes = bulk['sprint_indexes'][row][valid].tolist()
+    sprint_years = bulk['sprint_years'][row][valid].tolist()
+
+    sprints = {}
+    for quarter_id, sprint_index, start_date, sprint_year in zip(
+            quarter_ids, sprint_indexes, start_dates, sprint_years):
+        sprints.setdefault(quarter_id, []).append(
+            Sprint(sprint_index, (quarter_id - 1) % 4 + 1, start_date, length, sprint_year))
+    return {index: Quarter(index, quarter) for index, quarter in sprints.items()}
@@ -0,0 +1,89 @@
+"""
+This module is used to cache JIRA metadata for the length of a single run.
+"""
+# Build In Modules
+import logging
+import threading
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+class RunCache:
+
+    """ A cache scoped to one run of the utility. It holds the constructed
+        jira.client.JIRA client, project lookups and the board names and IDs
+        of every JIRA instance so each is only fetched once per run.
+    """
+
+    def __init__(self):
+        """Returns a RunCache object
+        """
+        self.clients = {}
+        self.projects = {}
+        self.boards = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._building = {}
+
+    def _get(self, store, key, build):
+        """ Return the cached value for key, building it on a miss. Only one
+        thread builds a value, different values are built at the same time.
+        :param dict store : dict the value is kept in
+        :param tuple key : key of the value
+        :param function build : function used to build the value on a miss
+        :return : Cached value
+        """
+        with self._lock:
+            if key in store:
+                self.hits += 1
+                return store[key]
+            building = self._building.setdefault((id(store), key), threading.Lock())
+        with building:
+            with self._lock:
+                if key in store:
+                    self.hits += 1
+                    return store[key]
+                self.misses += 1
+            value = build()
+            with self._lock:
+                store[key] = value
+            return value
+
+    def get_client(self, jira_instance, build):
+        """ Get the jira.client.JIRA client for an instance.
+        :param string jira_instance : JIRA instance name
+        :param function build : function that constructs the client
+        :return jira.client.JIRA client: JIRA client
+        """
+        return self._get(self.clients, jira_instance, build)
+
+    def get_project(self, jira_instance, project, build):
+        """ Get a project lookup for an instance.
+        :param string jira_instance : JIRA instance name
+        :param string project : JIRA project key
+        :param function build : function that looks up the project
+        :return dict project: JIRA project
+        """
+        return self._get(self.projects, (jira_instance, project), build)
+
+    def get_boards(self, jira_instance, build):
+        """ Get the boards of an instance.
+        :param string jira_instance : JIRA instance name
+        :param function build : function that lists the boards
+        :return dict boards: board names to IDs of all boards on the instance
+        """
+        return self._get(self.boards, jira_instance, build)
+
+    def stats(self):
+        """ Report how well the cache did this run.
+        :return dict stats: hit and miss counts
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def log_stats(self):
+        """ Log the cache statistics, every hit is a round trip saved.
+        """
+        log.info("Run cache saved %s JIRA round trips (%s hits, %s misses)",
+                 self.hits, self.hits, self.misses)
@@ -0,0 +1,548 @@
+"""
+This module is used to work out quarters and sprints from the Q1 start date.
+"""
+# Build In Modules
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import logging
+import re
+import threading
+
+# Global Variables
+log = logging.getLogger(__name__)
+DATE_FORMAT = '%m-%d-%y'
+# Every quarter is 13 weeks, the sprints plus a gap week (or more)
+QUARTER_WEEKS = 13
+SPRINT_WEEKS = 12
+# How far a team's first sprint may be from the Q1 start date
+START_WINDOWS = {
+    2: timedelta(weeks=1),
+    3: timedelta(days=10),
+}
+QUARTER_STRING = re.compile(r'^Y(\d+)-Q([1-4])$')
+DEFAULT_CALENDER_CACHE_SIZE = 128
+
+
+def parse_date(value):
+    """
+    Helper function to read a config date.
+
+    :param String value: Date in 'MM-DD-YY' format, or a datetime
+    :return: Date
+    :rtype: datetime
+    """
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, DATE_FORMAT)
+
+
+def build_sprint(operational_year, operational_quarter, sprint_length, sprint_index):
+    """
+    Helper function to build Sprint name for JIRA.
+
+    :param String operational_year:
+    :param String operational_quarter:
+    :param String sprint_length:
+    :param String sprint_index:
+    :return: Formatted Sprint name
+    :rtype: String
+    """
+    return 'Y%s-Q%s-L%s-S%s' % (
+        operational_year, operational_quarter, sprint_length, sprint_index
+    )
+
+
+def build_quarter_string(operational_year, operational_quarter):
+    """
+    Helper function to build quarter name for JIRA.
+
+    :param String operational_year:
+    :param String operational_quarter:
+    :return: Formatted Quarter name
+    :rtype: String
+    """
+    return 'Y%s-Q%s' % (operational_year, operational_quarter)
+
+
+class Sprint:
+
+    """ An immutable sprint. Only the numbers it is made from are stored,
+        the end date is worked out and the strings are rendered on first
+        use and then kept. Reading it like the old sprint dicts, e.g.
+        sprint['sprint_string'], still works.
+    """
+
+    __slots__ = ('index', 'quarter', 'start_date', 'sprint_length', 'sprint_year',
+                 '_sprint_string', '_quarter_string')
+    KEYS = ('index', 'quarter', 'start_date', 'end_date', 'sprint_string', 'quarter_string')
+
+    def __init__(self, index, quarter, start_date, sprint_length, sprint_year):
+        """Returns a Sprint object
+        :param int index : sprint index in the quarter, starting at 1
+        :param int quarter : quarter of the year, 1 to 4
+        :param datetime start_date : first day of the sprint
+        :param int sprint_length : length of the sprint in weeks
+        :param int sprint_year : two digit year used in the sprint name
+        """
+        for name, value in (('index', index), ('quarter', quarter),
+                            ('start_date', start_date), ('sprint_length', sprint_length),
+                            ('sprint_year', sprint_year), ('_sprint_string', None),
+                            ('_quarter_string', None)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Sprint is immutable')
+
+    def __reduce__(self):
+        return (Sprint, (self.index, self.quarter, self.start_date,
+                         self.sprint_length, self.sprint_year))
+
+    @property
+    def end_date(self):
+        """ Day after the last day of the sprint. """
+        return self.start_date + timedelta(weeks=self.sprint_length)
+
+    @property
+    def sprint_string(self):
+        """ Name of the sprint in JIRA. """
+        if self._sprint_string is None:
+            object.__setattr__(self, '_sprint_string', build_sprint(
+                operational_year=self.sprint_year,
+                operational_quarter=self.quarter,
+                sprint_length=self.sprint_length,
+                sprint_index=self.index
+            ))
+        return self._sprint_string
+
+    @property
+    def quarter_string(self):
+        """ Label of the quarter the sprint starts in. """
+        if self._quarter_string is None:
+            object.__setattr__(self, '_quarter_string', build_quarter_string(
+                operational_quarter=self.quarter,
+                operational_year=self.start_date.year - 2000
+            ))
+        return self._quarter_string
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def as_dict(self):
+        """ The sprint in the old dict format.
+        :return dict sprint: sprint entry
+        """
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __eq__(self, other):
+        if isinstance(other, Sprint):
+            return self.__reduce__() == other.__reduce__()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.__reduce__()[1])
+
+    def __repr__(self):
+        return f"Sprint({self.sprint_string}, {self.start_date:%m-%d-%y})"
+
+
+class Quarter:
+
+    """ An immutable quarter, a sequence of its sprints. Reading it like the
+        old list of sprint dicts, e.g. quarter[0]['quarter_string'], still works.
+    """
+
+    __slots__ = ('index', 'sprints')
+
+    def __init__(self, index, sprints):
+        """Returns a Quarter object
+        :param int index : quarter index in the calender, starting at 1
+        :param tuple sprints : sprints of the quarter in order
+        """
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'sprints', tuple(sprints))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Quarter is immutable')
+
+    def __reduce__(self):
+        return (Quarter, (self.index, self.sprints))
+
+    @property
+    def quarter_string(self):
+        """ Label of the quarter, taken from its first sprint. """
+        return self.sprints[0].quarter_string
+
+    @property
+    def start_date(self):
+        """ First day of the quarter. """
+        return self.sprints[0].start_date
+
+    def __getitem__(self, index):
+        return self.sprints[index]
+
+    def __len__(self):
+        return len(self.sprints)
+
+    def __iter__(self):
+        return iter(self.sprints)
+
+    def __eq__(self, other):
+        if isinstance(other, Quarter):
+            return self.sprints == other.sprints
+        if isinstance(other, list):
+            return list(self.sprints) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.sprints)
+
+    def __repr__(self):
+        return f"Quarter({self.index}, {self.quarter_string})"
+
+
+class Calender:
+
+    """ A lazy calender of a team. Any quarter or sprint is worked out
+        directly from the team's start date, the sprint length and its
+        index, so nothing is built until it is asked for and there is no
+        limit on how far ahead it goes.
+
+        Quarters are indexed from 1, the same as the keys of as_dict.
+    """
+
+    def __init__(self, global_start, start_date, sprint_length):
+        """Returns a Calender object
+        :param string global_start : Global Q1 start date
+        :param string start_date : Team start date in 'MM-DD-YY' format
+        :param int sprint_length : Length of a sprint in weeks
+        """
+        self.global_start = parse_date(global_start)
+        self.start_date = parse_date(start_date)
+        self.sprint_length = int(sprint_length)
+        if not 1 <= self.sprint_length <= SPRINT_WEEKS:
+            log.warning('Invalid sprint length %s. Sprints must be 1 to %s weeks',
+                        sprint_length, SPRINT_WEEKS)
+            raise ValueError
+        self.sprints_per_quarter = SPRINT_WEEKS // self.sprint_length
+
+        # Validate sprint start date
+        window = START_WINDOWS.get(self.sprint_length,
+                                   timedelta(weeks=self.sprint_length) / 2)
+        if not self.global_start - window <= self.start_date <= self.global_start + window:
+            log.warning('Invalid Sprint start time. %s week sprints must be within %s days '
+                        'of the Q1 start date', self.sprint_length, window.days)
+            raise ValueError
+
+    def quarter_start(self, index):
+        """ Start date of a quarter.
+        :param int index : quarter index, starting at 1
+        :return datetime start: first day of the quarter
+        """
+        return self.start_date + timedelta(weeks=QUARTER_WEEKS * (index - 1))
+
+    def sprint(self, index, sprint_index):
+        """ Work out a single sprint.
+        :param int index : quarter index, starting at 1
+        :param int sprint_index : sprint index in the quarter, starting at 1
+        :return Sprint sprint: sprint
+        """
+        quarter = (index - 1) % 4 + 1
+        start_date = self.quarter_start(index) + \
+            timedelta(weeks=self.sprint_length * (sprint_index - 1))
+        if self.sprint_length == 2:
+            # 2 week sprint names count operational years from the start date
+            sprint_year = self.start_date.year - 2000 + (index - 1) // 4
+        else:
+            sprint_year = start_date.year - 2000
+        return Sprint(sprint_index, quarter, start_date, self.sprint_length, sprint_year)
+
+    def quarter(self, index):
+        """ Work out all sprints of a quarter.
+        :param int index : quarter index, starting at 1
+        :return Quarter quarter: the quarter's sprints in order
+        """
+        if index < 1:
+            raise KeyError(index)
+        return Quarter(index, [self.sprint(index, sprint_index)
+                               for sprint_index in range(1, self.sprints_per_quarter + 1)])
+
+    def __getitem__(self, index):
+        return self.quarter(index)
+
+    def quarters(self, start=1, stop=None):
+        """ Lazily walk the quarters.
+        :param int start : first quarter index
+        :param int stop : quarter index to stop before, or None to never stop
+        :return generator quarters: (index, sprints) pairs
+        """
+        index = start
+        while stop is None or index < stop:
+            yield index, self.quarter(index)
+            index += 1
+
+    def next_quarter(self, after=None):
+        """ The first quarter starting after a date.
+        :param datetime after : date to look after (default is now)
+        :return tuple quarter: (index, sprints)
+        """
+        if after is None:
+            after = datetime.today()
+        index = max(1, (after - self.start_date) // timedelta(weeks=QUARTER_WEEKS) + 2)
+        return index, self.quarter(index)
+
+    def find_quarter(self, quarter_string):
+        """ The quarter carrying a quarter label.
+        :param string quarter_string : quarter label e.g. 'Y20-Q4'
+        :return tuple quarter: (index, sprints) or None if there is no such quarter
+        """
+        match = QUARTER_STRING.match(quarter_string)
+        if not match:
+            return None
+        year, quarter = int(match.group(1)) + 2000, int(match.group(2))
+        # The label comes from the year the quarter starts in, which
+        # slowly drifts from the operational year, so look either side
+        guess = quarter + 4 * (year - self.start_date.year)
+        for index in (guess - 4, guess, guess + 4):
+            if index >= 1 and self.quarter_start(index).year == year:
+                return index, self.quarter(index)
+        return None
+
+    def locate(self, date):
+        """ The quarter and sprint a date falls in.
+        :param datetime date : date to look up
+        :return tuple location: (index, sprint or None when the date is in
+        the gap week) or None before the calender starts
+        """
+        if date < self.start_date:
+            return None
+        index = (date - self.start_date) // timedelta(weeks=QUARTER_WEEKS) + 1
+        sprint_index = (date - self.quarter_start(index)) // \
+            timedelta(weeks=self.sprint_length) + 1
+        if sprint_index > self.sprints_per_quarter:
+            return index, None
+        return index, self.sprint(index, sprint_index)
+
+    def as_dict(self, years=9):
+        """ Materialise the calender as a dict of quarter index, starting at
+        1, to the Quarter of its sprints. Every sprint reads like a dict
+        with the keys in Sprint.KEYS.
+        :param int years : number of years to build
+        :return dict calender: quarter index to sprints
+        """
+        return dict(self.quarters(1, years * 4 + 1))
+
+
+class CalenderCache:
+
+    """ Memoizes calenders by their normalised parameters, so teams sharing
+        a start date and sprint length share one calender. The least
+        recently used calenders are dropped past maxsize.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CALENDER_CACHE_SIZE):
+        """Returns a CalenderCache object
+        :param int maxsize : most calenders to keep
+        """
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self.maxsize = maxsize
+
+    @property
+    def maxsize(self):
+        """ Most calenders to keep.
+        :return int maxsize: most calenders to keep
+        """
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        """ Change how many calenders to keep, dropping the least recently
+        used ones straight away if there are now too many.
+        :param int maxsize : most calenders to keep
+        """
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    @staticmethod
+    def key(global_start, start_date, sprint_length):
+        """ Normalise the parameters of a calender, e.g. '01-7-19' and
+        '01-07-19' are the same start date.
+        :param string global_start : Global Q1 start date
+        :param string start_date : Team start date
+        :param int sprint_length : Length of a sprint in weeks
+        :return tuple key: cache key
+        """
+        return parse_date(global_start), parse_date(start_date), int(sprint_length)
+
+    def _entry(self, key):
+        """ Get the calender of a key, building it on a miss.
+        :param tuple key : normalised parameters
+        :return Calender calender: shared calender
+        """
+        with self._lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            entry = Calender(*key)
+            self._store(key, entry)
+            return entry
+
+    def _store(self, key, entry):
+        """ Add an entry, dropping the least recently used past maxsize.
+        :param tuple key : normalised parameters
+        :param Calender entry : calender
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        """ Drop the least recently used entries past maxsize.
+        """
+        while len(self.entries) > self._maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, global_start, start_date, sprint_length):
+        """ Get the calender for a set of parameters.
+        :param string global_start : Global Q1 start date
+        :param string start_date : Team start date
+        :param int sprint_length : Length of a sprint in weeks
+        :return Calender calender: shared calender
+        """
+        return self._entry(self.key(global_start, start_date, sprint_length))
+
+    def stats(self):
+        """ Report how well the cache did this run.
+        :return dict stats: hit, miss and eviction counts and the size
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries)}
+
+    def log_stats(self):
+        """ Log the cache statistics.
+        """
+        log.info("Calender cache built %s calenders for %s lookups "
+                 "(%s hits, %s evictions)",
+                 self.misses, self.hits + self.misses, self.hits, self.evictions)
+
+
+class CalenderIndex:
+
+    """ An index over the calenders of every team in the config. Teams that
+        share a start date and sprint length share one set of sorted
+        interval arrays, and a date is looked up with a binary search.
+        Dates past the indexed years fall back to calender arithmetic.
+    """
+
+    def __init__(self, config, years=9, calenders=None):
+        """Returns a CalenderIndex object
+        :param dict config : Config dict
+        :param int years : number of years to precompute
+        :param CalenderCache calenders : Optional cache to share calenders from
+        """
+        global_start = parse_date(config['SPU']['operational_q1_start'])
+        self.groups = {}
+        for team, value in config['SPU']['teams'].items():
+            key = (parse_date(value['sprint_start_date']), int(value['sprint_length']))
+            if key not in self.groups:
+                if calenders is not None:
+                    calender = calenders.get(global_start, key[0], key[1])
+                else:
+                    calender = Calender(global_start, key[0], key[1])
+                self.groups[key] = self.build_group(calender, years)
+            self.groups[key]['teams'].append(team)
+
+    @staticmethod
+    def build_group(calender, years):
+        """ Precompute the sorted quarter and sprint intervals of a calender.
+        :param Calender calender : calender of the group
+        :param int years : number of years to precompute
+        :return dict group: interval arrays
+        """
+        group = {'calender': calender, 'teams': [], 'quarter_starts': [],
+                 'quarter_strings': [], 'sprint_starts': [], 'sprint_ends': [],
+                 'sprint_strings': [], 'by_quarter_string': {}}
+        for index, sprints in calender.quarters(1, years * 4 + 1):
+            group['quarter_starts'].append(sprints[0]['start_date'])
+            group['quarter_strings'].append(sprints[0]['quarter_string'])
+            group['by_quarter_string'].setdefault(sprints[0]['quarter_string'], sprints)
+            for sprint in sprints:
+                group['sprint_starts'].append(sprint['start_date'])
+                group['sprint_ends'].append(sprint['end_date'])
+                group['sprint_strings'].append(sprint['sprint_string'])
+        group['horizon'] = calender.quarter_start(years * 4 + 1)
+        return group
+
+    @staticmethod
+    def locate(group, date):
+        """ The quarter and sprint strings a date falls in for one group.
+        :param dict group : interval arrays
+        :param datetime date : date to look up
+        :return tuple location: (quarter_string, sprint_string or None) or None
+        """
+        if date >= group['horizon']:
+            location = group['calender'].locate(date)
+            if location is None:
+                return None
+            index, sprint = location
+            sprints = group['calender'].quarter(index)
+            return sprints[0]['quarter_string'], sprint['sprint_string'] if sprint else None
+        quarter = bisect_right(group['quarter_starts'], date) - 1
+        if quarter < 0:
+            return None
+        sprint = bisect_right(group['sprint_starts'], date) - 1
+        if date < group['sprint_ends'][sprint]:
+            return group['quarter_strings'][quarter], group['sprint_strings'][sprint]
+        return group['quarter_strings'][quarter], None
+
+    def at(self, date=None):
+        """ Which quarter and sprint every team is in on a date.
+        :param datetime date : date to look up (default is now)
+        :return list locations: dicts of team, quarter_string and sprint_string
+        """
+        if date is None:
+            date = datetime.today()
+        locations = []
+        for group in self.groups.values():
+            location = self.locate(group, date)
+            if location is None:
+                continue
+            for team in group['teams']:
+                locations.append({'team': team, 'quarter_string': location[0],
+                                  'sprint_string': location[1]})
+        return locations
+
+    def sprints(self, quarter_string):
+        """ The sprints every team has in a quarter.
+        :param string quarter_string : quarter label e.g. 'Y20-Q4'
+        :return dict sprints: team to list of sprint strings
+        """
+        sprints = {}
+        for group in self.groups.values():
+            quarter = group['by_quarter_string'].get(quarter_string)
+            if quarter is None:
+                found = group['calender'].find_quarter(quarter_string)
+                if found is None:
+                    continue
+                quarter = found[1]
+            for team in group['teams']:
+                sprints[team] = [sprint['sprint_string'] for sprint in quarter]
+        return sprints
@@ -9,6 +9,9 @@ config = {
         # 'run_for_quarter': 'Y20-Q4',
         'run_for_quarter': False,
 
+        # Optional: Number of teams to sync at the same time
+        'parallel': False,
+
         # Default JIRA instance to use if none is provided
         'default_jira_instance': 'example',
 
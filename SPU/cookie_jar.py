@@ -0,0 +1,138 @@
+"""
+This module is used to keep the cookies a kerberos step-auth proxy hands
+out, so a run only negotiates with it once per host while they last.
+"""
+# Build In Modules
+import json
+import logging
+import os
+import threading
+import time
+
+# 3rd Party Modules
+from requests.cookies import RequestsCookieJar, create_cookie
+
+# Global Variables
+log = logging.getLogger(__name__)
+DEFAULT_COOKIE_JAR = 'spu-cookies.json'
+# Seconds a cookie without an expiry of its own is trusted
+DEFAULT_COOKIE_TTL = 8 * 60 * 60
+# Cookies this close to expiring are negotiated again
+EXPIRY_MARGIN = 60
+
+
+class StepAuthCookies:
+
+    """ The step-auth cookies of every host, shared by every rest API client
+        of the process and persisted to disk for the next run. A host's
+        cookies expire with the first of them to expire. The file holds
+        credentials, so only its owner may read it.
+    """
+
+    def __init__(self, path=DEFAULT_COOKIE_JAR, ttl=DEFAULT_COOKIE_TTL):
+        """Returns a StepAuthCookies object
+        :param string path : file to keep the cookies in, None to keep them in memory
+        :param int ttl : seconds to trust a cookie that does not say when it expires
+        """
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self.negotiated = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def read(self):
+        """ Read the cookies on disk.
+        :return dict entries: host to its cookies and expiry
+        """
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            # Make sure every entry can be turned back into cookies
+            for entry in entries.values():
+                float(entry['expires'])
+                for cookie in entry['cookies']:
+                    create_cookie(**cookie)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+            log.warning("Ignoring unreadable cookie jar %s: %s", self.path, error)
+            return {}
+        return entries
+
+    def load(self):
+        """ Load the cookies an earlier run left on disk.
+        """
+        entries = self.read()
+        with self._lock:
+            self.entries.update(entries)
+
+    def save(self):
+        """ Write the cookies to disk atomically, keeping the hosts other
+        processes added since we loaded.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self.read(), **self.entries)
+            # Hosts we invalidated are dropped rather than kept from the disk
+            entries = {host: entry for host, entry in entries.items() if entry is not None}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self.path)
+            except OSError as error:
+                # The cookies still work for this run, the next one negotiates again
+                log.warning("Could not write cookie jar %s: %s", self.path, error)
+
+    def get(self, host):
+        """ Get the cookies of a host while they are still good.
+        :param string host : JIRA server
+        :return RequestsCookieJar cookies: cookies or None if there are none or they expired
+        """
+        with self._lock:
+            entry = self.entries.get(host)
+        if entry is None or time.time() >= entry['expires'] - EXPIRY_MARGIN:
+            return None
+        cookies = RequestsCookieJar()
+        for cookie in entry['cookies']:
+            cookies.set_cookie(create_cookie(**cookie))
+        with self._lock:
+            self.reused += 1
+        return cookies
+
+    def store(self, host, cookies):
+        """ Keep newly negotiated cookies of a host.
+        :param string host : JIRA server
+        :param RequestsCookieJar cookies : cookies the step-auth proxy set
+        """
+        now = time.time()
+        expires = [cookie.expires for cookie in cookies if cookie.expires]
+        entry = {
+            'cookies': [{'name': cookie.name, 'value': cookie.value,
+                         'domain': cookie.domain, 'path': cookie.path,
+                         'secure': cookie.secure, 'expires': cookie.expires}
+                        for cookie in cookies],
+            'expires': min(expires + [now + self.ttl]),
+        }
+        with self._lock:
+            self.entries[host] = entry
+            self.negotiated += 1
+        self.save()
+
+    def invalidate(self, host):
+        """ Forget the cookies of a host, e.g. after JIRA rejected them.
+        :param string host : JIRA server
+        """
+        with self._lock:
+            self.entries[host] = None
+        self.save()
+
+    def log_stats(self):
+        """ Log how many negotiations the jar saved.
+        """
+        log.info("Cookie jar reused step-auth cookies %s times, negotiated %s times",
+                 self.reused, self.negotiated)
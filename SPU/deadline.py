@@ -0,0 +1,104 @@
+"""
+This module is used to bound how long a run, and each team in it, may take.
+"""
+# Build In Modules
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+# Global Variables
+# Deadline of whatever is running, read by the request scheduler
+CURRENT_DEADLINE = ContextVar('CURRENT_DEADLINE', default=None)
+# Shortest timeout a request is given once a deadline is close
+MIN_TIMEOUT = 0.1
+
+
+class DeadlineExceeded(Exception):
+
+    """ Raised when a deadline passes before an operation could start. The
+        work is deferred to the next run, which can pick it up with --resume.
+    """
+
+
+def current_deadline():
+    """
+    Helper function to get the deadline of whatever is running.
+
+    :return: Active deadline or None
+    :rtype: Deadline
+    """
+    return CURRENT_DEADLINE.get()
+
+
+class Deadline:
+
+    """ A time budget. A child deadline, e.g. one team of a run, never ends
+        later than its parent.
+    """
+
+    def __init__(self, seconds=None, name='run', parent=None):
+        """Returns a Deadline object
+        :param float seconds : budget in seconds, None for no limit of its own
+        :param string name : what the budget is for, used in errors
+        :param Deadline parent : deadline this one has to fit in
+        """
+        self.name = name
+        self.parent = parent
+        self.expires = time.monotonic() + seconds if seconds else None
+
+    def child(self, seconds=None, name=None):
+        """ Start a deadline that has to fit in this one.
+        :param float seconds : budget in seconds, None for no limit of its own
+        :param string name : what the budget is for
+        :return Deadline deadline: child deadline
+        """
+        return Deadline(seconds, name=name or self.name, parent=self)
+
+    def remaining(self):
+        """ Time left.
+        :return float remaining: seconds left or None if there is no limit
+        """
+        remaining = [self.expires - time.monotonic()] if self.expires is not None else []
+        if self.parent is not None and self.parent.remaining() is not None:
+            remaining.append(self.parent.remaining())
+        return min(remaining) if remaining else None
+
+    def expired(self):
+        """ Has the deadline passed.
+        :return bool expired: True once there is no time left
+        """
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self, operation):
+        """ Fail fast if the deadline has passed.
+        :param string operation : what was about to happen
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"{self.name} deadline passed before {operation}")
+
+    def clamp(self, timeout):
+        """ Shorten a request timeout so the request ends by the deadline.
+        :param timeout : timeout in seconds, a (connect, read) tuple or None
+        :return : clamped timeout of the same shape
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        remaining = max(remaining, MIN_TIMEOUT)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    @contextmanager
+    def active(self):
+        """ Make this the deadline of every request made inside the block,
+        including from asyncio tasks started in it.
+        """
+        token = CURRENT_DEADLINE.set(self)
+        try:
+            yield self
+        finally:
+            CURRENT_DEADLINE.reset(token)
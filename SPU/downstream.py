@@ -2,25 +2,235 @@
 This module is used to interact with the JIRA client.
 """
 # Build In Modules
+import asyncio
+import contextvars
+import functools
 import logging
-from SPU.jira_client import JiraClient
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from SPU.jira_client import (JiraClient, AsyncJiraClient, DEFAULT_POOL_SIZE,
+                             DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
 
 # 3rd Party Modules
 import jira.client
 
 # Local Modules
+from SPU.cookie_jar import StepAuthCookies, DEFAULT_COOKIE_JAR, DEFAULT_COOKIE_TTL
+from SPU.deadline import Deadline, current_deadline
+from SPU.metadata_cache import MetadataCache, DEFAULT_METADATA_CACHE
+from SPU.scheduler import RequestScheduler, DEFAULT_MAX_RETRIES
 import SPU.main as m
+import SPU.jql as jql
 
 # Global Variables
 log = logging.getLogger(__name__)
+# Options in a JIRA instance config that are used by SPU and
+# should not be passed into jira.client.JIRA
+SPU_INSTANCE_OPTIONS = ('pool_size', 'max_in_flight', 'rate_limit', 'burst', 'max_retries',
+                        'connect_timeout', 'read_timeout', 'kerberos')
+# Registry of pooled rest API clients, one per JIRA instance
+REST_API_CLIENTS = {}
+REST_API_CLIENTS_LOCK = threading.Lock()
+# Optional on disk metadata cache shared by every rest API client
+METADATA_CACHE = None
+# Step-auth cookies of the kerberos JIRA instances, shared by every rest API client
+COOKIE_JAR = None
+# Request scheduler of every JIRA instance, shared by both clients
+SCHEDULERS = {}
+SCHEDULERS_LOCK = threading.Lock()
+# Default number of requests in flight against one JIRA instance
+DEFAULT_MAX_IN_FLIGHT = 4
+# Default number of projects one global filter holds before a new one is started
+DEFAULT_GLOBAL_BOARD_MAX_PROJECTS = 100
 
 
-def get_jira_client(team, config):
+def get_jira_instance(team, config):
+    """
+    Helper function to get the JIRA instance a team uses. Falls back
+    on the configured default JIRA instance.
+
+    :param Dict team: team dict
+    :param Dict config: Config dict
+    :return: JIRA instance name or False
+    :rtype: String
+    """
+    jira_instance = team.get('jira_instance', False)
+    if not jira_instance:
+        jira_instance = config['SPU'].get('default_jira_instance', False)
+    return jira_instance
+
+
+def get_jira_kwargs(jira_instance, config):
+    """
+    Helper function to get the jira.client.JIRA arguments for an instance.
+
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :return: Key-word arguments for jira.client.JIRA
+    :rtype: Dict
+    """
+    return {key: value for key, value in config['SPU']['jira'][jira_instance].items()
+            if key not in SPU_INSTANCE_OPTIONS}
+
+
+def get_timeout(jira_instance, config):
+    """
+    Helper function to get the request timeout of a JIRA instance.
+
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :return: (connect, read) timeout in seconds
+    :rtype: Tuple
+    """
+    instance_config = config['SPU']['jira'][jira_instance]
+    return (instance_config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+            instance_config.get('read_timeout', DEFAULT_READ_TIMEOUT))
+
+
+def get_scheduler(jira_instance, config):
+    """
+    Function to get the request scheduler of a JIRA instance. The rest API
+    client and the jira.client.JIRA client of an instance share it, so
+    both are paced and backed off together.
+
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :return: Request scheduler for the instance
+    :rtype: SPU.scheduler.RequestScheduler
+    """
+    with SCHEDULERS_LOCK:
+        if jira_instance not in SCHEDULERS:
+            instance_config = config['SPU']['jira'][jira_instance]
+            SCHEDULERS[jira_instance] = RequestScheduler(
+                jira_instance,
+                rate=instance_config.get('rate_limit'),
+                burst=instance_config.get('burst'),
+                max_in_flight=instance_config.get('max_in_flight', DEFAULT_MAX_IN_FLIGHT),
+                max_retries=instance_config.get('max_retries', DEFAULT_MAX_RETRIES)
+            )
+        return SCHEDULERS[jira_instance]
+
+
+def get_rest_api_client(jira_instance, config):
+    """
+    Function to get the shared rest API client for a JIRA instance.
+    The client is created on first use and then reused so all
+    calls to the same server share one pool of open connections.
+
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :return: Rest API client for the instance
+    :rtype: SPU.jira_client.JiraClient
+    """
+    with REST_API_CLIENTS_LOCK:
+        if jira_instance not in REST_API_CLIENTS:
+            instance_config = config['SPU']['jira'][jira_instance]
+            kerberos = instance_config.get('kerberos', False)
+            basic_auth = instance_config.get('basic_auth', (None, None))
+            REST_API_CLIENTS[jira_instance] = JiraClient(
+                url=instance_config['options']['server'],
+                authtype='kerberos' if kerberos else 'basic',
+                username=basic_auth[0],
+                password=basic_auth[1],
+                pool_size=instance_config.get('pool_size', DEFAULT_POOL_SIZE),
+                metadata_cache=METADATA_CACHE,
+                scheduler=get_scheduler(jira_instance, config),
+                timeout=get_timeout(jira_instance, config),
+                cookie_jar=get_cookie_jar(config) if kerberos else None
+            )
+        return REST_API_CLIENTS[jira_instance]
+
+
+def get_async_rest_api_client(jira_instance, config, executor=None):
+    """
+    Function to get an asyncio rest API client for a JIRA instance.
+    It runs its requests on executor threads through the shared pooled
+    rest API client.
+
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :param concurrent.futures.Executor executor: Optional executor to run requests on
+    :return: Asyncio rest API client for the instance
+    :rtype: SPU.jira_client.AsyncJiraClient
+    """
+    return AsyncJiraClient(
+        get_rest_api_client(jira_instance, config),
+        max_in_flight=config['SPU']['jira'][jira_instance].get('max_in_flight', DEFAULT_MAX_IN_FLIGHT),
+        executor=executor
+    )
+
+
+def close_rest_api_clients():
+    """
+    Function to close and forget all shared rest API clients.
+
+    :return: Nothing
+    """
+    global METADATA_CACHE, COOKIE_JAR
+    with REST_API_CLIENTS_LOCK:
+        for rest_api_client in REST_API_CLIENTS.values():
+            rest_api_client.close()
+        REST_API_CLIENTS.clear()
+        with SCHEDULERS_LOCK:
+            for scheduler in SCHEDULERS.values():
+                scheduler.log_stats()
+            SCHEDULERS.clear()
+        if METADATA_CACHE is not None:
+            METADATA_CACHE.log_stats()
+            METADATA_CACHE.close()
+            METADATA_CACHE = None
+        if COOKIE_JAR is not None:
+            COOKIE_JAR.log_stats()
+            COOKIE_JAR = None
+
+
+def get_cookie_jar(config):
+    """
+    Helper function to get the step-auth cookie jar, opening it on first
+    use. It is kept in 'cookie_jar' (False to keep it in memory only).
+    The caller has to hold REST_API_CLIENTS_LOCK.
+
+    :param Dict config: Config dict
+    :return: The cookie jar
+    :rtype: SPU.cookie_jar.StepAuthCookies
+    """
+    global COOKIE_JAR
+    if COOKIE_JAR is None:
+        path = config['SPU'].get('cookie_jar', DEFAULT_COOKIE_JAR)
+        COOKIE_JAR = StepAuthCookies(path or None,
+                                     ttl=config['SPU'].get('cookie_ttl', DEFAULT_COOKIE_TTL))
+    return COOKIE_JAR
+
+
+def open_metadata_cache(config, refresh=False):
+    """
+    Function to turn on the on disk metadata cache if the config asks for
+    it. It has to be called before the first rest API client is made.
+
+    :param Dict config: Config dict
+    :param Bool refresh: Ignore what is cached and fetch everything again
+    :return: The metadata cache or None if it is turned off
+    :rtype: SPU.metadata_cache.MetadataCache
+    """
+    global METADATA_CACHE
+    path = config['SPU'].get('metadata_cache')
+    if not path:
+        return None
+    if path is True:
+        path = DEFAULT_METADATA_CACHE
+    with REST_API_CLIENTS_LOCK:
+        METADATA_CACHE = MetadataCache(path, ttls=config['SPU'].get('metadata_cache_ttl'),
+                                       refresh=refresh)
+    return METADATA_CACHE
+
+
+def get_jira_client(team, config, cache=None):
     """
     Function to match and create JIRA client.
 
     :param Dict team: team dict
     :param dict config: Config dict
+    :param SPU.cache.RunCache cache: Optional run cache to reuse clients from
     :returns: Matching JIRA client
     :rtype: jira.client.JIRA
     """
@@ -33,156 +243,355 @@ def get_jira_client(team, config):
         log.error("   No jira_instance for issue and there is no default in the config")
         raise Exception
 
-    client = jira.client.JIRA(**config['SPU']['jira'][jira_instance])
+    if cache is not None:
+        return cache.get_client(jira_instance, lambda: build_jira_client(jira_instance, config))
+    client = build_jira_client(jira_instance, config)
     return client
 
 
-def get_boards(config, jiras):
+def build_jira_client(jira_instance, config):
     """
-    Get all boards from all JIRA instances in the config file
+    Helper function to build a jira.client.JIRA client whose requests go
+    through the instance's request scheduler.
 
-    :param Dict config: Config Dict
-    :param List jira: List of all JIRA clients in use
-    :return: All boards
+    :param String jira_instance: JIRA instance name
+    :param Dict config: Config dict
+    :returns: JIRA client
+    :rtype: jira.client.JIRA
+    """
+    kwargs = get_jira_kwargs(jira_instance, config)
+    kwargs.setdefault('timeout', get_timeout(jira_instance, config))
+    kerberos = config['SPU']['jira'][jira_instance].get('kerberos', False)
+    if kerberos:
+        # JIRA itself is not kerberos enabled, the client logs in with the
+        # step-auth cookies of the rest API client instead
+        rest_api_client = get_rest_api_client(jira_instance, config)
+        kwargs['options'] = dict(kwargs['options'],
+                                 cookies=rest_api_client.req_kwargs['cookies'])
+    client = jira.client.JIRA(**kwargs)
+    JiraClient.build_session(
+        config['SPU']['jira'][jira_instance].get('pool_size', DEFAULT_POOL_SIZE),
+        scheduler=get_scheduler(jira_instance, config),
+        session=client._session)
+    if kerberos:
+        rest_api_client.share_step_auth(client._session)
+    return client
+
+
+def get_project(team, config, cache=None):
+    """
+    Function to look up the JIRA project of a team.
+
+    :param Dict team: team dict
+    :param Dict config: Config dict
+    :param SPU.cache.RunCache cache: Optional run cache to reuse lookups from
+    :returns: Matching JIRA project
+    :rtype: Dict
+    """
+    jira_instance = get_jira_instance(team, config)
+    rest_api_client = get_rest_api_client(jira_instance, config)
+    if cache is None:
+        return rest_api_client.get_project(team['jira_project'])
+    return cache.get_project(jira_instance, team['jira_project'],
+                             lambda: rest_api_client.get_project(team['jira_project']))
+
+
+def list_boards(rest_api_client):
+    """
+    Helper function to stream every board of an instance into a dict,
+    keeping only the names and IDs.
+
+    :param SPU.jira_client.JiraClient rest_api_client: Rest API client
+    :return: Board names to IDs
+    :rtype: Dict
+    """
+    return {board['name']: board['id'] for board in rest_api_client.iter_boards(prefetch=True)}
+
+
+def run_per_instance(config, calls):
+    """
+    Function to run calls concurrently, with at most max_in_flight of
+    them running against any one JIRA instance.
+
+    :param Dict config: Config dict
+    :param List calls: (jira_instance, function) pairs
+    :return: Result of every call, in order
     :rtype: List
     """
-    all_boards = {}
-    for jira in jiras:
-        client = get_jira_client(jira, config)
-        boards = client.boards()
-        for board in boards:
-            all_boards[board.name] = board.id
-    return all_boards
+    executors = {}
+    try:
+        futures = []
+        for jira_instance, call in calls:
+            if jira_instance not in executors:
+                executors[jira_instance] = ThreadPoolExecutor(
+                    max_workers=config['SPU']['jira'][jira_instance].get(
+                        'max_in_flight', DEFAULT_MAX_IN_FLIGHT))
+            futures.append(executors[jira_instance].submit(call))
+        return [future.result() for future in futures]
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
 
 
-def create_sprints(new_board, calender, client):
+def find_board(rest_api_client, name):
     """
-    Helper function to create sprints for a board.
+    Helper function to look up a single board by name. The server only
+    returns boards whose name contains the name, so this is one small
+    page rather than every board.
 
-    :param jira.resources.Board new_board: New JIRA Board
-    :param Dict calender: Calender Dict
-    :param jira.client.JIRA client: JIRA client
-    :return: Nothing
+    :param SPU.jira_client.JiraClient rest_api_client: Rest API client
+    :param String name: Exact board name
+    :return: Board ID or None if there is no such board
+    :rtype: Int
     """
-    sprints = []
-    for sprint in calender:
-        # Create our sprints
-        sprint = client.create_sprint(
-            name=sprint['sprint_string'],
-            board_id=new_board['id'],
-            # startDate=value['start_date'].strftime('%Y-%m-%dT%H:%M:00.000+10:0'),
-            # endDate=value['end_date'].strftime('%Y-%m-%dT%H:%M:00.000+10:0'),
-        )
-        sprints.append(sprint)
-    return sprints
+    for board in rest_api_client.iter_boards(name=name):
+        if board['name'] == name:
+            return board['id']
+    return None
 
 
-def create_labels(team, name, calender, client, sprints):
+def journaled(journal, name, quarter_string, operation, write, ids=None, stale=None):
     """
-    Helper function to create labels for a project.
+    Helper function to make a write at most once per journal.
 
-    :param Dict team: Team dict
-    :param Dict calender: Calender dict
-    :param jira.client.JIRA client: JIRA client
+    :param SPU.journal.Journal journal: Optional run journal
     :param String name: Team name
-    :param List sprints: List of sprints
-    :return: Newly Created Issue
-    :rtype: jira.Issue
-    """
-    # There is no way to 'manage' labels.
-    # See https://community.atlassian.com/t5/Jira-questions/How-to-manage-labels/qaq-p/296536
-    # Best way is to create an issue for our new board
-
-    # First gather our labels
-    labels = []
-    for sprint, value in calender.items():
-        if value['quarter_string'] not in labels:
-            labels.append(value['quarter_string'])
-
-    # Create a new JIRA issue
-    title = '%s Sprint Planning for %s-%s' % (
-        name, calender[0]['quarter_string'], calender[0]['quarter_string']
-    )
-    issue = client.create_issue(fields={
-        'summary': title,
-        'issuetype': {'name': 'Story'},
-        'labels': labels
-    })
+    :param String quarter_string: Quarter string
+    :param String operation: Operation name
+    :param function write: Function making the write
+    :param function ids: Optional function picking the IDs to record from the result
+    :param function stale: Optional function telling whether the recorded IDs are out
+        of date, in which case the write is made again
+    :return: Result of the write, or the recorded IDs if it was already made
+    """
+    if journal is None:
+        return write()
+    done = journal.get(name, quarter_string, operation)
+    if done is not None and not (stale and stale(done)):
+        log.info("Skipping %s for %s %s, already done", operation, name, quarter_string)
+        return done
+    result = write()
+    journal.record(name, quarter_string, operation, ids(result) if ids else (result or {}))
+    return result
 
-    # Add issue to first sprint
-    client.add_issues_to_sprint(sprints[0].id, issue_keys=[issue.key])
 
-    return issue
+async def async_journaled(journal, name, quarter_string, operation, write, ids=None):
+    """
+    Asyncio version of journaled.
+
+    :param SPU.journal.Journal journal: Optional run journal
+    :param String name: Team name
+    :param String quarter_string: Quarter string
+    :param String operation: Operation name
+    :param function write: Coroutine function making the write
+    :param function ids: Optional function picking the IDs to record from the result
+    :return: Result of the write, or the recorded IDs if it was already made
+    """
+    if journal is None:
+        return await write()
+    done = journal.get(name, quarter_string, operation)
+    if done is not None:
+        log.info("Skipping %s for %s %s, already done", operation, name, quarter_string)
+        return done
+    result = await write()
+    journal.record(name, quarter_string, operation, ids(result) if ids else (result or {}))
+    return result
 
 
-def create_filter(quarters_label, project, rest_api_client, glob=False):
+def sprint_date(value):
     """
-    Helper function to create filters for our sprint planning.
+    Helper function to format a calender date the way JIRA takes sprint dates.
+
+    :param datetime.datetime value: Start or end date of a sprint
+    :return: ISO 8601 date with the local offset, e.g. '2020-01-06T00:00:00.000+10:00'
+    :rtype: String
+    """
+    return value.astimezone().isoformat(timespec='milliseconds')
+
+
+def sprint_swaps(sprints):
+    """
+    Helper function to work out how to put the sprints of a board in
+    calender order. JIRA lists sprints in the order they were created, so
+    sprints created at the same time can land in any order.
+
+    :param List sprints: New sprints in calender order
+    :return: (sprint ID, ID of the sprint to swap places with) pairs, in order
+    :rtype: List
+    """
+    # The board lists the sprints by ID until any are swapped
+    slots = sorted(sprint['id'] for sprint in sprints)
+    swaps = []
+    for index, sprint in enumerate(sprints):
+        if slots[index] != sprint['id']:
+            other = slots.index(sprint['id'])
+            swaps.append((sprint['id'], slots[index]))
+            slots[index], slots[other] = slots[other], slots[index]
+    return swaps
+
+
+def order_sprints(sprints, rest_api_client):
+    """
+    Helper function to swap the sprints of a board into calender order.
+
+    :param List sprints: New sprints in calender order
+    :param SPU.jira_client.JiraClient rest_api_client: rest API JIRA client
+    :return: Number of swaps made
+    :rtype: Dict
+    """
+    swaps = sprint_swaps(sprints)
+    for sprint_id, other_id in swaps:
+        rest_api_client.swap_sprint(sprint_id, other_id)
+    return {'swaps': len(swaps)}
+
+
+def create_sprints(new_board, calender, client, name=None, journal=None,
+                   max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Helper function to create sprints for a board.
+
+    :param Dict new_board: New JIRA Board
+    :param List calender: Sprints of the quarter
+    :param SPU.jira_client.JiraClient client: rest API JIRA client
+    :param String name: Team name, used to journal the sprints
+    :param SPU.journal.Journal journal: Optional run journal
+    :param Int max_in_flight: Most sprints created at once
+    :return: Newly created sprints, in calender order
+    :rtype: List
+    """
+    return create_board_sprints([(new_board, calender)], client, name=name, journal=journal,
+                                max_in_flight=max_in_flight)[0]
+
+
+def create_board_sprints(boards, client, name=None, journal=None,
+                         max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Function to create the sprints of many boards at once, with their
+    start and end dates. Once every sprint of a board exists the sprints
+    are swapped into calender order if they landed out of it.
+
+    :param List boards: (new board, sprints of the quarter) pairs
+    :param SPU.jira_client.JiraClient client: rest API JIRA client
+    :param String name: Team name, used to journal the sprints
+    :param SPU.journal.Journal journal: Optional run journal
+    :param Int max_in_flight: Most sprints created at once
+    :return: Newly created sprints of every board, in calender order
+    :rtype: List
+    """
+    def create(new_board, sprint):
+        return journaled(
+            journal, name, sprint['quarter_string'], f"create_sprint/{sprint['sprint_string']}",
+            lambda: client.create_sprint(
+                name=sprint['sprint_string'],
+                board_id=new_board['id'],
+                start_date=sprint_date(sprint['start_date']),
+                end_date=sprint_date(sprint['end_date'])),
+            ids=lambda created: {'id': created['id'], 'name': created['name']})
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        # Every worker runs in a copy of our context so the deadline carries over
+        futures = [[executor.submit(contextvars.copy_context().run, create, new_board, sprint)
+                    for sprint in sprints] for new_board, sprints in boards]
+        created = [[future.result() for future in board] for board in futures]
+    for (new_board, sprints), new_sprints in zip(boards, created):
+        if new_sprints:
+            journaled(journal, name, sprints[0]['quarter_string'], 'order_sprints',
+                      lambda: order_sprints(new_sprints, client))
+    return created
+
+
+def filter_params(quarters_label, project, glob=False):
+    """
+    Helper function to build the name and JQL of a sprint planning filter.
 
     :param String quarters_label: Quarter label we are using
     :param String project: Project we are working on
-    :param SPS.jira_client rest_api_client: rest API JIRA client
     :param Bool glob: Is this a global filter (omit project)
-    :return: Dict of newly created filters
+    :return: Filter name, JQL and favourite flag
     :rtype: Dict
     """
     if not glob:
-        filter = rest_api_client.create_filter(
+        return dict(
             name=f'{quarters_label} - {project} filter',
             jql=f"labels = '{quarters_label}' AND project = {project} ORDER BY Rank ASC",
             favorite=True
         )
-        return filter
     else:
-        filter = rest_api_client.create_filter(
+        return dict(
             name=f'{project} filter',
             jql=f"labels = '{quarters_label}' ORDER BY Rank ASC",
             favorite=True
         )
-        return filter
 
 
-def get_global_filters(jira, config, bad_board=False):
+def create_filter(quarters_label, project, rest_api_client, glob=False):
+    """
+    Helper function to create filters for our sprint planning.
+
+    :param String quarters_label: Quarter label we are using
+    :param String project: Project we are working on
+    :param SPS.jira_client rest_api_client: rest API JIRA client
+    :param Bool glob: Is this a global filter (omit project)
+    :return: Dict of newly created filters
+    :rtype: Dict
+    """
+    filter = rest_api_client.create_filter(**filter_params(quarters_label, project, glob=glob))
+    return filter
+
+
+async def async_create_filter(quarters_label, project, rest_api_client, glob=False):
+    """
+    Asyncio version of create_filter.
+
+    :param String quarters_label: Quarter label we are using
+    :param String project: Project we are working on
+    :param SPU.jira_client.AsyncJiraClient rest_api_client: Asyncio rest API JIRA client
+    :param Bool glob: Is this a global filter (omit project)
+    :return: Dict of newly created filters
+    :rtype: Dict
+    """
+    return await rest_api_client.create_filter(**filter_params(quarters_label, project, glob=glob))
+
+
+def get_global_filters(jira, config, global_filters, targeted=False):
     """
-    Helper function to get all favorite filters.
+    Helper function to fetch the global filters of an instance once and
+    index them for both global boards.
 
     :param Dict jira: JIRA instance to use
     :param Dict config: Config file
-    :param Bool bad_board: Should get get filters for the Bad Board
-    :return: Global filters
-    :rtype: List
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Index to add the filters to
+    :param Bool targeted: Only ask the server for filters named after the instance
+    :return: The index
+    :rtype: SPU.global_filters.GlobalFilterIndex
     """
-    if bad_board:
-        title = m.GLOBAL_BAD_BOARD
-    else:
-        title = m.GLOBAL_BOARD
-
     # Get the rest API client
-    jira_instance = config['SPU']['jira'].get(jira['jira_instance'], False)
-
-    rest_api_client = JiraClient(
-        url=jira_instance['options']['server'],
-        authtype='basic',
-        username=jira_instance['basic_auth'][0],
-        password=jira_instance['basic_auth'][1]
-    )
-    resp = rest_api_client.get_favourite_filters()
-    new_filters = []
-    for fil in resp:
-        if title in fil['name']:
-            new_filters.append(fil)
-    return new_filters
+    rest_api_client = get_rest_api_client(jira['jira_instance'], config)
+    if targeted:
+        # Every global filter is named 'TITLE INSTANCE - QUARTER filter'
+        resp = [fil for fil in rest_api_client.iter_filters(name=f"{jira['jira_instance']} - ")
+                if fil.get('favourite', True)]
+    else:
+        resp = rest_api_client.get_favourite_filters()
+    global_filters.add(jira['jira_instance'], resp)
+    return global_filters
 
 
-def build_global_board(config, global_calender, jira_instance, bad_board=False):
+def build_global_board(config, global_calender, jira_instance, bad_board=False,
+                       deadline=None, journal=None):
     """
-    Function to build our global boards for PMs.
+    Function to build our global boards for PMs. Every filter and board is
+    journaled under the board's title, so a run that was deferred partway
+    through is finished by --resume.
 
     :param Dict config: Config Dict
     :param Dict global_calender: Calender starting with start date passed into config
     :param Dict jira_instance: JIRA instance to use
     :param Bool bad_board: Should we create the global bad board
-    :return:
+    :param SPU.deadline.Deadline deadline: Optional deadline the boards have to be built by
+    :param SPU.journal.Journal journal: Optional journal, writes already in it are skipped
+    :return: Global filters in quarter order
+    :rtype: List
     """
     if bad_board:
         title = m.GLOBAL_BAD_BOARD
@@ -197,63 +606,248 @@ def build_global_board(config, global_calender, jira_instance, bad_board=False):
         raise Exception
 
     # Get the rest API client
-    rest_api_client = JiraClient(
-        url=config['SPU']['jira'][jira_instance['jira_instance']]['options']['server'],
-        authtype='basic',
-        username=config['SPU']['jira'][jira_instance['jira_instance']]['basic_auth'][0],
-        password=config['SPU']['jira'][jira_instance['jira_instance']]['basic_auth'][1]
-    )
+    rest_api_client = get_rest_api_client(jira_instance['jira_instance'], config)
+    deadline = deadline or current_deadline() or Deadline()
     # Make 4 filters
     filters = []
-    for quarter in range(1, 5):
-        # Create our quarter label
-        quarter_label = global_calender[quarter][0]['quarter_string']
-
-        # Create our quarter filter
-        quarter_filter = create_filter(
-            quarters_label=quarter_label,
-            project=f"{title} {jira_instance['jira_instance']} - {quarter_label}",
-            rest_api_client=rest_api_client,
-            glob=True)
-
-        if bad_board:
-            new_jql = f"(remainingEstimate > 0 OR duedate < endOfDay() " \
-                f"OR status not in (Closed, Resolved) OR cf[11908] " \
-                f"is not EMPTY) AND {quarter_filter['jql']}"
-            rest_api_client.update_filter(
-                name=quarter_filter['name'],
+    with deadline.active():
+        for quarter in range(1, 5):
+            # Create our quarter label
+            quarter_label = global_calender[quarter][0]['quarter_string']
+            deadline.check(f"building {title} {quarter_label}")
+
+            # Create our quarter filter and board
+            quarter_filter = create_global_shard(
+                title, jira_instance['jira_instance'], quarter_label,
+                jql.global_jql(quarter_label, bad_board=bad_board),
+                rest_api_client, journal=journal)
+            # Add the filter to our list of filters
+            filters.append(quarter_filter)
+    return filters
+
+
+def global_shard_name(title, jira_instance, quarter_label, shard=1):
+    """
+    Helper function to build the name shared by a global filter and board.
+    The first shard keeps the original name, later shards are numbered.
+
+    :param String title: Title of the global board
+    :param String jira_instance: JIRA instance name
+    :param String quarter_label: Quarter label
+    :param Int shard: Shard number, starting at 1
+    :return: Name without the ' filter' or ' Board' suffix
+    :rtype: String
+    """
+    if shard == 1:
+        return f"{title} {jira_instance} - {quarter_label}"
+    return f"{title} {jira_instance} - {quarter_label} ({shard})"
+
+
+def create_global_shard(title, jira_instance, quarter_label, quarter_jql, rest_api_client,
+                        shard=1, journal=None):
+    """
+    Helper function to create one global filter and the board on top of it.
+
+    :param String title: Title of the global board
+    :param String jira_instance: JIRA instance name
+    :param String quarter_label: Quarter label
+    :param String quarter_jql: JQL of the filter
+    :param SPU.jira_client.JiraClient rest_api_client: rest API JIRA client
+    :param Int shard: Shard number, starting at 1
+    :param SPU.journal.Journal journal: Optional journal, the filter and board are
+        journaled under 'TITLE INSTANCE'
+    :return: Newly created filter
+    :rtype: Dict
+    """
+    name = global_shard_name(title, jira_instance, quarter_label, shard=shard)
+    suffix = '' if shard == 1 else f'/{shard}'
+    quarter_filter = journaled(
+        journal, f"{title} {jira_instance}", quarter_label, f'create_global_filter{suffix}',
+        lambda: rest_api_client.create_filter(
+            name=f'{name} filter', jql=quarter_jql, favorite=True),
+        ids=lambda fil: {'id': fil['id'], 'name': fil['name'], 'jql': quarter_jql})
+    journaled(
+        journal, f"{title} {jira_instance}", quarter_label, f'create_global_board{suffix}',
+        lambda: rest_api_client.create_board(
+            name=f'{name} Board',
+            project=None,
+            filter_id=int(quarter_filter['id'])),
+        ids=lambda board: {'id': board['id'], 'name': board['name']})
+    return quarter_filter
+
+
+def global_title(bad_board=False):
+    """
+    Helper function to get the title of a global board.
+
+    :param Bool bad_board: Get the title of the bad board
+    :return: Title
+    :rtype: String
+    """
+    return m.GLOBAL_BAD_BOARD if bad_board else m.GLOBAL_BOARD
+
+
+def global_max_projects(config):
+    """
+    Helper function to get the most projects one global filter may hold.
+
+    :param Dict config: Config dict
+    :return: Most projects per global filter
+    :rtype: Int
+    """
+    return config['SPU'].get('global_board_max_projects', DEFAULT_GLOBAL_BOARD_MAX_PROJECTS)
+
+
+def global_shard_jql(filters, quarter_string, project, max_projects, bad_board=False):
+    """
+    Helper function to add a project to one shard of the global filters of
+    a quarter. It joins the first shard with room, or a new shard when
+    every shard is full.
+
+    :param List filters: Global filters of the quarter, in shard order
+    :param String quarter_string: Quarter string to use
+    :param String project: Project to add
+    :param Int max_projects: Most projects one filter may hold
+    :param Bool bad_board: Are these filters of the bad board
+    :return: (shard number, new JQL) or None if a shard already shows the project
+    :rtype: Tuple
+    """
+    existing = [jql.parse_projects(fil['jql']) for fil in filters]
+    if any(project in projects for projects in existing):
+        return None
+    shards = jql.assign_shards(existing, [project], max_projects)
+    for shard, projects in enumerate(shards, start=1):
+        if project in projects:
+            return shard, jql.global_jql(quarter_string, projects, bad_board=bad_board)
+
+
+def add_to_global_filters(config, jira_instance, global_filters, quarter_string, project,
+                          rest_api_client, name=None, journal=None, bad_board=False):
+    """
+    Helper function to write a project into one shard of the global filters
+    of a quarter right away. A new shard, and its board, is created when
+    the last one is full. The index is updated so the next team builds on it.
+
+    :param Dict config: Config dict
+    :param String jira_instance: JIRA instance name
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param String quarter_string: Quarter string to use
+    :param String project: Project to add
+    :param SPU.jira_client.JiraClient rest_api_client: rest API JIRA client
+    :param String name: Team name, used to journal the write
+    :param SPU.journal.Journal journal: Optional run journal
+    :param Bool bad_board: Add the project to the bad board
+    :return: Filter the project was written to, or None if nothing changed
+    :rtype: Dict
+    """
+    filters = global_filters.get(jira_instance, quarter_string, bad_board=bad_board)
+    if not filters:
+        return None
+    update = global_shard_jql(filters, quarter_string, project, global_max_projects(config),
+                              bad_board=bad_board)
+    if update is None:
+        return None
+    shard, new_jql = update
+    if shard <= len(filters):
+        fil = filters[shard - 1]
+        journaled(
+            journal, name, quarter_string, f"update_filter/{fil['id']}",
+            lambda: rest_api_client.update_filter(
+                name=fil['name'],
                 jql=new_jql,
-                filter_id=quarter_filter['id']
-            )
+                filter_id=fil['id']
+            ))
+        fil['jql'] = new_jql
+        return fil
+    new_filter = journaled(
+        journal, name, quarter_string,
+        'create_bad_global_shard' if bad_board else 'create_global_shard',
+        lambda: create_global_shard(global_title(bad_board), jira_instance, quarter_string,
+                                    new_jql, rest_api_client, shard=shard),
+        ids=lambda fil: {'id': fil['id'], 'name': fil['name']})
+    new_filter = dict(new_filter, jql=new_jql)
+    global_filters.add(jira_instance, [new_filter])
+    return new_filter
 
-        # Then create our quarter board
-        new_board = rest_api_client.create_board(
-            name=f"{title} {jira_instance['jira_instance']} - {quarter_label} Board",
+
+async def async_add_to_global_filters(config, jira_instance, global_filters, quarter_string,
+                                      project, rest_api_client, name=None, journal=None,
+                                      bad_board=False):
+    """
+    Asyncio version of add_to_global_filters.
+
+    :param Dict config: Config dict
+    :param String jira_instance: JIRA instance name
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param String quarter_string: Quarter string to use
+    :param String project: Project to add
+    :param SPU.jira_client.AsyncJiraClient rest_api_client: Asyncio rest API JIRA client
+    :param String name: Team name, used to journal the write
+    :param SPU.journal.Journal journal: Optional run journal
+    :param Bool bad_board: Add the project to the bad board
+    :return: Filter the project was written to, or None if nothing changed
+    :rtype: Dict
+    """
+    filters = global_filters.get(jira_instance, quarter_string, bad_board=bad_board)
+    if not filters:
+        return None
+    update = global_shard_jql(filters, quarter_string, project, global_max_projects(config),
+                              bad_board=bad_board)
+    if update is None:
+        return None
+    shard, new_jql = update
+    if shard <= len(filters):
+        fil = filters[shard - 1]
+        # Claim the JQL before writing so a team synced meanwhile builds on it
+        fil['jql'] = new_jql
+        await async_journaled(
+            journal, name, quarter_string, f"update_filter/{fil['id']}",
+            functools.partial(rest_api_client.update_filter,
+                              name=fil['name'],
+                              jql=new_jql,
+                              filter_id=fil['id']))
+        return fil
+    title = global_title(bad_board)
+
+    async def create_shard():
+        shard_name = global_shard_name(title, jira_instance, quarter_string, shard=shard)
+        quarter_filter = await rest_api_client.create_filter(
+            name=f'{shard_name} filter', jql=new_jql, favorite=True)
+        await rest_api_client.create_board(
+            name=f'{shard_name} Board',
             project=None,
             filter_id=int(quarter_filter['id']))
-        # Add the filter to our list of filters
-        filters.append(quarter_filter)
-    return filters
+        return quarter_filter
 
+    new_filter = await async_journaled(
+        journal, name, quarter_string,
+        'create_bad_global_shard' if bad_board else 'create_global_shard',
+        create_shard, ids=lambda fil: {'id': fil['id'], 'name': fil['name']})
+    new_filter = dict(new_filter, jql=new_jql)
+    global_filters.add(jira_instance, [new_filter])
+    return new_filter
 
-def initial_global_jql(quarter_string, bad_board=False):
+
+def quarter_issue_fields(quarter, quarter_string, project):
     """
-    Helper function to return the initial global JQL query.
+    Helper function to build the fields of the issue carrying a quarter label.
 
+    :param Int quarter: Quarter index in the calender
     :param String quarter_string: Quarter string to use
-    :param Bool bad_board: Are we creating the JQL for the bad board
-    :return: Initial JQL
-    :rtype: String
+    :param String project: Project the issue goes in
+    :return: Issue fields
+    :rtype: Dict
     """
-    if bad_board:
-        return f"(remainingEstimate > 0 OR duedate < endOfDay() " \
-            f"OR status not in (Closed, Resolved) OR cf[11908] " \
-            f"is not EMPTY) AND labels = {quarter_string} ORDER BY Rank ASC"
-    else:
-        return f"labels = {quarter_string} ORDER BY Rank ASC"
+    return dict(
+        project=dict(key=project),
+        summary=f'Quarter {quarter} Issue',
+        labels=[quarter_string],
+        issuetype=dict(name='Story'),
+    )
 
 
-def start_sync(calender, config, team, name, filters, bad_filters):
+def start_sync(calender, config, team, name, global_filters, cache=None, journal=None,
+               global_updates=None, deadline=None, issues=None):
     """
     Function to start adding relevant information to JIRA.
 
@@ -261,90 +855,245 @@ def start_sync(calender, config, team, name, filters, bad_filters):
     :param Dict config: Config file
     :param Dict team: Team dict
     :param String name: Team name
-    :param List filters: List of all global filters so we can append too
-    :param List filters: List of all bad global filters so we can append too
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters so we can append too
+    :param SPU.cache.RunCache cache: Optional run cache to reuse lookups from
+    :param SPU.journal.Journal journal: Optional journal, writes already in it are skipped
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional collector, global
+        filter changes are queued on it instead of written right away
+    :param SPU.deadline.Deadline deadline: Optional deadline, a quarter or request that
+        cannot start before it raises SPU.deadline.DeadlineExceeded
+    :param SPU.issues.IssueBatch issues: Optional batch, the quarter issues are queued on
+        it and created in bulk instead of one at a time
     :return: Nothing
     """
     # Get our jira_instance we're using
-    jira_instance = team.get('jira_instance', False)
-    if not jira_instance:
-        jira_instance = config['SPU'].get('default_jira_instance', False)
+    jira_instance = get_jira_instance(team, config)
     if not jira_instance:
         log.warning("No JIRA instance can be found for %s" % name)
 
-    # Get our JIRA client
-    client = get_jira_client(team, config)
-    # Get our Rest API JIRA client
-    rest_api_client = JiraClient(
-        url=config['SPU']['jira'][jira_instance]['options']['server'],
-        authtype='basic',
-        username=config['SPU']['jira'][jira_instance]['basic_auth'][0],
-        password=config['SPU']['jira'][jira_instance]['basic_auth'][1]
+    deadline = deadline or current_deadline() or Deadline()
+    with deadline.active():
+        # Get our Rest API JIRA client
+        rest_api_client = get_rest_api_client(jira_instance, config)
+        # Make sure our project exists before writing anything
+        get_project(team, config, cache=cache)
+
+        boards = []
+        for quarter, sprints in calender.items():
+            if sprints:
+                quarter_string = sprints[0]['quarter_string']
+                # Leave quarters that cannot start in time to the next run
+                deadline.check(f"syncing {name} {quarter_string}")
+                # First create our filters
+                quarter_filter = journaled(
+                    journal, name, quarter_string, 'create_filter',
+                    lambda: create_filter(
+                        quarters_label=quarter_string,
+                        project=team['jira_project'],
+                        rest_api_client=rest_api_client),
+                    ids=lambda fil: {'id': fil['id'], 'name': fil['name']})
+
+                # Update the share permission of that filter
+                # TODO: Do we still need this?
+                # rest_api_client.add_share_permissions(quarter_filter.id)
+
+                # Now update the global filter boards
+                for bad_board in (False, True):
+                    if global_updates is None:
+                        # Add our project to one shard right away
+                        add_to_global_filters(config, jira_instance, global_filters,
+                                              quarter_string, team['jira_project'],
+                                              rest_api_client, name=name, journal=journal,
+                                              bad_board=bad_board)
+                        continue
+                    for fil in global_filters.get(jira_instance, quarter_string,
+                                                  bad_board=bad_board):
+                        # We found the filter we need to update
+                        global_updates.add(jira_instance, fil, quarter_string,
+                                           team['jira_project'], bad_board=bad_board)
+
+                # Then create a new board
+                new_board = journaled(
+                    journal, name, quarter_string, 'create_board',
+                    lambda: rest_api_client.create_board(
+                        name=f"{sprints[0]['quarter_string']} - {name} Board",
+                        project=team['jira_project'],
+                        filter_id=int(quarter_filter['id'])),
+                    ids=lambda board: {'id': board['id'], 'name': board['name']})
+
+                fields = quarter_issue_fields(quarter, quarter_string, team['jira_project'])
+                if issues is None:
+                    # Create a new issue using the new label, only this
+                    # needs the JIRA client
+                    client = get_jira_client(team, config, cache=cache)
+                    journaled(
+                        journal, name, quarter_string, 'create_issue',
+                        lambda: client.create_issue(fields=fields),
+                        ids=lambda issue: {'id': issue.id, 'key': issue.key})
+                boards.append((quarter_string, fields, new_board, sprints))
+
+        # Now create the sprints of every board at once
+        new_sprints = create_board_sprints(
+            [(new_board, sprints) for _, _, new_board, sprints in boards],
+            rest_api_client, name=name, journal=journal,
+            max_in_flight=config['SPU']['jira'][jira_instance].get(
+                'max_in_flight', DEFAULT_MAX_IN_FLIGHT))
+
+        if issues is not None:
+            for (quarter_string, fields, _, _), sprints in zip(boards, new_sprints):
+                # The issue is created in bulk and added to the first sprint
+                issues.add(jira_instance, name, quarter_string, fields,
+                           sprint_id=sprints[0]['id'] if sprints else None)
+
+
+async def async_create_sprints(new_board, calender, rest_api_client, name=None, journal=None):
+    """
+    Asyncio version of create_sprints. The sprints of the board are
+    created at once, bounded by the client's 'max_in_flight'.
+
+    :param Dict new_board: New JIRA Board
+    :param List calender: Sprints of the quarter
+    :param SPU.jira_client.AsyncJiraClient rest_api_client: Asyncio rest API JIRA client
+    :param String name: Team name, used to journal the sprints
+    :param SPU.journal.Journal journal: Optional run journal
+    :return: Newly created sprints, in calender order
+    :rtype: List
+    """
+    def create(sprint):
+        return async_journaled(
+            journal, name, sprint['quarter_string'], f"create_sprint/{sprint['sprint_string']}",
+            lambda: rest_api_client.create_sprint(
+                name=sprint['sprint_string'],
+                board_id=new_board['id'],
+                start_date=sprint_date(sprint['start_date']),
+                end_date=sprint_date(sprint['end_date'])),
+            ids=lambda created: {'id': created['id'], 'name': created['name']})
+
+    sprints = list(await asyncio.gather(*[create(sprint) for sprint in calender]))
+
+    async def order():
+        swaps = sprint_swaps(sprints)
+        for sprint_id, other_id in swaps:
+            await rest_api_client.swap_sprint(sprint_id, other_id)
+        return {'swaps': len(swaps)}
+
+    if sprints:
+        await async_journaled(journal, name, calender[0]['quarter_string'], 'order_sprints',
+                              order)
+    return sprints
+
+
+async def async_sync_quarter(quarter, sprints, config, team, name, jira_instance,
+                             global_filters, rest_api_client, journal=None, global_updates=None,
+                             issues=None):
+    """
+    Function to add a single quarter of a team to JIRA.
+
+    :param Int quarter: Quarter index in the calender
+    :param List sprints: Sprints of the quarter
+    :param Dict config: Config file
+    :param Dict team: Team dict
+    :param String name: Team name
+    :param String jira_instance: JIRA instance name
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param SPU.jira_client.AsyncJiraClient rest_api_client: Asyncio rest API JIRA client
+    :param SPU.journal.Journal journal: Optional journal, writes already in it are skipped
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional collector for
+        global filter changes
+    :param SPU.issues.IssueBatch issues: Optional batch the quarter issue is queued on
+    :return: Nothing
+    """
+    quarter_string = sprints[0]['quarter_string']
+    # First create our filters
+    quarter_filter = await async_journaled(
+        journal, name, quarter_string, 'create_filter',
+        lambda: async_create_filter(
+            quarters_label=quarter_string,
+            project=team['jira_project'],
+            rest_api_client=rest_api_client),
+        ids=lambda fil: {'id': fil['id'], 'name': fil['name']})
+
+    # Now update the global filter boards
+    updates = []
+    for bad_board in (False, True):
+        if global_updates is None:
+            # Add our project to one shard right away
+            updates.append(async_add_to_global_filters(
+                config, jira_instance, global_filters, quarter_string, team['jira_project'],
+                rest_api_client, name=name, journal=journal, bad_board=bad_board))
+            continue
+        for fil in global_filters.get(jira_instance, quarter_string, bad_board=bad_board):
+            global_updates.add(jira_instance, fil, quarter_string, team['jira_project'],
+                               bad_board=bad_board)
+    await asyncio.gather(*updates)
+
+    # Then create a new board
+    new_board = await async_journaled(
+        journal, name, quarter_string, 'create_board',
+        lambda: rest_api_client.create_board(
+            name=f"{quarter_string} - {name} Board",
+            project=team['jira_project'],
+            filter_id=int(quarter_filter['id'])),
+        ids=lambda board: {'id': board['id'], 'name': board['name']})
+
+    if issues is not None:
+        # The issue is created in bulk and added to the first sprint
+        new_sprints = await async_create_sprints(new_board, sprints, rest_api_client,
+                                                 name=name, journal=journal)
+        issues.add(jira_instance, name, quarter_string,
+                   quarter_issue_fields(quarter, quarter_string, team['jira_project']),
+                   sprint_id=new_sprints[0]['id'] if new_sprints else None)
+        return
+
+    # The issue and the sprints only depend on the board
+    await asyncio.gather(
+        async_journaled(
+            journal, name, quarter_string, 'create_issue',
+            lambda: rest_api_client.create_issue(
+                fields=quarter_issue_fields(quarter, quarter_string, team['jira_project'])),
+            ids=lambda issue: {'id': issue['id'], 'key': issue['key']}),
+        async_create_sprints(new_board, sprints, rest_api_client, name=name, journal=journal)
     )
-    # Get our project ID
-    project_id = client.project(team['jira_project']).id
-
-    for quarter, sprints in calender.items():
-        if sprints:
-            quarter_string = sprints[0]['quarter_string']
-            # First create our filters
-            quarter_filter = create_filter(
-                quarters_label=quarter_string,
-                project=team['jira_project'],
-                rest_api_client=rest_api_client)
-
-            # Update the share permission of that filter
-            # TODO: Do we still need this?
-            # rest_api_client.add_share_permissions(quarter_filter.id)
-
-            # Now update the global filter board
-            for fil in filters[jira_instance]:
-                if sprints[0]['quarter_string'] in fil['name']:
-                    # We found the filter we need to update
-                    if team['jira_project'] not in fil['jql']:
-                        if fil['jql'] == initial_global_jql(quarter_string):
-                            # If this is the first project we're adding
-                            new_jql = f"project = {team['jira_project']} AND {fil['jql']}"
-                        else:
-                            new_jql = f"project = {team['jira_project']} OR {fil['jql']}"
-                        rest_api_client.update_filter(
-                            name=fil['name'],
-                            jql=new_jql,
-                            filter_id=fil['id']
-                        )
-
-            for fil in bad_filters[jira_instance]:
-                if sprints[0]['quarter_string'] in fil['name']:
-                    # We found the filter we need to update
-                    if team['jira_project'] not in fil['jql']: 
-                        if fil['jql'] == initial_global_jql(quarter_string, bad_board=True):
-                            # If this is the first project we're adding
-                            new_jql = f"project = {team['jira_project']} AND {fil['jql']}"
-                        else:
-                            new_jql = f"project = {team['jira_project']} OR {fil['jql']}"
-                        rest_api_client.update_filter(
-                            name=fil['name'],
-                            jql=new_jql,
-                            filter_id=fil['id']
-                        )
-
-            # Then create a new board
-            new_board = rest_api_client.create_board(
-                name=f"{sprints[0]['quarter_string']} - {name} Board",
-                project=team['jira_project'],
-                filter_id=int(quarter_filter['id']))
-
-            # Create a new issue using the new label
-            kwargs = dict(
-                project=dict(key=team['jira_project']),
-                summary=f'Quarter {quarter} Issue',
-                labels=[sprints[0]['quarter_string']],
-                issuetype=dict(name='Story'),
-            )
-            new_issue = client.create_issue(**kwargs)
 
-            # Now create our sprints
-            sprints = create_sprints(new_board, sprints, client)
 
+async def async_start_sync(calender, config, team, name, global_filters,
+                           rest_api_client=None, journal=None, global_updates=None,
+                           deadline=None, issues=None):
+    """
+    Asyncio version of start_sync. Quarters of the calender are synced at once.
+
+    :param Dict calender: Calender dict
+    :param Dict config: Config file
+    :param Dict team: Team dict
+    :param String name: Team name
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param SPU.jira_client.AsyncJiraClient rest_api_client: Optional asyncio rest API client
+    :param SPU.journal.Journal journal: Optional journal, writes already in it are skipped
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional collector for
+        global filter changes
+    :param SPU.deadline.Deadline deadline: Optional deadline, a request that cannot
+        start before it raises SPU.deadline.DeadlineExceeded
+    :param SPU.issues.IssueBatch issues: Optional batch the quarter issues are queued on
+    :return: Nothing
+    """
+    # Get our jira_instance we're using
+    jira_instance = get_jira_instance(team, config)
+    if not jira_instance:
+        log.warning("No JIRA instance can be found for %s" % name)
+
+    if rest_api_client is None:
+        rest_api_client = get_async_rest_api_client(jira_instance, config)
+
+    deadline = deadline or current_deadline() or Deadline()
+    with deadline.active():
+        # Make sure our project exists
+        await rest_api_client.get_project(team['jira_project'])
+
+        await asyncio.gather(*[
+            async_sync_quarter(quarter, sprints, config, team, name, jira_instance,
+                               global_filters, rest_api_client, journal=journal,
+                               global_updates=global_updates, issues=issues)
+            for quarter, sprints in calender.items() if sprints
+        ])
 
 
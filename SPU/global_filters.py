@@ -0,0 +1,240 @@
+"""
+This module is used to manage the global filters behind the global boards.
+"""
+# Build In Modules
+import logging
+import re
+import threading
+
+# 3rd Party Modules
+import requests
+
+# Local Modules
+from SPU.deadline import DeadlineExceeded
+import SPU.jql as jql
+
+# Global Variables
+log = logging.getLogger(__name__)
+SHARD_NUMBER = re.compile(r' \((\d+)\) filter$')
+# What follows 'TITLE INSTANCE - ' in the name of a global filter
+GLOBAL_FILTER_SUFFIX = re.compile(r'^(Y\d+-Q[1-4])(?: \(\d+\))? filter$')
+
+
+def shard_number(fil):
+    """
+    Helper function to get the shard number of a global filter.
+
+    :param Dict fil: Global filter
+    :return: Shard number, starting at 1
+    :rtype: Int
+    """
+    match = SHARD_NUMBER.search(fil['name'])
+    return int(match.group(1)) if match else 1
+
+
+class GlobalFilterIndex:
+
+    """ The global filters of every JIRA instance, indexed by board kind
+        (good or bad board) and quarter string, with the shards of a
+        quarter in shard order. Filters are matched on the exact global
+        filter name rather than a substring, so a title that is part of
+        the other title cannot pick up the wrong filters.
+    """
+
+    def __init__(self):
+        """Returns a GlobalFilterIndex object
+        """
+        self.filters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(jira_instance, fil):
+        """ Work out which global filter a filter is from its name.
+        :param string jira_instance : JIRA instance name
+        :param dict fil : filter
+        :return tuple key: (bad_board, quarter_string) or None if this is
+        not a global filter of the instance
+        """
+        # Imported here rather than at the top, SPU.main imports this module
+        import SPU.main as m
+        for bad_board, title in ((True, m.GLOBAL_BAD_BOARD), (False, m.GLOBAL_BOARD)):
+            prefix = f"{title} {jira_instance} - "
+            if fil['name'].startswith(prefix):
+                match = GLOBAL_FILTER_SUFFIX.match(fil['name'][len(prefix):])
+                if match:
+                    return bad_board, match.group(1)
+        return None
+
+    def add(self, jira_instance, filters):
+        """ Index the global filters among some filters of an instance.
+        Other filters are ignored.
+        :param string jira_instance : JIRA instance name
+        :param iterable filters : filters with a name, id and jql
+        :return int added: number of global filters indexed
+        """
+        added = 0
+        for fil in filters:
+            key = self.parse(jira_instance, fil)
+            if key is None:
+                continue
+            with self._lock:
+                shards = self.filters.setdefault(jira_instance, {}).setdefault(key, [])
+                shards.append(fil)
+                shards.sort(key=shard_number)
+            added += 1
+        return added
+
+    def replace(self, jira_instance, filters, bad_board=False):
+        """ Swap the filters of one board kind for newly built ones. A filter
+        the index already holds, e.g. one a resumed run built before, keeps
+        its indexed JQL since teams may have added projects to it since.
+        :param string jira_instance : JIRA instance name
+        :param list filters : the new global filters
+        :param bool bad_board : are these filters of the bad board
+        """
+        with self._lock:
+            index = self.filters.setdefault(jira_instance, {})
+            known = {fil['id']: fil for key, shards in index.items() if key[0] == bad_board
+                     for fil in shards}
+            for key in [key for key in index if key[0] == bad_board]:
+                del index[key]
+        self.add(jira_instance, [known.get(fil['id'], fil) for fil in filters])
+
+    def get(self, jira_instance, quarter_string, bad_board=False):
+        """ Get the global filters of a quarter.
+        :param string jira_instance : JIRA instance name
+        :param string quarter_string : quarter string
+        :param bool bad_board : get the filters of the bad board
+        :return list filters: the quarter's filters in shard order
+        """
+        return self.filters.get(jira_instance, {}).get((bad_board, quarter_string), [])
+
+    def items(self, jira_instance):
+        """ Every indexed quarter of an instance.
+        :param string jira_instance : JIRA instance name
+        :return list items: ((bad_board, quarter_string), filters) pairs
+        """
+        return list(self.filters.get(jira_instance, {}).items())
+
+
+class GlobalFilterUpdates:
+
+    """ Collects the projects every team adds to the global filters during
+        a run, so each global filter is written once with its final JQL
+        instead of once per team. When a quarter holds more projects than
+        one filter should, the extra projects go to new filters and boards.
+    """
+
+    def __init__(self):
+        """Returns a GlobalFilterUpdates object
+        """
+        self.pending = {}
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def add(self, jira_instance, fil, quarter_string, project, bad_board=False):
+        """ Queue a project to be added to the global filters of a quarter.
+        :param string jira_instance : JIRA instance name
+        :param dict fil : global filter of the quarter
+        :param string quarter_string : quarter string of the filter
+        :param string project : project to add
+        :param bool bad_board : is this a filter of the bad board
+        """
+        with self._lock:
+            entry = self.pending.setdefault((jira_instance, quarter_string, bad_board), {
+                'filters': {},
+                'projects': [],
+            })
+            entry['filters'][fil['id']] = fil
+            if project not in entry['projects']:
+                entry['projects'].append(project)
+
+    @staticmethod
+    def final_shards(entry, max_projects):
+        """ Spread the queued projects over the filters of a quarter.
+        :param dict entry : queued update
+        :param int max_projects : most projects one filter may hold
+        :return list shards: (filter or None, projects) for every shard,
+        in shard order, None for shards that have to be created
+        """
+        filters = sorted(entry['filters'].values(), key=shard_number)
+        existing = [jql.parse_projects(fil['jql']) for fil in filters]
+        shards = jql.assign_shards(existing, entry['projects'], max_projects)
+        return [(filters[index] if index < len(filters) else None, projects)
+                for index, projects in enumerate(shards)]
+
+    def fail(self, key, error):
+        """ Record a global filter that could not be written.
+        :param tuple key : (jira_instance, quarter_string, bad_board) of the filter
+        :param error : what went wrong
+        """
+        jira_instance, quarter_string, bad_board = key
+        log.error("Failed to update the %sglobal filters of %s on %s: %s",
+                  'bad ' if bad_board else '', quarter_string, jira_instance, error)
+        with self._lock:
+            self.failed.append({'jira_instance': jira_instance,
+                                'quarter_string': quarter_string,
+                                'bad_board': bad_board,
+                                'error': error})
+
+    def flush(self, config, journal=None):
+        """ Write every changed global filter with a single update_filter
+        and create any new shards. The in memory filters are updated to
+        match what was written. A quarter stays queued until all of its
+        filters are written, the ones that failed are listed in 'failed'.
+        :param dict config : Config dict
+        :param SPU.journal.Journal journal : optional run journal, writes are
+        journaled under the name of their global filter
+        :return int updated: number of filters written
+        """
+        # Imported here rather than at the top, SPU.main imports this module
+        import SPU.downstream as d
+        with self._lock:
+            pending = list(self.pending.items())
+        max_projects = d.global_max_projects(config)
+        updated = 0
+        for key, entry in pending:
+            jira_instance, quarter_string, bad_board = key
+            rest_api_client = d.get_rest_api_client(jira_instance, config)
+            title = d.global_title(bad_board)
+            shards = self.final_shards(entry, max_projects)
+            written = True
+            for shard, (fil, projects) in enumerate(shards, start=1):
+                new_jql = jql.global_jql(quarter_string, projects, bad_board=bad_board)
+                if fil is not None and new_jql == fil['jql']:
+                    continue
+                name = d.global_shard_name(title, jira_instance, quarter_string, shard=shard)
+                try:
+                    if fil is None:
+                        log.info("Starting global filter %s for %s", shard, quarter_string)
+                        fil = d.journaled(
+                            journal, name, quarter_string, 'create_global_shard',
+                            lambda: d.create_global_shard(title, jira_instance, quarter_string,
+                                                          new_jql, rest_api_client, shard=shard),
+                            ids=lambda new_filter: {'id': new_filter['id'],
+                                                    'name': new_filter['name']})
+                        # A retry builds on the new shard rather than creating it again
+                        fil = dict(fil, jql=new_jql)
+                        entry['filters'][fil['id']] = fil
+                    else:
+                        d.journaled(
+                            journal, name, quarter_string, 'update_filter',
+                            lambda: rest_api_client.update_filter(
+                                name=fil['name'],
+                                jql=new_jql,
+                                filter_id=fil['id']
+                            ),
+                            ids=lambda _: {'id': fil['id'], 'jql': new_jql},
+                            stale=lambda done: done.get('jql') != new_jql)
+                        fil['jql'] = new_jql
+                except (requests.RequestException, DeadlineExceeded) as error:
+                    self.fail(key, error)
+                    written = False
+                    continue
+                updated += 1
+            if written:
+                with self._lock:
+                    if self.pending.get(key) is entry:
+                        del self.pending[key]
+        log.info("Updated %s global filters, %s failed", updated, len(self.failed))
+        return updated
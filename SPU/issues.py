@@ -0,0 +1,177 @@
+"""
+This module is used to create the issues carrying the quarter labels in
+bulk, across every team on a JIRA instance.
+"""
+# Build In Modules
+import functools
+import logging
+import threading
+
+# 3rd Party Modules
+import requests
+
+# Local Modules
+from SPU.jira_client import DEFAULT_BULK_SIZE, SPRINT_ISSUES_MAX
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def chunks(items, size):
+    """
+    Helper function to split a list into chunks.
+
+    :param List items: Items to split
+    :param Int size: Most items per chunk
+    :return: Chunks in order
+    :rtype: List
+    """
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class IssueBatch:
+
+    """ Collects the issues every team creates during a run, so they are
+        created with one bulk request per chunk instead of one request per
+        issue. The created keys are mapped back to their teams and moved
+        into their sprints with one request per sprint.
+    """
+
+    def __init__(self):
+        """Returns an IssueBatch object
+        """
+        self.pending = {}
+        self.created = {}
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def add(self, jira_instance, name, quarter_string, fields, sprint_id=None):
+        """ Queue an issue to be created.
+        :param string jira_instance : JIRA instance name
+        :param string name : team name
+        :param string quarter_string : quarter string of the issue
+        :param dict fields : fields of the new issue
+        :param int sprint_id : optional sprint to move the issue into
+        """
+        with self._lock:
+            self.pending.setdefault(jira_instance, []).append({
+                'name': name,
+                'quarter_string': quarter_string,
+                'fields': fields,
+                'sprint_id': sprint_id,
+                'key': None,
+            })
+
+    def create_chunk(self, rest_api_client, chunk, journal=None):
+        """ Create one chunk of issues and map the new keys back to them.
+        :param SPU.jira_client.JiraClient rest_api_client : rest API JIRA client
+        :param list chunk : queued issues
+        :param SPU.journal.Journal journal : optional run journal
+        """
+        try:
+            resp = rest_api_client.create_issues([issue['fields'] for issue in chunk])
+        except requests.RequestException as error:
+            for issue in chunk:
+                self.fail(issue, error)
+            return
+        # Errors point at the issue by its position, the created issues
+        # follow in the order they were sent
+        errors = {error['failedElementNumber']: error for error in resp.get('errors', [])}
+        created = iter(resp.get('issues', []))
+        for index, issue in enumerate(chunk):
+            if index in errors:
+                self.fail(issue, errors[index].get('elementErrors', errors[index]))
+                continue
+            new_issue = next(created)
+            issue['key'] = new_issue['key']
+            if journal is not None:
+                journal.record(issue['name'], issue['quarter_string'], 'create_issue',
+                               {'id': new_issue['id'], 'key': new_issue['key']})
+
+    def add_chunk(self, rest_api_client, sprint_id, chunk, journal=None):
+        """ Move one chunk of created issues into their sprint.
+        :param SPU.jira_client.JiraClient rest_api_client : rest API JIRA client
+        :param int sprint_id : sprint to move the issues into
+        :param list chunk : created issues
+        :param SPU.journal.Journal journal : optional run journal
+        """
+        try:
+            rest_api_client.add_issues_to_sprint(sprint_id, [issue['key'] for issue in chunk])
+        except requests.RequestException as error:
+            for issue in chunk:
+                self.fail(issue, error)
+            return
+        if journal is not None:
+            for issue in chunk:
+                journal.record(issue['name'], issue['quarter_string'], 'add_issue_to_sprint',
+                               {'sprint_id': sprint_id, 'key': issue['key']})
+
+    def fail(self, issue, error):
+        """ Record an issue that could not be created or moved.
+        :param dict issue : queued issue
+        :param error : what went wrong
+        """
+        log.error("Failed to create the %s issue for %s: %s",
+                  issue['quarter_string'], issue['name'], error)
+        with self._lock:
+            self.failed.append({'name': issue['name'],
+                                'quarter_string': issue['quarter_string'],
+                                'error': error})
+
+    def flush(self, config, journal=None):
+        """ Create every queued issue in chunks of 'issue_bulk_size' and move
+        them into their sprints. Instances are worked on concurrently.
+        Issues a journal already has are not created again.
+        :param dict config : Config dict
+        :param SPU.journal.Journal journal : optional run journal
+        :return dict created: (jira_instance, team, quarter_string) to issue key
+        """
+        # Imported here rather than at the top, SPU.main imports this module
+        import SPU.downstream as d
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        bulk_size = config['SPU'].get('issue_bulk_size', DEFAULT_BULK_SIZE)
+
+        calls = []
+        for jira_instance, issues in pending.items():
+            rest_api_client = d.get_rest_api_client(jira_instance, config)
+            new_issues = []
+            for issue in issues:
+                done = journal.get(issue['name'], issue['quarter_string'], 'create_issue') \
+                    if journal is not None else None
+                if done is not None:
+                    log.info("Skipping create_issue for %s %s, already done",
+                             issue['name'], issue['quarter_string'])
+                    issue['key'] = done['key']
+                else:
+                    new_issues.append(issue)
+            calls.extend((jira_instance, functools.partial(
+                self.create_chunk, rest_api_client, chunk, journal=journal))
+                for chunk in chunks(new_issues, bulk_size))
+        d.run_per_instance(config, calls)
+
+        # Every sprint belongs to one board, so the moves are grouped by sprint
+        calls = []
+        for jira_instance, issues in pending.items():
+            rest_api_client = d.get_rest_api_client(jira_instance, config)
+            sprints = {}
+            for issue in issues:
+                if issue['key'] is None or issue['sprint_id'] is None:
+                    continue
+                if journal is not None and journal.get(
+                        issue['name'], issue['quarter_string'], 'add_issue_to_sprint'):
+                    continue
+                sprints.setdefault(issue['sprint_id'], []).append(issue)
+            calls.extend((jira_instance, functools.partial(
+                self.add_chunk, rest_api_client, sprint_id, chunk, journal=journal))
+                for sprint_id, sprint_issues in sprints.items()
+                for chunk in chunks(sprint_issues, SPRINT_ISSUES_MAX))
+        d.run_per_instance(config, calls)
+
+        created = {(jira_instance, issue['name'], issue['quarter_string']): issue['key']
+                   for jira_instance, issues in pending.items()
+                   for issue in issues if issue['key'] is not None}
+        with self._lock:
+            self.created.update(created)
+        log.info("Created %s quarter issues, %s failed", len(created), len(self.failed))
+        return created
@@ -3,10 +3,41 @@
 """
 This module is used to add some JIRA queries on top of the Python JIRA module.
 """
+import asyncio
+import contextvars
+import functools
 import json
+import threading
 import requests
 
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from requests.cookies import merge_cookies
+
+try:
+    from requests_kerberos import HTTPKerberosAuth, OPTIONAL
+except ImportError:
+    HTTPKerberosAuth = None
+
+from SPU.scheduler import ScheduledAdapter
+
+# Global Variables
+DEFAULT_POOL_SIZE = 10
+# Default seconds to wait to connect to and hear back from JIRA
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+# Most issues JIRA takes per bulk create, and per add to a sprint
+DEFAULT_BULK_SIZE = 50
+SPRINT_ISSUES_MAX = 50
+# Default number of results asked for per page
+DEFAULT_PAGE_SIZE = 50
+# Paginated resources kept in the metadata cache and the entity they belong to
+PAGINATED_ENTITIES = {
+    '/rest/agile/1.0/board': 'boards',
+    '/rest/api/2/filter/search': 'filters',
+}
 
 
 class JiraClient:
@@ -15,13 +46,23 @@ class JiraClient:
         and do jira related tasks
     """
 
-    def __init__(self, url, authtype, username=None, password=None):
+    def __init__(self, url, authtype, username=None, password=None,
+                 pool_size=DEFAULT_POOL_SIZE, metadata_cache=None, scheduler=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT), cookie_jar=None):
         """Returns a JiraClient object
         :param string url : url to conenct to jira
         :param string authtype  : type of authentication needed to connect to
         jira
         :param string username : username for connecting to jira (basic auth)
         :param string password : password for connecting to jira (basic auth)
+        :param int pool_size : number of keep-alive connections to hold open
+        :param SPU.metadata_cache.MetadataCache metadata_cache : optional on
+        disk cache for boards, filters and projects
+        :param SPU.scheduler.RequestScheduler scheduler : optional scheduler
+        every request is paced and retried by
+        :param tuple timeout : (connect, read) timeout of every request in seconds
+        :param SPU.cookie_jar.StepAuthCookies cookie_jar : optional jar the
+        step-auth cookies are shared through (kerberos auth)
         """
         self.host = url
         self.url = url + "/rest/api/3/"
@@ -32,6 +73,44 @@ class JiraClient:
         self.headers = {
             'Accept': 'application/json',
             'Content-Type': 'application/json'}
+        self.session = self.build_session(pool_size, scheduler=scheduler)
+        self.metadata_cache = metadata_cache
+        self.timeout = timeout
+        self.cookie_jar = cookie_jar
+        # First we get a cookie from the "step" site, which is just
+        # an nginx proxy that is kerberos enabled.
+        self.step_url = self.host + '/step-auth-gss'
+        self._step_auth_lock = threading.Lock()
+        if self.authtype == 'kerberos':
+            self.session.hooks['response'].append(self.refresh_step_auth)
+
+    @staticmethod
+    def build_session(pool_size, scheduler=None, session=None):
+        """ Build a keep-alive session so every call to the same host reuses
+        an already negotiated TCP/TLS connection.
+        :param int pool_size : number of connections to keep per host
+        :param SPU.scheduler.RequestScheduler scheduler : optional scheduler
+        to send every request through
+        :param requests.Session session : existing session to mount the
+        pool on, e.g. the one of a jira.client.JIRA client
+        :return requests.Session session: pooled session
+        """
+        if session is None:
+            session = requests.Session()
+        if scheduler is not None:
+            adapter = ScheduledAdapter(scheduler, pool_connections=pool_size,
+                                       pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """ Close all pooled connections held by this client.
+        """
+        self.session.close()
 
 
     @property
@@ -43,18 +122,22 @@ class JiraClient:
         """
         if self._req_kwargs is None:
             if self.authtype == 'kerberos':
-                # First we get a cookie from the "step" site, which is just
-                # an nginx proxy that is kerberos enabled.
-                step_url = self.host + '/step-auth-gss'
-                conf_resp = requests.get(step_url, auth=self.get_auth_object())
-                conf_resp.raise_for_status()
-                # Going forward, we just pass in "cookies", no need to provide
-                # an auth object anymore. In fact if we do, it'll get
-                # preferred and fail since the service itself is not kerberos
-                # enabled.
-                self._req_kwargs = {'cookies': conf_resp.cookies}
+                with self._step_auth_lock:
+                    if self._req_kwargs is None:
+                        # Cookies an earlier client or run negotiated are
+                        # reused while they last
+                        cookies = None
+                        if self.cookie_jar is not None:
+                            cookies = self.cookie_jar.get(self.host)
+                        if cookies is None:
+                            cookies = self.step_auth()
+                        # Going forward, we just pass in "cookies", no need to
+                        # provide an auth object anymore. In fact if we do,
+                        # it'll get preferred and fail since the service
+                        # itself is not kerberos enabled.
+                        self._req_kwargs = {'cookies': cookies, 'timeout': self.timeout}
             elif self.authtype == 'basic':
-                self._req_kwargs = {'auth': self.get_auth_object()}
+                self._req_kwargs = {'auth': self.get_auth_object(), 'timeout': self.timeout}
         return self._req_kwargs
 
     def get_auth_object(self):
@@ -64,9 +147,124 @@ class JiraClient:
         if self.authtype == "basic":
             # useful for testing and debugging
             return HTTPBasicAuth(self.username, self.password)
+        elif self.authtype == "kerberos":
+            if HTTPKerberosAuth is None:
+                raise ImportError('Kerberos auth needs requests-kerberos, '
+                                  'install it with pip install spu[kerberos]')
+            return HTTPKerberosAuth(mutual_authentication=OPTIONAL)
         else:
             raise ValueError("Invalid auth type")
 
+    def step_auth(self):
+        """ Negotiate new cookies with the kerberos enabled step site and
+        keep them in the cookie jar.
+        :return RequestsCookieJar cookies: cookies the step site set
+        """
+        conf_resp = self.session.get(self.step_url, auth=self.get_auth_object(),
+                                     timeout=self.timeout)
+        conf_resp.raise_for_status()
+        if self.cookie_jar is not None:
+            self.cookie_jar.store(self.host, conf_resp.cookies)
+        return conf_resp.cookies
+
+    def refresh_step_auth(self, resp, session=None, **kwargs):
+        """ Response hook that negotiates the step-auth cookies again when
+        JIRA turns them down with a 401, and sends the request once more.
+        :param requests.Response resp : response JIRA sent
+        :param requests.Session session : session the request went through,
+        this client's own by default
+        :return requests.Response resp: response to the request
+        """
+        session = session or self.session
+        request = resp.request
+        if resp.status_code != 401 or request.url.startswith(self.step_url) \
+                or getattr(request, 'step_auth_retried', False):
+            return resp
+        sent = request.headers.get('Cookie', '')
+        with self._step_auth_lock:
+            if self.cookie_jar is not None:
+                cookies = self.cookie_jar.get(self.host)
+            else:
+                cookies = (self._req_kwargs or {}).get('cookies')
+            # Unless another request already negotiated new ones, the
+            # cookies we sent are the ones that expired
+            if cookies is None or all(f"{cookie.name}={cookie.value}" in sent
+                                      for cookie in cookies):
+                if self.cookie_jar is not None:
+                    self.cookie_jar.invalidate(self.host)
+                cookies = self.step_auth()
+            self._req_kwargs = {'cookies': cookies, 'timeout': self.timeout}
+            session.cookies.update(cookies)
+
+        new_request = request.copy()
+        new_request.headers.pop('Cookie', None)
+        new_request.prepare_cookies(merge_cookies(session.cookies.copy(), cookies))
+        new_request.step_auth_retried = True
+        # Drain the rejected response so its connection goes back to the pool
+        resp.content
+        resp.close()
+        new_resp = session.send(new_request, **kwargs)
+        new_resp.history.insert(0, resp)
+        return new_resp
+
+    def share_step_auth(self, session):
+        """ Let another session, e.g. the one of a jira.client.JIRA client,
+        send our step-auth cookies and have them refreshed on a 401 too.
+        :param requests.Session session : session to share the cookies with
+        """
+        session.cookies.update(self.req_kwargs['cookies'])
+        session.hooks['response'].append(
+            functools.partial(self.refresh_step_auth, session=session))
+
+    def get_json(self, path, params=None, entity=None):
+        """
+        GET a resource, going through the metadata cache when there is one.
+        A fresh entry is returned without asking the server, a stale one
+        is refreshed with If-None-Match and reused on a 304. Responses are
+        sent gzipped by servers that support it.
+
+        :param String path: Path of the resource
+        :param Dict params: Query parameters
+        :param String entity: Entity the resource belongs to, None to never cache it
+        :return: Response
+        :rtype: JSON
+        """
+        url = self.host + path
+        cache = self.metadata_cache if entity else None
+        headers = dict(self.headers, **{'Accept-Encoding': 'gzip'})
+        cached = None
+        if cache is not None:
+            key = cache.key(url, params)
+            cached = cache.lookup(entity, key)
+            if cached is not None:
+                fresh, etag, body = cached
+                if fresh:
+                    cache.count('hits')
+                    return body
+                if etag:
+                    headers['If-None-Match'] = etag
+        resp = self.session.get(url, params=params, headers=headers, **self.req_kwargs)
+        if cache is not None and cached is not None and resp.status_code == 304:
+            cache.count('revalidated')
+            cache.touch(key)
+            return cached[2]
+        resp.raise_for_status()
+        body = resp.json()
+        if cache is not None:
+            cache.count('misses')
+            cache.store(self.host, entity, key, resp.headers.get('ETag'), body)
+        return body
+
+    def invalidate(self, entity):
+        """
+        Forget the cached metadata of an entity after changing it.
+
+        :param String entity: Entity that changed
+        :return: Nothing
+        """
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(self.host, entity)
+
     def add_share_permissions(self, filter_id):
         """
         Updates the share permissions for a filter to share with any
@@ -75,13 +273,11 @@ class JiraClient:
         :param String filter_id: The filter ID to update
         :return: Nothing
         """
-        import pdb; pdb.set_trace()
         params = {
             'type': 'authenticated'
         }
-        resp = requests.post(self.host + f"/rest/api/3/filter/{filter_id}/permission", data=json.dumps(params),
-                             headers=self.headers, **self.req_kwargs)
-        import pdb; pdb.set_trace()
+        resp = self.session.post(self.host + f"/rest/api/3/filter/{filter_id}/permission",
+                                 data=json.dumps(params), headers=self.headers, **self.req_kwargs)
         resp.raise_for_status()
 
     def create_board(self, name, project, filter_id, type='scrum'):
@@ -102,19 +298,136 @@ class JiraClient:
             'type': type,
             'filterId': filter_id
             }
-        resp = requests.post(self.host + '/rest/agile/1.0/board', data=json.dumps(params),
-                             headers=self.headers, **self.req_kwargs)
+        resp = self.session.post(self.host + '/rest/agile/1.0/board', data=json.dumps(params),
+                                 headers=self.headers, **self.req_kwargs)
         resp.raise_for_status()
+        self.invalidate('boards')
         return resp.json()
 
     def get_favourite_filters(self):
         """
         Get all favorite filters for user.
         """
-        resp = requests.get(self.host + "/rest/api/2/filter/favourite",
-                            headers=self.headers, **self.req_kwargs)
-        resp.raise_for_status()
-        return resp.json()
+        return self.get_json("/rest/api/2/filter/favourite", entity='filters')
+
+    def get_page(self, path, params, start_at, page_size):
+        """
+        Get one page of a paginated resource.
+
+        :param String path: Path of the resource
+        :param Dict params: Query parameters
+        :param Int start_at: Index of the first result
+        :param Int page_size: Most results to ask for
+        :return: Response
+        :rtype: JSON
+        """
+        params = dict(params or {}, startAt=start_at, maxResults=page_size)
+        return self.get_json(path, params, entity=PAGINATED_ENTITIES.get(path))
+
+    def paginate(self, path, params=None, key='values', page_size=DEFAULT_PAGE_SIZE,
+                 prefetch=False):
+        """
+        Iterate over a paginated resource one page at a time, so only the
+        current page is held in memory. Stop iterating (or close the
+        generator) once you have what you need and no more pages are asked
+        for.
+
+        :param String path: Path of the resource
+        :param Dict params: Query parameters
+        :param String key: Key of the results in each page
+        :param Int page_size: Most results to ask for per page
+        :param Bool prefetch: Ask for the next page on a background thread
+        while the caller works through the current one
+        :return: Generator of results
+        :rtype: Generator
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            start_at = 0
+            page = self.get_page(path, params, start_at, page_size)
+            while True:
+                values = page.get(key, [])
+                start_at += len(values)
+                # Agile resources say when they are done, searches give a total
+                last = page.get('isLast')
+                if last is None:
+                    total = page.get('total')
+                    last = not values or (total is not None and start_at >= total)
+                following = None
+                if not last:
+                    if executor is not None:
+                        following = executor.submit(self.get_page, path, params,
+                                                    start_at, page_size)
+                    else:
+                        following = functools.partial(self.get_page, path, params,
+                                                      start_at, page_size)
+                yield from values
+                if following is None:
+                    return
+                page = following.result() if executor is not None else following()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_boards(self, name=None, page_size=DEFAULT_PAGE_SIZE, prefetch=False):
+        """
+        Iterate over all boards.
+
+        :param String name: Only boards whose name contains this
+        :param Int page_size: Most boards to ask for per page
+        :param Bool prefetch: Ask for the next page in the background
+        :return: Generator of boards
+        :rtype: Generator
+        """
+        params = {'name': name} if name else None
+        return self.paginate('/rest/agile/1.0/board', params,
+                             page_size=page_size, prefetch=prefetch)
+
+    def iter_sprints(self, board_id, page_size=DEFAULT_PAGE_SIZE, prefetch=False):
+        """
+        Iterate over the sprints of a board.
+
+        :param Int board_id: Board ID
+        :param Int page_size: Most sprints to ask for per page
+        :param Bool prefetch: Ask for the next page in the background
+        :return: Generator of sprints
+        :rtype: Generator
+        """
+        return self.paginate(f"/rest/agile/1.0/board/{board_id}/sprint",
+                             page_size=page_size, prefetch=prefetch)
+
+    def iter_filters(self, name=None, page_size=DEFAULT_PAGE_SIZE, prefetch=False):
+        """
+        Iterate over all filters visible to the user, with their JQL.
+
+        :param String name: Only filters whose name contains this
+        :param Int page_size: Most filters to ask for per page
+        :param Bool prefetch: Ask for the next page in the background
+        :return: Generator of filters
+        :rtype: Generator
+        """
+        params = {'expand': 'jql,favourite'}
+        if name:
+            params['filterName'] = name
+        return self.paginate('/rest/api/2/filter/search', params,
+                             page_size=page_size, prefetch=prefetch)
+
+    def iter_search(self, jql, fields=None, page_size=DEFAULT_PAGE_SIZE, prefetch=False):
+        """
+        Iterate over the issues a JQL query finds.
+
+        :param String jql: JQL query
+        :param String fields: Comma separated fields to return
+        :param Int page_size: Most issues to ask for per page
+        :param Bool prefetch: Ask for the next page in the background
+        :return: Generator of issues
+        :rtype: Generator
+        """
+        params = {'jql': jql}
+        if fields:
+            params['fields'] = fields
+        return self.paginate('/rest/api/2/search', params, key='issues',
+                             page_size=page_size, prefetch=prefetch)
 
     def create_filter(self, name, jql, favorite=False):
         """
@@ -131,11 +444,12 @@ class JiraClient:
             'jql': jql,
             'favourite': favorite
         }
-        resp = requests.post(self.host + f"/rest/api/2/filter",
-                             headers=self.headers,
-                             data=json.dumps(params),
-                             **self.req_kwargs)
+        resp = self.session.post(self.host + f"/rest/api/2/filter",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
         resp.raise_for_status()
+        self.invalidate('filters')
         return resp.json()
 
     def update_filter(self, name, jql, filter_id):
@@ -150,9 +464,215 @@ class JiraClient:
             'name': name,
             'jql': jql,
         }
-        resp = requests.put(self.host + f"/rest/api/2/filter/{filter_id}",
-                            headers=self.headers,
-                            data=json.dumps(params),
-                            **self.req_kwargs)
+        resp = self.session.put(self.host + f"/rest/api/2/filter/{filter_id}",
+                                headers=self.headers,
+                                data=json.dumps(params),
+                                **self.req_kwargs)
+
+        resp.raise_for_status()
+        self.invalidate('filters')
+
+    def get_project(self, key):
+        """
+        Get a project by its key.
+
+        :param String key: Project key
+        :return: Response
+        :rtype: JSON
+        """
+        return self.get_json(f"/rest/api/2/project/{key}", entity='projects')
+
+    def create_issue(self, fields):
+        """
+        Create an issue.
+
+        :param Dict fields: Fields of the new issue
+        :return: Response
+        :rtype: JSON
+        """
+        params = {
+            'fields': fields
+        }
+        resp = self.session.post(self.host + "/rest/api/2/issue",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    def create_issues(self, issues):
+        """
+        Create many issues with one request. JIRA creates every issue it
+        can, the ones it could not create are listed under 'errors' by
+        their position in the request.
+
+        :param List issues: Fields of every new issue, at most DEFAULT_BULK_SIZE
+        :return: Response with the created 'issues' and the 'errors'
+        :rtype: JSON
+        """
+        params = {
+            'issueUpdates': [{'fields': fields} for fields in issues]
+        }
+        resp = self.session.post(self.host + "/rest/api/2/issue/bulk",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
+        # A 400 that lists errors means none of the issues could be created
+        if resp.status_code == 400 and 'json' in resp.headers.get('Content-Type', ''):
+            body = resp.json()
+            if 'errors' in body:
+                return body
+        resp.raise_for_status()
+        return resp.json()
+
+    def add_issues_to_sprint(self, sprint_id, issue_keys):
+        """
+        Move issues into a sprint.
+
+        :param Int sprint_id: Sprint to move the issues to
+        :param List issue_keys: Keys of the issues, at most SPRINT_ISSUES_MAX
+        :return: Nothing
+        """
+        params = {
+            'issues': issue_keys
+        }
+        resp = self.session.post(self.host + f"/rest/agile/1.0/sprint/{sprint_id}/issue",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
+        resp.raise_for_status()
+
+    def swap_sprint(self, sprint_id, other_id):
+        """
+        Swap the places of two sprints on their board.
+
+        :param Int sprint_id: Sprint to move
+        :param Int other_id: Sprint to swap places with
+        :return: Nothing
+        """
+        params = {
+            'sprintToSwapWith': other_id
+        }
+        resp = self.session.post(self.host + f"/rest/agile/1.0/sprint/{sprint_id}/swap",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
+        resp.raise_for_status()
+
+    def create_sprint(self, name, board_id, start_date=None, end_date=None):
+        """
+        Create a sprint on a board.
+
+        :param String name: Name of the sprint
+        :param Int board_id: Board the sprint belongs to
+        :param String start_date: Optional ISO 8601 start date
+        :param String end_date: Optional ISO 8601 end date
+        :return: Response
+        :rtype: JSON
+        """
+        params = {
+            'name': name,
+            'originBoardId': board_id,
+        }
+        if start_date:
+            params['startDate'] = start_date
+        if end_date:
+            params['endDate'] = end_date
+        resp = self.session.post(self.host + "/rest/agile/1.0/sprint",
+                                 headers=self.headers,
+                                 data=json.dumps(params),
+                                 **self.req_kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+
+class AsyncJiraClient:
+
+    """ An asyncio interface to JiraClient. This is a thread shim, not an
+        asyncio-native client: each call runs the matching blocking
+        JiraClient call on an executor thread, so the requests still go
+        through the pooled requests session and the instance's scheduler.
+        The event loop only coordinates the calls, so the work in flight is
+        bounded by 'max_in_flight' and the size of the executor.
+    """
+
+    def __init__(self, jira_client, max_in_flight=DEFAULT_POOL_SIZE, executor=None):
+        """Returns an AsyncJiraClient object
+        :param JiraClient jira_client : client used to make the requests
+        :param int max_in_flight : most requests allowed to run at once
+        :param concurrent.futures.Executor executor : executor to run the
+        requests on (default is the event loop's executor)
+        """
+        self.jira_client = jira_client
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        """ The semaphore bounding requests in flight. It is created on
+        first use so it belongs to the running event loop.
+        :return asyncio.Semaphore _semaphore: request semaphore
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def _call(self, method, *args, **kwargs):
+        """ Run a blocking JiraClient method without blocking the loop.
+        :param function method : JiraClient method to call
+        :return : Whatever the method returns
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context, and so its deadline, to the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(context.run, method, *args, **kwargs))
+
+    async def add_share_permissions(self, filter_id):
+        """ See JiraClient.add_share_permissions """
+        return await self._call(self.jira_client.add_share_permissions, filter_id)
+
+    async def create_board(self, name, project, filter_id, type='scrum'):
+        """ See JiraClient.create_board """
+        return await self._call(self.jira_client.create_board, name, project,
+                                filter_id, type=type)
+
+    async def get_favourite_filters(self):
+        """ See JiraClient.get_favourite_filters """
+        return await self._call(self.jira_client.get_favourite_filters)
+
+    async def create_filter(self, name, jql, favorite=False):
+        """ See JiraClient.create_filter """
+        return await self._call(self.jira_client.create_filter, name, jql,
+                                favorite=favorite)
+
+    async def update_filter(self, name, jql, filter_id):
+        """ See JiraClient.update_filter """
+        return await self._call(self.jira_client.update_filter, name, jql, filter_id)
+
+    async def get_project(self, key):
+        """ See JiraClient.get_project """
+        return await self._call(self.jira_client.get_project, key)
+
+    async def create_issue(self, fields):
+        """ See JiraClient.create_issue """
+        return await self._call(self.jira_client.create_issue, fields)
+
+    async def create_issues(self, issues):
+        """ See JiraClient.create_issues """
+        return await self._call(self.jira_client.create_issues, issues)
+
+    async def add_issues_to_sprint(self, sprint_id, issue_keys):
+        """ See JiraClient.add_issues_to_sprint """
+        return await self._call(self.jira_client.add_issues_to_sprint, sprint_id, issue_keys)
+
+    async def swap_sprint(self, sprint_id, other_id):
+        """ See JiraClient.swap_sprint """
+        return await self._call(self.jira_client.swap_sprint, sprint_id, other_id)
 
-        resp.raise_for_status()
\ No newline at end of file
+    async def create_sprint(self, name, board_id, start_date=None, end_date=None):
+        """ See JiraClient.create_sprint """
+        return await self._call(self.jira_client.create_sprint, name, board_id,
+                                start_date=start_date, end_date=end_date)
@@ -0,0 +1,92 @@
+"""
+This module is used to journal every write made to JIRA so a run that
+stopped partway can be resumed where it left off.
+"""
+# Build In Modules
+import json
+import logging
+import os
+import threading
+import time
+
+# Global Variables
+log = logging.getLogger(__name__)
+DEFAULT_JOURNAL = 'spu-journal.jsonl'
+
+
+class Journal:
+
+    """ An append-only record of completed writes. Each write is one JSON
+        line keyed by team, quarter and operation, together with the IDs
+        JIRA returned for it.
+    """
+
+    def __init__(self, path, resume=False):
+        """Returns a Journal object
+        :param string path : file the journal is written to
+        :param bool resume : keep and replay the entries already in the
+        file, otherwise start a new journal
+        """
+        self.path = path
+        self.entries = {}
+        self.teams = set()
+        self._lock = threading.Lock()
+        if resume:
+            self.load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def key(team, quarter, operation):
+        """ Build the key of a journal entry.
+        :param string team : team name
+        :param string quarter : quarter string
+        :param string operation : operation name
+        :return string key: journal key
+        """
+        return f"{team}/{quarter}/{operation}"
+
+    def load(self):
+        """ Replay the journal file into memory. A torn last line left by
+        a crash is ignored.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    log.warning("Ignoring torn journal entry in %s", self.path)
+                    continue
+                self.entries[self.key(entry['team'], entry['quarter'],
+                                      entry['operation'])] = entry['result']
+                self.teams.add(entry['team'])
+        log.info("Resuming with %s completed writes from %s",
+                 len(self.entries), self.path)
+
+    def get(self, team, quarter, operation):
+        """ Get the result of a completed write.
+        :param string team : team name
+        :param string quarter : quarter string
+        :param string operation : operation name
+        :return : Recorded result or None if the write has not happened
+        """
+        return self.entries.get(self.key(team, quarter, operation))
+
+    def record(self, team, quarter, operation, result):
+        """ Append a completed write to the journal.
+        :param string team : team name
+        :param string quarter : quarter string
+        :param string operation : operation name
+        :param dict result : IDs returned by JIRA
+        """
+        entry = {'team': team, 'quarter': quarter, 'operation': operation,
+                 'result': result, 'time': time.time()}
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[self.key(team, quarter, operation)] = result
+            self.teams.add(team)
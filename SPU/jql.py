@@ -0,0 +1,72 @@
+"""
+This module is used to build the JQL behind the global boards.
+"""
+# Build In Modules
+import re
+
+# Global Variables
+# Predicate used to only show unfinished work on the global bad board
+BAD_BOARD_PREDICATE = "(remainingEstimate > 0 OR duedate < endOfDay() " \
+    "OR status not in (Closed, Resolved) OR cf[11908] is not EMPTY)"
+PROJECT_EQUALS = re.compile(r'\bproject\s*=\s*"?([\w-]+)"?', re.IGNORECASE)
+PROJECT_IN = re.compile(r'\bproject\s+in\s*\(([^)]*)\)', re.IGNORECASE)
+
+
+def parse_projects(jql):
+    """
+    Helper function to find every project a JQL query selects. Both the
+    canonical 'project in (...)' form and the older chain of
+    'project = X OR ...' are understood.
+
+    :param String jql: JQL query
+    :return: Project keys
+    :rtype: Set
+    """
+    projects = set(PROJECT_EQUALS.findall(jql))
+    for group in PROJECT_IN.findall(jql):
+        projects.update(key.strip().strip('"\'') for key in group.split(',') if key.strip())
+    return projects
+
+
+def global_jql(quarter_string, projects=(), bad_board=False):
+    """
+    Function to build the canonical JQL of a global filter.
+
+    :param String quarter_string: Quarter label of the filter
+    :param Iterable projects: Projects to show, duplicates are dropped
+    :param Bool bad_board: Is this the JQL of the bad board
+    :return: JQL
+    :rtype: String
+    """
+    clauses = []
+    if bad_board:
+        clauses.append(BAD_BOARD_PREDICATE)
+    projects = sorted(set(projects))
+    if projects:
+        clauses.append(f"project in ({', '.join(projects)})")
+    clauses.append(f"labels = '{quarter_string}'")
+    return f"{' AND '.join(clauses)} ORDER BY Rank ASC"
+
+
+def assign_shards(shards, projects, max_projects):
+    """
+    Function to spread projects over filters of at most max_projects each.
+    Projects already in a shard stay where they are so only the shards
+    that gain a project have to be written.
+
+    :param List shards: Sets of projects already in each shard
+    :param Iterable projects: Projects that have to be shown
+    :param Int max_projects: Most projects one filter may hold
+    :return: Sets of projects for every shard, existing shards first
+    :rtype: List
+    """
+    shards = [set(shard) for shard in shards] or [set()]
+    placed = set().union(*shards)
+    for project in sorted(set(projects) - placed):
+        for shard in shards:
+            if len(shard) < max_projects:
+                shard.add(project)
+                break
+        else:
+            shards.append({project})
+    return shards
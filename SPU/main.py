@@ -2,19 +2,36 @@
 This is the main module used to start the utility.
 """
 # Build in Modules
-from datetime import datetime, timedelta
+import asyncio
 import logging
 import argparse
+import json
 import os
+import sys
 
 # Local Modules
 from SPU.config import config
+from SPU.boards import BoardIndex
+from SPU.cache import RunCache
+from SPU.calender import CalenderCache, CalenderIndex, parse_date
+from SPU.deadline import Deadline, DeadlineExceeded
+from SPU.journal import Journal, DEFAULT_JOURNAL
+from SPU.global_filters import GlobalFilterUpdates
+from SPU.issues import IssueBatch
+from SPU.prefetch import prefetch
 import SPU.downstream as d
+import SPU.parallel as p
+import SPU.reconcile as r
+import SPU.shards as sh
 
 # Global Variables
 GLOBAL_BOARD = os.environ['GLOBAL_BOARD']
 GLOBAL_BAD_BOARD = os.environ['GLOBAL_BAD_BOARD']
 log = logging.getLogger(__name__)
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+# Calenders shared by every team with the same start date and sprint length
+CALENDERS = CalenderCache()
 
 def load_config():
     """
@@ -26,179 +43,18 @@ def load_config():
     return config
 
 
-def build_sprint(operational_year, operational_quarter, sprint_length, sprint_index):
-    """
-    Helper function to build Sprint name for JIRA.
-
-    :param String operational_year:
-    :param String operational_quarter:
-    :param String sprint_length:
-    :param String sprint_index:
-    :return: Formatted Sprint name
-    :rtype: String
-    """
-    return 'Y%s-Q%s-L%s-S%s' % (
-        operational_year, operational_quarter, sprint_length, sprint_index
-    )
-
-
-def build_quarter_string(operational_year, operational_quarter):
-    """
-    Helper function to build quarter name for JIRA.
-
-    :param String operational_year:
-    :param String operational_quarter:
-    :return: Formatted Quarter name
-    :rtype: String
-    """
-    return 'Y%s-Q%s' % (operational_year, operational_quarter)
-
-
-def build_calender(global_start, start_date, sprint_length):
-    """
-    Build a Dict of quarters based on the Q1 Start date.
-
-    :param String global_start: Global start date
-    :param String start_date: Start date in 'MM-DD' format
-    :param Int sprint_length: Length of a sprint per team
-    :return: Calender Dict of all start and end dates
-    :rtype: Dict
-    """
-    # First convert our values to datetime
-    global_start_datetime = datetime.strptime(global_start, '%m-%d-%y')
-    sprint_start_datetime = datetime.strptime(start_date, '%m-%d-%y')
-    current_datetime = sprint_start_datetime
-    current_year = current_datetime.year - 2000
-    calender = {}
-    index = 1
-
-    if sprint_length == 2:
-        # Validate sprint start date
-        if not global_start_datetime - timedelta(weeks=1) <= sprint_start_datetime \
-                 <= global_start_datetime + timedelta(weeks=1):
-            log.warning('Invalid Sprint start time. 2 week sprints must be within 1 week of the Q1 start date')
-            raise ValueError
-        for year in range(1, 10):
-            for quarter in range(1, 5):
-                # We have 4 quarters
-                quarter_calender = []
-                for sprint_index in range(1, 7):
-                    # If our sprint length is 2, we need 6 sprints per quarter
-                    if (current_datetime - sprint_start_datetime).days >= 14:
-                        # Every two week change the sprint_start_datetime
-                        sprint_start_datetime += timedelta(weeks=2)
-
-                    new_entry = dict(
-                        index=sprint_index,
-                        quarter=quarter,
-                        start_date=current_datetime,
-                        end_date=(current_datetime + timedelta(weeks=2)),
-                        sprint_string=build_sprint(
-                            operational_year=current_year,
-                            operational_quarter=quarter,
-                            sprint_length=sprint_length,
-                            sprint_index=sprint_index
-
-                        ),
-                        quarter_string=build_quarter_string(
-                            operational_quarter=quarter,
-                            operational_year=current_datetime.year-2000
-                        ),
-                    )
-
-                    # Add our entry to the calender
-                    quarter_calender.append(new_entry)
-
-                    # Move 2 weeks in the future
-                    current_datetime += timedelta(weeks=2)
-                # Add our quarter calender to the calender
-                calender[index] = quarter_calender
-                index += 1
-
-                # Adding 13th week every quarter
-                current_datetime += timedelta(weeks=1)
-            current_year += 1
-
-    elif sprint_length == 3:
-        # Validate sprint start date
-        if not global_start_datetime - timedelta(days=10) <= sprint_start_datetime  \
-                <= global_start_datetime + timedelta(days=10):
-            log.warning('Invalid Sprint start time. 3 week sprints must be within 10 days of the Q1 start date')
-            raise ValueError
-        for year in range(1, 10):
-            for quarter in range(1, 5):
-                # We have 4 quarters
-                quarter_calender = []
-                for sprint_index in range(1, 5):
-                    # If our sprint length is 3, we need 4 sprints per quarter
-                    if (current_datetime - sprint_start_datetime).days >= 14:
-                        # Every two week change the sprint_start_datetime
-                        sprint_start_datetime += timedelta(weeks=2)
-
-                    new_entry = dict(
-                        index=sprint_index,
-                        quarter=quarter,
-                        start_date=current_datetime,
-                        end_date=(current_datetime + timedelta(weeks=2)),
-                        sprint_string=build_sprint(
-                            operational_year=current_datetime.year-2000,
-                            operational_quarter=quarter,
-                            sprint_length=sprint_length,
-                            sprint_index=sprint_index
-
-                        ),
-                        quarter_string=build_quarter_string(
-                            operational_quarter=quarter,
-                            operational_year=current_datetime.year-2000
-                        ),
-                    )
-
-                    # Add our entry to the calender
-                    quarter_calender.append(new_entry)
-
-                    # Move 3 weeks in the future
-                    current_datetime += timedelta(weeks=3)
-                # Add our quarter calender to the calender
-                calender[index] = quarter_calender
-                index += 1
-
-                # Adding 13th week every quarter
-                current_datetime += timedelta(weeks=1)
-
-    # Return our calender
-    return calender
-
-
-def validate_team(all_boards, calender, team, glob=False):
+def validate_team(existing, team, jira_instance):
     """
     Helper function to validate if a team should be synced or not.
 
-    :param Dict all_boards: All boards
-    :param Dict calender: Calender created for the team
-    :param String team: Team name
-    :param Bool glob: Are we checking for the global board
+    :param Dict existing: Expected boards that exist, from BoardIndex.existing_expected
+    :param String team: Team name, or the global board title and instance
+    :param String jira_instance: JIRA instance the boards would be on
     :return: True/False if the team should be synced
     :rtype: Bool
     """
-    # Gather all quarters
-    quarters = []
-    for quarter, value in calender.items():
-        if value:
-            if value[0]['quarter_string'] not in quarters:
-                quarters.append(value[0]['quarter_string'])
-
-    if not glob:
-        # Check if the boards are in JIRA already
-        for quarter in quarters:
-            if f'{quarter} - {team} Board' in all_boards.keys():
-                return False
-        return True
-    else:
-        # Check if the boards are in JIRA already
-        for quarter in quarters:
-            if f'{team} - {quarter} Board' in all_boards.keys():
-                return False
-        return True
+    # Check if any of the boards are in JIRA already
+    return not existing.get((jira_instance, team))
 
 
 def prompt_user(calender, type, glob=False):
@@ -221,6 +77,24 @@ def prompt_user(calender, type, glob=False):
             for sprint in calender[quarter]:
                 print(f"\t {sprint['sprint_string']} ({sprint['start_date'].strftime('%d-%m-%y')})")
     print(f'Is this valid for {type}?')
+    confirm()
+
+
+def prompt_plan(plan):
+    """
+    Prompt the user with the plan of changes that will be made on JIRA.
+
+    :param List plan: Operations to apply
+    """
+    print(r.format_plan(plan))
+    print('Is this valid?')
+    confirm()
+
+
+def confirm():
+    """
+    Helper function to wait for the user to say yes, exiting on no.
+    """
     answer = None
     while answer not in ("yes", "no"):
         answer = input("Enter yes or no: ")
@@ -233,19 +107,19 @@ def prompt_user(calender, type, glob=False):
             print("Please enter yes or no:")
 
 
-def validate_calender(calender):
+def lookup(config, date=None, quarter_string=None):
     """
-    Helper function build out calender based on current time.
+    Function to print where every team is in their calender as JSON.
 
-    :param Dict calender: Calender dict
-    :return: Updated Calender dict
-    :rtype: Dict
+    :param Dict config: Config dict
+    :param String date: Date in 'MM-DD-YY' format (default is today)
+    :param String quarter_string: Quarter to list the sprints of instead
     """
-    today = datetime.today()
-    # Keep looping until the quarter start is after today
-    for quarter, value in calender.items():
-        if value[0]['start_date'] > today:
-            return {quarter: value}
+    index = CalenderIndex(config, calenders=CALENDERS)
+    if quarter_string:
+        print(json.dumps(index.sprints(quarter_string), indent=2))
+    else:
+        print(json.dumps(index.at(parse_date(date) if date else None), indent=2))
 
 
 def main():
@@ -257,14 +131,117 @@ def main():
     argparser.add_argument('-yes', '-y', action='store_true',
                            default=False,
                            help='Automatically say yes to all prompts')
+    argparser.add_argument('--parallel', '-p', type=int, default=None,
+                           metavar='WORKERS',
+                           help='Sync this many teams at the same time')
+    argparser.add_argument('--asyncio', action='store_true',
+                           default=False,
+                           help='Sync all teams on a single event loop')
+    argparser.add_argument('--reconcile', action='store_true',
+                           default=False,
+                           help='Only create what is missing from JIRA')
+    argparser.add_argument('--plan-out', default=None, metavar='PATH',
+                           help='Write the reconcile plan to PATH and exit')
+    argparser.add_argument('--apply-plan', default=None, metavar='PATH',
+                           help='Apply a plan written with --plan-out')
+    argparser.add_argument('--resume', action='store_true',
+                           default=False,
+                           help='Skip the writes a previous run already made')
+    argparser.add_argument('--journal', default=None, metavar='PATH',
+                           help='Journal of completed writes to use')
+    argparser.add_argument('--refresh-cache', action='store_true',
+                           default=False,
+                           help='Ignore the metadata cache and fetch everything from JIRA')
+    argparser.add_argument('--targeted-lookups', action='store_true',
+                           default=False,
+                           help='Only look up the boards and filters SPU needs by name')
+    argparser.add_argument('--run-deadline', type=float, default=None, metavar='SECONDS',
+                           help='Defer whatever cannot start within SECONDS of the run')
+    argparser.add_argument('--team-deadline', type=float, default=None, metavar='SECONDS',
+                           help='Defer the rest of a team that takes longer than SECONDS')
+    argparser.add_argument('--shards', type=int, default=None, metavar='PROCESSES',
+                           help='Split the JIRA instances over this many worker processes')
+    argparser.add_argument('--log-level', default='INFO', choices=LOG_LEVELS,
+                           help='Level of the log written to stderr, INFO shows the pool, cache and scheduler stats')
+    subparsers = argparser.add_subparsers(dest='command')
+    lookup_parser = subparsers.add_parser('lookup', help='Show the quarter and sprint of every team')
+    lookup_parser.add_argument('date', nargs='?', default=None,
+                               help='Date to look up in MM-DD-YY format (default is today)')
+    lookup_parser.add_argument('--quarter', default=None, metavar='QUARTER',
+                               help='List the sprints of every team in a quarter instead, e.g. Y20-Q4')
     cargs = argparser.parse_args()
+    # Shards hand their records back to these same loggers
+    logging.basicConfig(level=cargs.log_level, format=LOG_FORMAT)
     no_prompt = False
     if cargs.yes:
         no_prompt = True
 
     config = load_config()
+
+    if cargs.command == 'lookup':
+        lookup(config, cargs.date, cargs.quarter)
+        return
+
+    if cargs.apply_plan:
+        # Keep JIRA metadata on disk between runs if the config asks for it
+        d.open_metadata_cache(config, refresh=cargs.refresh_cache)
+        # Apply an already reviewed plan
+        plan = r.load_plan(cargs.apply_plan)
+        if not no_prompt:
+            prompt_plan(plan)
+        r.apply_plan(plan, config)
+        d.close_rest_api_clients()
+        return
+
+    shards = cargs.shards or config['SPU'].get('shards', False)
+    if shards:
+        # Worker processes cannot prompt and would overwrite each other's plan
+        if not no_prompt:
+            argparser.error('--shards needs -y, worker processes cannot prompt')
+        if cargs.plan_out:
+            argparser.error('--plan-out cannot be used with --shards')
+        # Start the journal once for every shard
+        Journal(cargs.journal or config['SPU'].get('journal', DEFAULT_JOURNAL),
+                resume=cargs.resume)
+        failed = sh.run_shards(config, cargs, shards)
+    else:
+        failed = run(config, cargs, no_prompt=no_prompt)
+
+    if failed:
+        sys.exit(1)
+
+
+def run(config, cargs, no_prompt=False, journal=None):
+    """
+    Function to sync every JIRA instance and team in the config.
+
+    :param Dict config: Config dict
+    :param argparse.Namespace cargs: Command line arguments
+    :param Bool no_prompt: Automatically say yes to all prompts
+    :param SPU.journal.Journal journal: Optional journal to use instead of starting one
+    :return: Number of teams and quarter issues that failed
+    :rtype: Int
+    """
+    # Keep JIRA metadata on disk between runs if the config asks for it
+    d.open_metadata_cache(config, refresh=cargs.refresh_cache)
+    reconcile = cargs.reconcile or cargs.plan_out
+
+    # Record every write so a failed run can be resumed
+    if journal is None:
+        journal = Journal(cargs.journal or config['SPU'].get('journal', DEFAULT_JOURNAL),
+                          resume=cargs.resume)
+    workers = cargs.parallel or config['SPU'].get('parallel', False)
+    targeted = cargs.targeted_lookups or config['SPU'].get('targeted_lookups', False)
     global_start_date = config['SPU']['operational_q1_start']
 
+    # Bound how long the run, and every team in it, may take
+    run_deadline = Deadline(cargs.run_deadline or config['SPU'].get('run_deadline'))
+    team_deadline = cargs.team_deadline or config['SPU'].get('team_deadline')
+
+    # Share calenders between teams with the same start date and sprint length
+    calenders = CALENDERS
+    calenders.maxsize = config['SPU'].get('calender_cache_size', calenders.maxsize)
+
     # First get all our boards so we can validate teams
     all_teams = []
     for name, jira in config['SPU']['jira'].items():
@@ -273,92 +250,176 @@ def main():
         if new_entry not in all_teams:
             all_teams.append(new_entry)
 
-    # Now get all boards associated with all teams
-    all_boards = d.get_boards(config, all_teams)
-
-    # Loop through all JIRA instances and check if
-    # They have a global board
-    filters = {}
-    bad_filters = {}
-    global_calender = build_calender(global_start_date, global_start_date, 2)
+    # Cache JIRA clients and metadata for the rest of this run
+    cache = RunCache()
 
-    for jira in all_teams:
-        # Check the global board
-        build_global_board = validate_team(all_boards,
-                                           global_calender,
-                                           f"{GLOBAL_BOARD} {jira['jira_instance']}",
-                                           glob=True)
-
-        if build_global_board:
-            # Prompt our user
-            if not no_prompt:
-                prompt_user(global_calender, GLOBAL_BOARD, glob=True)
-            # Build our our global board for the JIRA instance
-            filter_resp = d.build_global_board(config, global_calender, jira)
-            filters[jira['jira_instance']] = filter_resp
-        else:
-            # We just need to get the filters
-            filter_resp = d.get_global_filters(jira, config)
-            filters[jira['jira_instance']] = filter_resp
-
-        # Check the bad board
-        build_global_bad_board = validate_team(all_boards,
-                                               global_calender,
-                                               f"{GLOBAL_BAD_BOARD} {jira['jira_instance']}",
-                                               glob=True)
-        if build_global_bad_board:
-            # Prompt our user
-            if not no_prompt:
-                prompt_user(global_calender, GLOBAL_BAD_BOARD, glob=True)
-            # Build out global bad board for the JIRA issue
-            filter_resp = d.build_global_board(config, global_calender, jira, bad_board=True)
-            bad_filters[jira['jira_instance']] = filter_resp
-        else:
-            # We just need to get the filters
-            filter_resp = d.get_global_filters(jira, config, bad_board=True)
-            bad_filters[jira['jira_instance']] = filter_resp
+    # Global boards are only built for the first four quarters
+    global_calender = calenders.get(global_start_date, global_start_date, 2)
+    global_calender = dict(global_calender.quarters(1, 5))
 
+    # Work out the quarter every team would be synced for
+    team_calenders = []
     for team, value in config['SPU']['teams'].items():
         # Build our calender
-        calender = build_calender(global_start_date, value['sprint_start_date'], value['sprint_length'])
+        team_calender = calenders.get(global_start_date, value['sprint_start_date'],
+                                      value['sprint_length'])
 
         if not config['SPU']['run_for_quarter']:
             # Only run for the next quarter
-            calender = validate_calender(calender)
-            # Check if the boards already exist
-            if validate_team(all_boards, calender, team):
-                # Prompt our user
-                if not no_prompt:
-                    prompt_user(calender, team)
-                # Now add relevant information downstream
-                d.start_sync(
-                    calender=calender,
-                    config=config,
-                    team=value,
-                    name=team,
-                    filters=filters,
-                    bad_filters=bad_filters
-                )
+            index, quarter = team_calender.next_quarter()
+            calender = {index: quarter}
         else:
             # Else we need to only run for a specific quarter
             # First find the quarter
-            for index, quarter in calender.items():
-                if quarter[0]['quarter_string'] == config['SPU']['run_for_quarter']:
-                    calender = {1: quarter}
-                    break
-            if validate_team(all_boards, calender, team):
+            found = team_calender.find_quarter(config['SPU']['run_for_quarter'])
+            if not found:
+                log.warning("%s has no quarter %s, skipping", team, config['SPU']['run_for_quarter'])
+                continue
+            calender = {1: found[1]}
+        team_calenders.append((team, value, calender))
+
+    # Work out every board we would create, targeted lookups only ask for these
+    all_boards = BoardIndex()
+    for jira in all_teams:
+        for title in (GLOBAL_BOARD, GLOBAL_BAD_BOARD):
+            all_boards.expect(jira['jira_instance'], f"{title} {jira['jira_instance']}",
+                              global_calender, glob=True)
+    for team, value, calender in team_calenders:
+        all_boards.expect(d.get_jira_instance(value, config), team, calender)
+
+    # Read the boards and global filters of every instance and the project of
+    # every team at once, before anything is written
+    state = prefetch(config, all_teams, [value for team, value, calender in team_calenders],
+                     cache, all_boards=all_boards, targeted=targeted)
+    all_boards = state['boards']
+    global_filters = state['global_filters']
+    # Check which of the boards exist for every team at once
+    existing = all_boards.existing_expected()
+
+    # Loop through all JIRA instances and check if
+    # They have a global board
+    deferred_boards = []
+    for jira in all_teams:
+        # Check the global board and the bad board
+        for bad_board, title in ((False, GLOBAL_BOARD), (True, GLOBAL_BAD_BOARD)):
+            board = f"{title} {jira['jira_instance']}"
+            build = validate_team(existing, board, jira['jira_instance'])
+            # A board a previous run started has to be finished even though
+            # some of its quarters already exist
+            if not build and not (cargs.resume and board in journal.teams):
+                continue
+            if build and not no_prompt:
                 # Prompt our user
-                if not no_prompt:
-                    prompt_user(calender, team)
-                # Now add relevant information downstream
-                d.start_sync(
-                    calender=calender,
-                    config=config,
-                    team=value,
-                    name=team,
-                    filters=filters,
-                    bad_filters=bad_filters
-                )
+                prompt_user(global_calender, title, glob=True)
+            try:
+                # Build our our global board for the JIRA instance
+                filter_resp = d.build_global_board(config, global_calender, jira,
+                                                   bad_board=bad_board, deadline=run_deadline,
+                                                   journal=journal)
+            except DeadlineExceeded as error:
+                # Leave the rest of the board to the next run and carry on
+                log.warning("Deferred %s: %s", board, error)
+                deferred_boards.append(board)
+                continue
+            global_filters.replace(jira['jira_instance'], filter_resp, bad_board=bad_board)
+    if deferred_boards:
+        log.warning("Ran out of time building %s, run again with --resume to finish them",
+                    ', '.join(deferred_boards))
+
+    # Gather every team that needs to be synced
+    jobs = []
+    for team, value, calender in team_calenders:
+        if reconcile:
+            # The plan will work out what is missing
+            jobs.append({'name': team, 'team': value, 'calender': calender})
+        # A team a previous run started has to be finished even though
+        # its board already exists
+        elif cargs.resume and team in journal.teams:
+            jobs.append({'name': team, 'team': value, 'calender': calender})
+        # Check if the boards already exist
+        elif validate_team(existing, team, d.get_jira_instance(value, config)):
+            # Prompt our user
+            if not no_prompt:
+                prompt_user(calender, team)
+            jobs.append({'name': team, 'team': value, 'calender': calender})
+
+    failed = len(deferred_boards)
+    if reconcile:
+        # Plan only the writes that are missing and apply them
+        plan = r.build_plan(config, jobs, global_filters, cache=cache)
+        if cargs.plan_out:
+            r.save_plan(plan, cargs.plan_out)
+            print(f'Wrote {len(plan)} changes to {cargs.plan_out}')
+        else:
+            if plan and not no_prompt:
+                prompt_plan(plan)
+            r.apply_plan(plan, config, cache=cache)
+    else:
+        # Collect global filter changes so each filter is written once
+        global_updates = GlobalFilterUpdates()
+        # Collect the quarter issues so they are created in bulk
+        issues = IssueBatch()
+        try:
+            if cargs.asyncio:
+                # Drive every team and instance from one event loop
+                results = asyncio.run(p.async_sync_teams(jobs, config, global_filters,
+                                                         journal=journal,
+                                                         global_updates=global_updates,
+                                                         deadline=run_deadline,
+                                                         team_deadline=team_deadline,
+                                                         issues=issues))
+                failed += p.report(results)
+            elif workers:
+                # Sync our teams concurrently and report on every team
+                results = p.sync_teams(jobs, config, global_filters,
+                                       max_workers=workers, cache=cache, journal=journal,
+                                       global_updates=global_updates, deadline=run_deadline,
+                                       team_deadline=team_deadline, issues=issues)
+                failed += p.report(results)
+            else:
+                results = []
+                for job in jobs:
+                    result = {'name': job['name'], 'error': None, 'deferred': False,
+                              'jira_instance': d.get_jira_instance(job['team'], config)}
+                    try:
+                        # Now add relevant information downstream
+                        d.start_sync(
+                            calender=job['calender'],
+                            config=config,
+                            team=job['team'],
+                            name=job['name'],
+                            global_filters=global_filters,
+                            cache=cache,
+                            journal=journal,
+                            global_updates=global_updates,
+                            deadline=run_deadline.child(team_deadline, name=job['name']),
+                            issues=issues
+                        )
+                    except DeadlineExceeded as error:
+                        # Leave the team to the next run and carry on
+                        log.warning("Deferred %s: %s", job['name'], error)
+                        result['error'] = error
+                        result['deferred'] = True
+                    results.append(result)
+                failed += p.report(results)
+        finally:
+            try:
+                # Add every synced project to the global boards, filters that
+                # cannot be written are collected on global_updates.failed
+                global_updates.flush(config, journal=journal)
+            finally:
+                # Create the quarter issues of every team and add them to their
+                # sprints even if the global filters could not be written
+                issues.flush(config, journal=journal)
+            failed += len(global_updates.failed) + len(issues.failed)
+
+    # Report how many round trips the cache saved
+    cache.log_stats()
+    calenders.log_stats()
+
+    # Release the pooled connections of our rest API clients
+    d.close_rest_api_clients()
+    return failed
 
 
 if __name__ == '__main__':
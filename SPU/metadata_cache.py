@@ -0,0 +1,131 @@
+"""
+This module is used to keep JIRA metadata on disk between runs, so boards,
+filters and projects are only fetched again once they go stale.
+"""
+# Build In Modules
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+# Global Variables
+log = logging.getLogger(__name__)
+DEFAULT_METADATA_CACHE = 'spu-cache.sqlite'
+# Seconds each kind of metadata is trusted without asking the server
+DEFAULT_TTLS = {
+    'boards': 60 * 60,
+    'filters': 60 * 60,
+    'projects': 24 * 60 * 60,
+}
+
+
+class MetadataCache:
+
+    """ A SQLite cache of JIRA GET responses. Every entry is keyed by its
+        URL and query, belongs to an entity (boards, filters or projects)
+        with its own TTL and keeps the ETag the server sent, so a stale
+        entry can be refreshed with a conditional request. Bodies are
+        stored gzipped.
+    """
+
+    def __init__(self, path=DEFAULT_METADATA_CACHE, ttls=None, refresh=False):
+        """Returns a MetadataCache object
+        :param string path : SQLite file to keep the cache in
+        :param dict ttls : seconds to trust each entity, on top of DEFAULT_TTLS
+        :param bool refresh : ignore what is cached and fetch everything again
+        """
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.refresh = refresh
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, host TEXT, entity TEXT, etag TEXT, '
+                'body BLOB, fetched REAL)')
+
+    @staticmethod
+    def key(url, params=None):
+        """ Build the key of a request.
+        :param string url : URL of the request
+        :param dict params : query parameters
+        :return string key: cache key
+        """
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def lookup(self, entity, key):
+        """ Get a cached response.
+        :param string entity : entity the response belongs to
+        :param string key : cache key
+        :return tuple entry: (fresh, etag, body) or None if nothing usable is cached
+        """
+        if self.refresh:
+            return None
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT etag, body, fetched FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        etag, body, fetched = row
+        fresh = time.time() - fetched < self.ttls.get(entity, 0)
+        return fresh, etag, json.loads(gzip.decompress(body))
+
+    def store(self, host, entity, key, etag, body):
+        """ Cache a response.
+        :param string host : JIRA server the response came from
+        :param string entity : entity the response belongs to
+        :param string key : cache key
+        :param string etag : ETag the server sent, or None
+        :param body : decoded JSON body
+        """
+        data = gzip.compress(json.dumps(body).encode('utf-8'))
+        with self._lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (key, host, entity, etag, data, time.time()))
+
+    def touch(self, key):
+        """ Mark a cached response as fresh again after a 304.
+        :param string key : cache key
+        """
+        with self._lock, self.connection:
+            self.connection.execute('UPDATE entries SET fetched = ? WHERE key = ?',
+                                    (time.time(), key))
+
+    def invalidate(self, host, entity):
+        """ Drop every cached response of an entity on a server, e.g. after
+        SPU created a board.
+        :param string host : JIRA server
+        :param string entity : entity to drop
+        """
+        with self._lock, self.connection:
+            self.connection.execute('DELETE FROM entries WHERE host = ? AND entity = ?',
+                                    (host, entity))
+
+    def count(self, stat):
+        """ Count a request the cache answered, revalidated or missed. Pool
+        threads share the cache, so this is done under its lock.
+        :param string stat : 'hits', 'revalidated' or 'misses'
+        """
+        with self._lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def log_stats(self):
+        """ Log the cache statistics.
+        """
+        log.info("Metadata cache answered %s requests, revalidated %s and missed %s",
+                 self.hits, self.revalidated, self.misses)
+
+    def close(self):
+        """ Close the SQLite connection.
+        """
+        self.connection.close()
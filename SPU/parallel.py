@@ -0,0 +1,186 @@
+"""
+This module is used to sync many teams to JIRA at the same time.
+"""
+# Build In Modules
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Local Modules
+from SPU.deadline import Deadline, DeadlineExceeded
+import SPU.downstream as d
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def build_instance_limits(config):
+    """
+    Helper function to build the concurrency limit of every JIRA instance.
+
+    :param Dict config: Config dict
+    :return: Semaphore per JIRA instance
+    :rtype: Dict
+    """
+    limits = {}
+    for name, instance in config['SPU']['jira'].items():
+        limits[name] = threading.BoundedSemaphore(
+            instance.get('max_in_flight', d.DEFAULT_MAX_IN_FLIGHT))
+    return limits
+
+
+def sync_team(job, config, global_filters, limits, cache=None, journal=None,
+              global_updates=None, deadline=None, team_deadline=None, issues=None):
+    """
+    Function to sync a single team, capturing any failure.
+
+    :param Dict job: Team job with the name, team and calender to sync
+    :param Dict config: Config dict
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param Dict limits: Semaphore per JIRA instance
+    :param SPU.cache.RunCache cache: Optional run cache
+    :param SPU.journal.Journal journal: Optional run journal
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional global filter collector
+    :param SPU.deadline.Deadline deadline: Optional deadline of the whole run
+    :param Float team_deadline: Optional seconds each team may take
+    :param SPU.issues.IssueBatch issues: Optional batch the quarter issues are queued on
+    :return: Result of the sync
+    :rtype: Dict
+    """
+    jira_instance = d.get_jira_instance(job['team'], config)
+    result = {'name': job['name'], 'jira_instance': jira_instance, 'error': None,
+              'deferred': False}
+    try:
+        # A slot bounds how many teams sync against the instance at once.
+        # Each team creates its sprints on up to 'max_in_flight' threads of
+        # its own, so the threads multiply, but every request still waits
+        # on the instance's scheduler, which caps the requests in flight
+        with limits[jira_instance]:
+            # The team's budget starts once it gets a slot
+            deadline = (deadline or Deadline()).child(team_deadline, name=job['name'])
+            d.start_sync(
+                calender=job['calender'],
+                config=config,
+                team=job['team'],
+                name=job['name'],
+                global_filters=global_filters,
+                cache=cache,
+                journal=journal,
+                global_updates=global_updates,
+                deadline=deadline,
+                issues=issues
+            )
+    except DeadlineExceeded as error:
+        log.warning("Deferred %s: %s", job['name'], error)
+        result['error'] = error
+        result['deferred'] = True
+    except Exception as error:
+        log.exception("Failed to sync %s", job['name'])
+        result['error'] = error
+    return result
+
+
+def sync_teams(jobs, config, global_filters, max_workers, cache=None, journal=None,
+               global_updates=None, deadline=None, team_deadline=None, issues=None):
+    """
+    Function to sync many teams concurrently. One team failing does
+    not stop the others.
+
+    :param List jobs: Team jobs with the name, team and calender to sync
+    :param Dict config: Config dict
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param Int max_workers: Number of teams to sync at once
+    :param SPU.cache.RunCache cache: Optional run cache
+    :param SPU.journal.Journal journal: Optional run journal
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional global filter collector
+    :param SPU.deadline.Deadline deadline: Optional deadline of the whole run
+    :param Float team_deadline: Optional seconds each team may take
+    :param SPU.issues.IssueBatch issues: Optional batch the quarter issues are queued on
+    :return: One result per job, in the same order as the jobs
+    :rtype: List
+    """
+    limits = build_instance_limits(config)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(sync_team, job, config, global_filters,
+                                   limits, cache=cache, journal=journal,
+                                   global_updates=global_updates, deadline=deadline,
+                                   team_deadline=team_deadline, issues=issues)
+                   for job in jobs]
+        return [future.result() for future in futures]
+
+
+async def async_sync_teams(jobs, config, global_filters, journal=None,
+                           global_updates=None, deadline=None, team_deadline=None,
+                           issues=None):
+    """
+    Function to sync many teams on one event loop. Every JIRA instance
+    gets its own asyncio rest API client bounded by its 'max_in_flight'.
+
+    :param List jobs: Team jobs with the name, team and calender to sync
+    :param Dict config: Config dict
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param SPU.journal.Journal journal: Optional run journal
+    :param SPU.global_filters.GlobalFilterUpdates global_updates: Optional global filter collector
+    :param SPU.deadline.Deadline deadline: Optional deadline of the whole run
+    :param Float team_deadline: Optional seconds each team may take
+    :param SPU.issues.IssueBatch issues: Optional batch the quarter issues are queued on
+    :return: One result per job, in the same order as the jobs
+    :rtype: List
+    """
+    deadline = deadline or Deadline()
+    workers = sum(instance.get('max_in_flight', d.DEFAULT_MAX_IN_FLIGHT)
+                  for instance in config['SPU']['jira'].values())
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        rest_api_clients = {name: d.get_async_rest_api_client(name, config, executor=executor)
+                            for name in config['SPU']['jira']}
+
+        async def sync(job):
+            jira_instance = d.get_jira_instance(job['team'], config)
+            result = {'name': job['name'], 'jira_instance': jira_instance, 'error': None,
+                      'deferred': False}
+            try:
+                await d.async_start_sync(
+                    calender=job['calender'],
+                    config=config,
+                    team=job['team'],
+                    name=job['name'],
+                    global_filters=global_filters,
+                    rest_api_client=rest_api_clients[jira_instance],
+                    journal=journal,
+                    global_updates=global_updates,
+                    deadline=deadline.child(team_deadline, name=job['name']),
+                    issues=issues
+                )
+            except DeadlineExceeded as error:
+                log.warning("Deferred %s: %s", job['name'], error)
+                result['error'] = error
+                result['deferred'] = True
+            except Exception as error:
+                log.exception("Failed to sync %s", job['name'])
+                result['error'] = error
+            return result
+
+        return list(await asyncio.gather(*[sync(job) for job in jobs]))
+
+
+def report(results):
+    """
+    Helper function to log a per team error report.
+
+    :param List results: Results from sync_teams
+    :return: Number of teams that failed
+    :rtype: Int
+    """
+    failed = [result for result in results if result['error'] is not None]
+    for result in failed:
+        if result.get('deferred'):
+            continue
+        log.error("%s (%s) failed: %s", result['name'],
+                  result['jira_instance'], result['error'])
+    deferred = [result['name'] for result in failed if result.get('deferred')]
+    if deferred:
+        log.warning("Ran out of time for %s, run again with --resume to finish them",
+                    ', '.join(deferred))
+    log.info("Synced %s of %s teams", len(results) - len(failed), len(results))
+    return len(failed)
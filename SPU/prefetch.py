@@ -0,0 +1,102 @@
+"""
+This module is used to make every read a run needs up front, at the same
+time across JIRA instances and teams, before anything is written.
+"""
+# Build In Modules
+import functools
+import logging
+import time
+
+# 3rd Party Modules
+import requests
+
+# Local Modules
+from SPU.boards import BoardIndex
+from SPU.global_filters import GlobalFilterIndex
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def fetch_project(team, config, cache):
+    """
+    Helper function to look up the project of a team into the run cache.
+    A lookup that fails is left to start_sync, so the team fails the way
+    it always has.
+
+    :param Dict team: Team dict
+    :param Dict config: Config dict
+    :param SPU.cache.RunCache cache: Run cache to fill
+    :return: JIRA project or None if the lookup failed
+    :rtype: Dict
+    """
+    # Imported here rather than at the top, SPU.main imports this module
+    import SPU.downstream as d
+    try:
+        return d.get_project(team, config, cache=cache)
+    except requests.RequestException as error:
+        log.warning("Could not look up project %s: %s", team['jira_project'], error)
+        return None
+
+
+def prefetch(config, jiras, teams, cache, all_boards=None, targeted=False):
+    """
+    Function to read the boards and global filters of every instance and
+    the project of every team at once. Each instance runs up to its
+    'max_in_flight' reads at a time, so the reads take as long as the
+    slowest instance rather than all of them one after another. Projects
+    and JIRA clients are left in the run cache for start_sync.
+
+    :param Dict config: Config dict
+    :param List jiras: JIRA instances to use
+    :param List teams: Team dicts of the run
+    :param SPU.cache.RunCache cache: Run cache to fill
+    :param SPU.boards.BoardIndex all_boards: Optional index of the expected
+        boards, needed to look up only those when targeted
+    :param Bool targeted: Only look up the boards and filters SPU needs by name
+    :return: Boards and global filters of every instance
+    :rtype: Dict
+    """
+    # Imported here rather than at the top, SPU.main imports this module
+    import SPU.downstream as d
+    start = time.monotonic()
+    if all_boards is None:
+        all_boards = BoardIndex()
+    global_filters = GlobalFilterIndex()
+
+    # The boards, by name when targeted or else every board of the instance
+    if targeted:
+        names = sorted({(jira_instance, name)
+                        for (jira_instance, team), expected in all_boards.expected.items()
+                        for name in expected})
+        board_calls = [(jira_instance, functools.partial(
+            d.find_board, d.get_rest_api_client(jira_instance, config), name))
+            for jira_instance, name in names]
+    else:
+        names = [jira['jira_instance'] for jira in jiras]
+        board_calls = [(jira_instance, functools.partial(
+            cache.get_boards, jira_instance, functools.partial(
+                d.list_boards, d.get_rest_api_client(jira_instance, config))))
+            for jira_instance in names]
+
+    # The global filters of both global boards, fetched once per instance
+    filter_calls = [(jira['jira_instance'], functools.partial(
+        d.get_global_filters, jira, config, global_filters, targeted=targeted))
+        for jira in jiras]
+
+    # The project of every team
+    teams = [team for team in teams if d.get_jira_instance(team, config)]
+    team_calls = [(d.get_jira_instance(team, config), functools.partial(
+        fetch_project, team, config, cache)) for team in teams]
+
+    results = d.run_per_instance(config, board_calls + filter_calls + team_calls)
+    for name, boards in zip(names, results[:len(board_calls)]):
+        if targeted:
+            if boards is not None:
+                all_boards.add(name[0], {name[1]: boards})
+        else:
+            all_boards.add(name, boards)
+
+    log.info("Read %s boards and the projects of %s teams from %s instances in %.1fs",
+             len(all_boards), len(teams), len(jiras), time.monotonic() - start)
+    return {'boards': all_boards, 'global_filters': global_filters}
@@ -0,0 +1,318 @@
+"""
+This module is used to reconcile JIRA with the calender. It snapshots what
+already exists, plans only the missing writes and then applies that plan.
+"""
+# Build In Modules
+import json
+import logging
+import re
+
+# Local Modules
+import SPU.downstream as d
+
+# Global Variables
+log = logging.getLogger(__name__)
+QUARTER_ISSUE = re.compile(r'^Quarter \d+ Issue$')
+REF_PREFIX = '$ref:'
+
+
+def ref(op_id):
+    """
+    Helper function to refer to the result of another operation.
+
+    :param String op_id: ID of the operation
+    :return: Reference to the result
+    :rtype: String
+    """
+    return REF_PREFIX + op_id
+
+
+def snapshot(config, jira_instance, jobs, cache=None):
+    """
+    Function to take a bulk snapshot of what already exists on an instance.
+
+    :param Dict config: Config dict
+    :param String jira_instance: JIRA instance name
+    :param List jobs: Team jobs on this instance
+    :param SPU.cache.RunCache cache: Optional run cache
+    :return: Boards, filters, sprints per board and quarter issues
+    :rtype: Dict
+    """
+    rest_api_client = d.get_rest_api_client(jira_instance, config)
+
+    if cache is not None:
+        boards = cache.get_boards(jira_instance, lambda: d.list_boards(rest_api_client))
+    else:
+        boards = d.list_boards(rest_api_client)
+    filters = {fil['name']: fil for fil in rest_api_client.get_favourite_filters()}
+
+    # Only look at the sprints of boards we would otherwise create
+    sprints = {}
+    projects = set()
+    quarter_strings = set()
+    for job in jobs:
+        projects.add(job['team']['jira_project'])
+        for quarter, value in job['calender'].items():
+            if not value:
+                continue
+            quarter_strings.add(value[0]['quarter_string'])
+            board_name = f"{value[0]['quarter_string']} - {job['name']} Board"
+            if board_name in boards and board_name not in sprints:
+                sprints[board_name] = {sprint['name']: sprint['id'] for sprint
+                                       in rest_api_client.iter_sprints(boards[board_name])}
+
+    # Find every quarter issue with one paged search
+    issues = {}
+    if projects and quarter_strings:
+        jql = f"project in ({', '.join(sorted(projects))}) " \
+            f"AND labels in ({', '.join(sorted(quarter_strings))})"
+        for issue in rest_api_client.iter_search(jql, fields='summary,labels,project',
+                                                 prefetch=True):
+            if not QUARTER_ISSUE.match(issue['fields']['summary']):
+                continue
+            for label in issue['fields']['labels']:
+                issues[f"{issue['fields']['project']['key']}/{label}"] = issue['key']
+
+    return {'boards': boards, 'filters': filters, 'sprints': sprints, 'issues': issues}
+
+
+def plan_team(state, job, jira_instance, global_jql, max_projects=None):
+    """
+    Function to diff a team's calender against the snapshot.
+
+    :param Dict state: Snapshot of the instance
+    :param Dict job: Team job with the name, team and calender to sync
+    :param String jira_instance: JIRA instance name
+    :param Dict global_jql: Working JQL of the global filters by (bad_board, quarter_string),
+        updated in place
+    :param Int max_projects: Most projects one global filter may hold
+    :return: Operations needed for this team
+    :rtype: List
+    """
+    if max_projects is None:
+        max_projects = d.DEFAULT_GLOBAL_BOARD_MAX_PROJECTS
+    name = job['name']
+    project = job['team']['jira_project']
+    plan = []
+    for quarter, sprints in job['calender'].items():
+        if not sprints:
+            continue
+        quarter_string = sprints[0]['quarter_string']
+        prefix = f"{jira_instance}/{name}/{quarter_string}"
+
+        # The team filter
+        params = d.filter_params(quarter_string, project)
+        if params['name'] in state['filters']:
+            filter_id = state['filters'][params['name']]['id']
+        else:
+            plan.append({'id': f"{prefix}/filter", 'op': 'create_filter',
+                         'jira_instance': jira_instance, 'team': name,
+                         'quarter': quarter_string, 'args': params})
+            filter_id = ref(f"{prefix}/filter")
+
+        # The global filters, the project goes into one shard of each
+        for bad_board in (False, True):
+            shards = global_jql.get((bad_board, quarter_string))
+            if not shards:
+                continue
+            update = d.global_shard_jql(shards, quarter_string, project, max_projects,
+                                        bad_board=bad_board)
+            if update is None:
+                continue
+            shard, new_jql = update
+            if shard > len(shards):
+                # Every shard is full, a new one is created
+                shards.append({'id': None, 'name': None, 'shard': shard, 'jql': new_jql,
+                               'changed': True})
+            else:
+                shards[shard - 1]['jql'] = new_jql
+                shards[shard - 1]['changed'] = True
+
+        # The board
+        board_name = f"{quarter_string} - {name} Board"
+        if board_name in state['boards']:
+            board_id = state['boards'][board_name]
+        else:
+            plan.append({'id': f"{prefix}/board", 'op': 'create_board',
+                         'jira_instance': jira_instance, 'team': name,
+                         'quarter': quarter_string,
+                         'args': {'name': board_name, 'project': project,
+                                  'filter_id': filter_id}})
+            board_id = ref(f"{prefix}/board")
+
+        # The quarter issue
+        if f"{project}/{quarter_string}" not in state['issues']:
+            plan.append({'id': f"{prefix}/issue", 'op': 'create_issue',
+                         'jira_instance': jira_instance, 'team': name,
+                         'quarter': quarter_string,
+                         'args': {'fields': d.quarter_issue_fields(quarter, quarter_string, project)}})
+
+        # The sprints
+        existing = state['sprints'].get(board_name, {})
+        for sprint in sprints:
+            if sprint['sprint_string'] in existing:
+                continue
+            plan.append({'id': f"{prefix}/sprint/{sprint['sprint_string']}", 'op': 'create_sprint',
+                         'jira_instance': jira_instance, 'team': name,
+                         'quarter': quarter_string,
+                         'args': {'name': sprint['sprint_string'], 'board_id': board_id,
+                                  'start_date': d.sprint_date(sprint['start_date']),
+                                  'end_date': d.sprint_date(sprint['end_date'])}})
+    return plan
+
+
+def build_plan(config, jobs, global_filters, cache=None):
+    """
+    Function to build the minimal plan of writes for every team.
+
+    :param Dict config: Config dict
+    :param List jobs: Team jobs with the name, team and calender to sync
+    :param SPU.global_filters.GlobalFilterIndex global_filters: Global filters
+    :param SPU.cache.RunCache cache: Optional run cache
+    :return: Operations to apply, in order
+    :rtype: List
+    """
+    by_instance = {}
+    for job in jobs:
+        by_instance.setdefault(d.get_jira_instance(job['team'], config), []).append(job)
+
+    plan = []
+    for jira_instance, instance_jobs in by_instance.items():
+        state = snapshot(config, jira_instance, instance_jobs, cache=cache)
+        # Work on a copy of the global filters so every team builds on the
+        # JQL of the teams before it
+        global_jql = {key: [{'id': fil['id'], 'name': fil['name'], 'jql': fil['jql'],
+                             'changed': False} for fil in shards]
+                      for key, shards in global_filters.items(jira_instance)}
+        for job in instance_jobs:
+            plan.extend(plan_team(state, job, jira_instance, global_jql,
+                                  max_projects=d.global_max_projects(config)))
+        for (bad_board, quarter_string), shards in global_jql.items():
+            for fil in shards:
+                if fil['id'] is None:
+                    kind = 'bad' if bad_board else 'good'
+                    plan.append({'id': f"{jira_instance}/global/{quarter_string}/{kind}/"
+                                       f"{fil['shard']}",
+                                 'op': 'create_global_shard', 'jira_instance': jira_instance,
+                                 'team': None, 'quarter': quarter_string,
+                                 'args': {'title': d.global_title(bad_board),
+                                          'quarter_label': quarter_string,
+                                          'quarter_jql': fil['jql'], 'shard': fil['shard']}})
+                elif fil['changed']:
+                    plan.append({'id': f"{jira_instance}/global/{fil['id']}",
+                                 'op': 'update_filter', 'jira_instance': jira_instance,
+                                 'team': None, 'quarter': None,
+                                 'args': {'name': fil['name'], 'jql': fil['jql'],
+                                          'filter_id': fil['id']}})
+    return plan
+
+
+def resolve(args, results):
+    """
+    Helper function to swap references for the results they point at.
+
+    :param Dict args: Operation arguments
+    :param Dict results: IDs returned by applied operations
+    :return: Resolved arguments
+    :rtype: Dict
+    """
+    resolved = {}
+    for key, value in args.items():
+        if isinstance(value, str) and value.startswith(REF_PREFIX):
+            value = results[value[len(REF_PREFIX):]]
+        resolved[key] = value
+    return resolved
+
+
+def apply_operation(operation, config, cache=None):
+    """
+    Function to apply a single resolved operation.
+
+    :param Dict operation: Operation with resolved arguments
+    :param Dict config: Config dict
+    :param SPU.cache.RunCache cache: Optional run cache
+    :return: ID of whatever the operation created
+    :rtype: String
+    """
+    jira_instance = operation['jira_instance']
+    rest_api_client = d.get_rest_api_client(jira_instance, config)
+    args = operation['args']
+    if operation['op'] == 'create_filter':
+        return rest_api_client.create_filter(**args)['id']
+    elif operation['op'] == 'create_global_shard':
+        return d.create_global_shard(
+            args['title'], jira_instance, args['quarter_label'], args['quarter_jql'],
+            rest_api_client, shard=args['shard'])['id']
+    elif operation['op'] == 'update_filter':
+        rest_api_client.update_filter(**args)
+        return args['filter_id']
+    elif operation['op'] == 'create_board':
+        return rest_api_client.create_board(
+            name=args['name'], project=args['project'],
+            filter_id=int(args['filter_id']))['id']
+    elif operation['op'] == 'create_issue':
+        client = d.get_jira_client({'jira_instance': jira_instance}, config, cache=cache)
+        return client.create_issue(fields=args['fields']).key
+    elif operation['op'] == 'create_sprint':
+        return rest_api_client.create_sprint(
+            name=args['name'], board_id=args['board_id'],
+            start_date=args.get('start_date'), end_date=args.get('end_date'))['id']
+    raise ValueError(f"Unknown operation {operation['op']}")
+
+
+def apply_plan(plan, config, cache=None):
+    """
+    Function to apply a plan in order.
+
+    :param List plan: Operations to apply
+    :param Dict config: Config dict
+    :param SPU.cache.RunCache cache: Optional run cache
+    :return: IDs returned by every operation
+    :rtype: Dict
+    """
+    results = {}
+    for operation in plan:
+        operation = dict(operation, args=resolve(operation['args'], results))
+        results[operation['id']] = apply_operation(operation, config, cache=cache)
+        log.info("Applied %s", operation['id'])
+    return results
+
+
+def format_plan(plan):
+    """
+    Helper function to render a plan for review.
+
+    :param List plan: Operations to apply
+    :return: Human readable plan
+    :rtype: String
+    """
+    if not plan:
+        return 'JIRA is already up to date, nothing to do'
+    lines = [f'SPS will make the following {len(plan)} changes']
+    for operation in plan:
+        lines.append(f"* {operation['op']}: {operation['id']}")
+    return '\n'.join(lines)
+
+
+def save_plan(plan, path):
+    """
+    Helper function to write a plan out as JSON.
+
+    :param List plan: Operations to apply
+    :param String path: File to write to
+    :return: Nothing
+    """
+    with open(path, 'w') as f:
+        json.dump(plan, f, indent=2)
+
+
+def load_plan(path):
+    """
+    Helper function to read a plan written by save_plan.
+
+    :param String path: File to read from
+    :return: Operations to apply
+    :rtype: List
+    """
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,233 @@
+"""
+This module is used to pace the requests made to a JIRA instance, backing
+off when JIRA says it is being overloaded.
+"""
+# Build In Modules
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import logging
+import random
+import threading
+import time
+
+# 3rd Party Modules
+from requests.adapters import HTTPAdapter
+
+# Local Modules
+from SPU.deadline import DeadlineExceeded, current_deadline
+
+# Global Variables
+log = logging.getLogger(__name__)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+# Statuses worth retrying. Anything but a 429 may have been acted on, so
+# those are only retried for requests that are safe to repeat
+THROTTLED = 429
+RETRY_STATUSES = (THROTTLED, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+def retry_after(resp):
+    """
+    Helper function to read how long the server asked us to wait.
+
+    :param requests.Response resp: Response
+    :return: Seconds to wait or None if the server did not say
+    :rtype: Float
+    """
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RequestScheduler:
+
+    """ Paces the requests to one JIRA instance. A token bucket caps the
+        request rate, and the number of requests in flight follows AIMD:
+        it grows by one per round of successful requests and halves when
+        JIRA throttles us. Throttled and failed requests are retried after
+        Retry-After or a jittered exponential backoff.
+    """
+
+    def __init__(self, name, rate=None, burst=None, max_in_flight=4,
+                 max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY):
+        """Returns a RequestScheduler object
+        :param string name : JIRA instance name, used in the logs
+        :param float rate : most requests per second, None for no limit
+        :param int burst : most requests allowed at once after a quiet spell
+        :param int max_in_flight : most requests in flight at once
+        :param int max_retries : times to retry a request before giving up
+        :param float base_delay : first backoff in seconds
+        :param float max_delay : longest backoff in seconds
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.tokens = float(self.burst)
+        self.refilled = time.monotonic()
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.wait_time = 0.0
+        self.work_time = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+
+    def take_token(self):
+        """ Take a token from the bucket, waiting for one if it is empty.
+        """
+        if self.rate is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+            self.refilled = now
+            # Reserve the token now and wait for it outside the lock
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            self.wait(delay)
+
+    def wait(self, seconds):
+        """ Sleep, counting the time as waiting.
+        :param float seconds : time to sleep
+        """
+        time.sleep(seconds)
+        with self._lock:
+            self.wait_time += seconds
+
+    def backoff(self, attempt, resp):
+        """ Work out how long to wait before retrying.
+        :param int attempt : retries made so far
+        :param requests.Response resp : the failed response
+        :return float delay: seconds to wait
+        """
+        delay = retry_after(resp)
+        if delay is None:
+            # Full jitter keeps many clients from retrying in step
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return min(delay, self.max_delay)
+
+    def acquire(self):
+        """ Wait for a free request slot.
+        """
+        start = time.monotonic()
+        with self._slots:
+            while self.in_flight >= int(self.limit):
+                self._slots.wait()
+            self.in_flight += 1
+            self.wait_time += time.monotonic() - start
+
+    def release(self, throttled):
+        """ Free a request slot and adapt the concurrency limit.
+        :param bool throttled : did JIRA throttle the request
+        """
+        with self._slots:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_in_flight), self.limit + 1 / self.limit)
+            self._slots.notify_all()
+
+    def send(self, method, send):
+        """ Make a request, pacing it and retrying it when it fails.
+        :param string method : HTTP method of the request
+        :param function send : function that makes the request and returns the response
+        :return requests.Response resp: the last response
+        """
+        deadline = current_deadline()
+        attempt = 0
+        while True:
+            if deadline is not None:
+                deadline.check(f"{method} request to {self.name}")
+            self.take_token()
+            self.acquire()
+            start = time.monotonic()
+            try:
+                resp = send()
+            except Exception:
+                self.release(False)
+                raise
+            finally:
+                with self._lock:
+                    self.work_time += time.monotonic() - start
+                    self.requests += 1
+            throttled = resp.status_code == THROTTLED
+            self.release(throttled)
+            with self._lock:
+                self.throttled += throttled
+            retry = resp.status_code in RETRY_STATUSES and \
+                (throttled or method in IDEMPOTENT_METHODS)
+            if not retry or attempt >= self.max_retries:
+                return resp
+            delay = self.backoff(attempt, resp)
+            if deadline is not None and deadline.remaining() is not None \
+                    and delay >= deadline.remaining():
+                resp.close()
+                raise DeadlineExceeded(f"{deadline.name} deadline passes before {self.name} "
+                                       f"can be retried after {resp.status_code}")
+            with self._lock:
+                self.retries += 1
+            log.warning("%s answered %s, retrying in %.1fs", self.name, resp.status_code, delay)
+            resp.close()
+            self.wait(delay)
+            attempt += 1
+
+    def stats(self):
+        """ Report how the requests went.
+        :return dict stats: request, throttle and retry counts, the current
+        concurrency limit and the seconds spent waiting and working
+        """
+        with self._lock:
+            return {'requests': self.requests, 'throttled': self.throttled,
+                    'retries': self.retries, 'limit': self.limit,
+                    'wait_time': self.wait_time, 'work_time': self.work_time}
+
+    def log_stats(self):
+        """ Log how long was spent waiting compared with working.
+        """
+        stats = self.stats()
+        log.info("%s: %s requests, %s throttled, %s retries, %.1fs waiting, "
+                 "%.1fs in requests", self.name, stats['requests'], stats['throttled'],
+                 stats['retries'], stats['wait_time'], stats['work_time'])
+
+
+class ScheduledAdapter(HTTPAdapter):
+
+    """ A requests transport adapter that sends every request through a
+        RequestScheduler. Mounting it on a session puts every call made
+        through that session, ours or jira.client's, under the scheduler.
+    """
+
+    def __init__(self, scheduler, **kwargs):
+        """Returns a ScheduledAdapter object
+        :param RequestScheduler scheduler : scheduler of the JIRA instance
+        """
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # Requests made under a deadline have to end by it
+        deadline = current_deadline()
+        if deadline is not None:
+            kwargs['timeout'] = deadline.clamp(kwargs.get('timeout'))
+        return self.scheduler.send(request.method,
+                                   lambda: super(ScheduledAdapter, self).send(request, **kwargs))
@@ -0,0 +1,164 @@
+"""
+This module is used to split a run over worker processes, one per JIRA
+instance or group of instances. Instances share nothing, so every worker
+builds the global boards and syncs the teams of its own instances.
+"""
+# Build In Modules
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import copy
+import logging
+import logging.handlers
+import multiprocessing
+
+# Local Modules
+from SPU.journal import Journal, DEFAULT_JOURNAL
+import SPU.downstream as d
+import SPU.main as m
+
+# Global Variables
+log = logging.getLogger(__name__)
+
+
+def group_instances(config, shards):
+    """
+    Helper function to spread the JIRA instances over the shards.
+
+    :param Dict config: Config dict
+    :param Int shards: Number of worker processes
+    :return: Instance names of every shard
+    :rtype: List
+    """
+    instances = sorted(config['SPU']['jira'])
+    shards = max(1, min(shards, len(instances)))
+    return [instances[shard::shards] for shard in range(shards)]
+
+
+def shard_config(config, instances):
+    """
+    Helper function to build the config of one shard, keeping only its
+    JIRA instances and the teams on them.
+
+    :param Dict config: Config dict
+    :param List instances: JIRA instance names of the shard
+    :return: Config dict of the shard
+    :rtype: Dict
+    """
+    shard = copy.deepcopy(config)
+    shard['SPU']['jira'] = {name: value for name, value in config['SPU']['jira'].items()
+                            if name in instances}
+    shard['SPU']['teams'] = {name: value for name, value in config['SPU']['teams'].items()
+                             if d.get_jira_instance(value, config) in instances}
+    return shard
+
+
+class ShardLogFilter(logging.Filter):
+
+    """ Prefixes every log record of a worker with its instances, so the
+        parent's log shows which shard said what.
+    """
+
+    def __init__(self, name):
+        """Returns a ShardLogFilter object
+        :param string name : name of the shard
+        """
+        super().__init__()
+        self.shard = name
+
+    def filter(self, record):
+        record.msg = f"[{self.shard}] {record.msg}"
+        return True
+
+
+class ParentHandler(logging.Handler):
+
+    """ Hands the records of the workers to the parent's own loggers, so
+        they go wherever the parent's logging is set up to send them.
+    """
+
+    def emit(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def run_shard(config, cargs, instances, log_queue, level):
+    """
+    Function to run the sync of one shard in a worker process.
+
+    :param Dict config: Config dict of the shard
+    :param argparse.Namespace cargs: Command line arguments
+    :param List instances: JIRA instance names of the shard
+    :param multiprocessing.Queue log_queue: Queue the log records go to
+    :param Int level: Log level of the parent
+    :return: Result of the shard
+    :rtype: Dict
+    """
+    name = ', '.join(instances)
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(ShardLogFilter(name))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+
+    result = {'instances': instances, 'failed': 0, 'error': None}
+    try:
+        # The parent started the journal, every shard appends to it
+        journal = Journal(cargs.journal or config['SPU'].get('journal', DEFAULT_JOURNAL),
+                          resume=True)
+        result['failed'] = m.run(config, cargs, no_prompt=True, journal=journal)
+    except Exception as error:
+        log.exception("Shard %s failed", name)
+        result['error'] = repr(error)
+    return result
+
+
+def run_shards(config, cargs, shards):
+    """
+    Function to run a sync with one worker process per group of JIRA
+    instances. The logs of every worker come back to this process.
+
+    :param Dict config: Config dict
+    :param argparse.Namespace cargs: Command line arguments
+    :param Int shards: Number of worker processes
+    :return: Number of teams and quarter issues that failed, plus one for
+        every shard that did not finish
+    :rtype: Int
+    """
+    groups = group_instances(config, shards)
+    # Workers start from a clean interpreter rather than a copy of this one
+    context = multiprocessing.get_context('spawn')
+    manager = context.Manager()
+    log_queue = manager.Queue()
+    listener = logging.handlers.QueueListener(log_queue, ParentHandler())
+    listener.start()
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=len(groups), mp_context=context) as executor:
+            futures = [executor.submit(run_shard, shard_config(config, instances), cargs,
+                                       instances, log_queue,
+                                       logging.getLogger().getEffectiveLevel())
+                       for instances in groups]
+            for instances, future in zip(groups, futures):
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool as error:
+                    results.append({'instances': instances, 'failed': 0,
+                                    'error': repr(error)})
+    finally:
+        listener.stop()
+        manager.shutdown()
+
+    failed = 0
+    for result in results:
+        name = ', '.join(result['instances'])
+        if result['error'] is not None:
+            log.error("Shard %s did not finish: %s", name, result['error'])
+            failed += 1
+        elif result['failed']:
+            log.error("Shard %s had %s failures", name, result['failed'])
+        failed += result['failed']
+    log.info("%s of %s shards finished cleanly", sum(
+        1 for result in results if result['error'] is None and not result['failed']),
+        len(results))
+    return failed
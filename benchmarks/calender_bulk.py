@@ -0,0 +1,121 @@
+"""
+Benchmark of building the calender of every team one at a time against
+building them all at once with NumPy. The two are checked to match first,
+field by field, for every sprint length and a sweep of start dates around
+several global start dates.
+
+Usage: python -m benchmarks.calender_bulk [teams]
+"""
+# Build In Modules
+from datetime import datetime, timedelta
+import sys
+import time
+
+# Local Modules
+from SPU.bulk_calender import build_bulk_calender, team_calender
+from SPU.calender import SPRINT_WEEKS, START_WINDOWS, Calender
+
+GLOBAL_START = '01-01-19'
+# Global starts the results are checked for, including ones where the
+# teams start in the year before
+CHECK_STARTS = ('01-01-19', '01-04-21', '12-30-19', '01-02-23')
+YEARS = 9
+
+
+def build_teams(teams, global_start=GLOBAL_START):
+    """
+    Function to make up a roster of teams with valid start dates. The
+    teams cycle through every sprint length, and each length through every
+    start date its window allows.
+
+    :param Int teams: Number of teams
+    :param String global_start: Global Q1 start date
+    :return: Teams in the config format
+    :rtype: Dict
+    """
+    start = datetime.strptime(global_start, '%m-%d-%y')
+    roster = {}
+    for team in range(teams):
+        length = team % SPRINT_WEEKS + 1
+        window = START_WINDOWS.get(length, timedelta(weeks=length) / 2).days
+        offset = timedelta(days=(team // SPRINT_WEEKS) % (2 * window + 1) - window)
+        roster[f"TEAM_{team}"] = {'sprint_length': length,
+                                  'sprint_start_date': (start + offset).strftime('%m-%d-%y')}
+    return roster
+
+
+def scalar(roster, global_start=GLOBAL_START):
+    """
+    Function to build every calender one team at a time.
+
+    :param Dict roster: Teams in the config format
+    :param String global_start: Global Q1 start date
+    :return: Calender of every team
+    :rtype: Dict
+    """
+    return {team: Calender(global_start, value['sprint_start_date'],
+                           value['sprint_length']).as_dict(YEARS)
+            for team, value in roster.items()}
+
+
+def check(calenders, bulk):
+    """
+    Function to check the bulk calenders match the scalar ones, comparing
+    every key of every sprint, the sprint and quarter strings included.
+
+    :param Dict calenders: Calender of every team
+    :param Dict bulk: Output of build_bulk_calender
+    :return: Nothing, raises AssertionError on the first difference
+    """
+    for team in bulk['teams']:
+        expected = {index: [sprint.as_dict() for sprint in quarter]
+                    for index, quarter in calenders[team].items()}
+        actual = {index: [sprint.as_dict() for sprint in quarter]
+                  for index, quarter in team_calender(bulk, team).items()}
+        assert actual == expected, team
+
+
+def check_sweep():
+    """
+    Function to check the bulk calender against the scalar one for every
+    sprint length and start date around each of CHECK_STARTS.
+
+    :return: Number of teams checked
+    :rtype: Int
+    """
+    # Enough teams for every length to go through its whole start window
+    teams = SPRINT_WEEKS * (2 * (timedelta(weeks=SPRINT_WEEKS) / 2).days + 1)
+    for global_start in CHECK_STARTS:
+        roster = build_teams(teams, global_start)
+        check(scalar(roster, global_start), build_bulk_calender(global_start, roster, YEARS))
+    return teams * len(CHECK_STARTS)
+
+
+def timed(function, *args):
+    """
+    Helper function to time a call.
+
+    :param Function function: Function to call
+    :return: Result and seconds taken
+    :rtype: Tuple
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    checked = check_sweep()
+    print(f"{checked} teams over {len(CHECK_STARTS)} global starts, results match")
+    teams = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    roster = build_teams(teams)
+    calenders, scalar_time = timed(scalar, roster)
+    bulk, bulk_time = timed(build_bulk_calender, GLOBAL_START, roster, YEARS)
+    check(calenders, bulk)
+    print(f"{teams} teams, {YEARS} years, results match")
+    print(f"scalar: {scalar_time:8.3f} s")
+    print(f"bulk:   {bulk_time:8.3f} s ({scalar_time / bulk_time:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of the memory a full 9 year calender takes for many teams, as
+Sprint/Quarter objects against the old lists of sprint dicts.
+
+Usage: python -m benchmarks.calender_memory [teams]
+"""
+# Build In Modules
+import sys
+import tracemalloc
+
+# Local Modules
+from SPU.calender import Calender
+
+GLOBAL_START = '01-01-19'
+YEARS = 9
+
+
+def build_teams(teams, as_dicts=False):
+    """
+    Function to build the calender of every team.
+
+    :param Int teams: Number of teams
+    :param Bool as_dicts: Keep the sprints in the old dict format
+    :return: Calender of every team
+    :rtype: List
+    """
+    calenders = []
+    for team in range(teams):
+        calender = Calender(GLOBAL_START, GLOBAL_START, 2 + team % 3).as_dict(YEARS)
+        if as_dicts:
+            calender = {index: [sprint.as_dict() for sprint in quarter]
+                        for index, quarter in calender.items()}
+        else:
+            # Render the names like a sync would, so the cached strings count
+            for quarter in calender.values():
+                for sprint in quarter:
+                    sprint.sprint_string
+                    sprint.quarter_string
+        calenders.append(calender)
+    return calenders
+
+
+def measure(teams, as_dicts):
+    """
+    Function to measure the memory held by the calenders of every team.
+
+    :param Int teams: Number of teams
+    :param Bool as_dicts: Keep the sprints in the old dict format
+    :return: Bytes held
+    :rtype: Int
+    """
+    tracemalloc.start()
+    calenders = build_teams(teams, as_dicts=as_dicts)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del calenders
+    return held
+
+
+def main():
+    teams = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    dicts = measure(teams, as_dicts=True)
+    slotted = measure(teams, as_dicts=False)
+    print(f"{teams} teams, {YEARS} years")
+    print(f"sprint dicts:   {dicts / 2 ** 20:8.2f} MiB")
+    print(f"Sprint objects: {slotted / 2 ** 20:8.2f} MiB ({slotted / dicts:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,10 @@ setup(
     url='https://github.com/sidpremkumar/Sprint-Planning-Utility',
     license='',
     install_requires=install_requires,
+    extras_require={
+        'bulk': ['numpy'],
+        'kerberos': ['requests-kerberos'],
+    },
     packages=[
         'SPU'
     ],
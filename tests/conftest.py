@@ -0,0 +1,67 @@
+"""
+Fixtures shared by the tests. Every test talks to its own stand-in JIRA
+server, see tests/stub.py.
+"""
+# Build In Modules
+import argparse
+import os
+
+# SPU.main reads the global board names when it is imported
+os.environ.setdefault('GLOBAL_BOARD', 'Global')
+os.environ.setdefault('GLOBAL_BAD_BOARD', 'Global Bad')
+
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+import SPU.downstream as d
+from stub import StubJira
+
+
+@pytest.fixture
+def jira():
+    """ A running stand-in JIRA server. """
+    server = StubJira().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def config(jira, tmp_path):
+    """ Config with one JIRA instance, pointed at the stand-in server, and
+    two teams on it. """
+    return {'SPU': {
+        'operational_q1_start': '01-01-26',
+        'run_for_quarter': False,
+        'journal': str(tmp_path / 'spu-journal.jsonl'),
+        'jira': {
+            'stub': {
+                'options': {'server': jira.url},
+                'basic_auth': ['user', 'password'],
+                'max_retries': 2,
+            },
+        },
+        'teams': {
+            'Team A': {'jira_project': 'A', 'sprint_length': 2,
+                       'jira_instance': 'stub', 'sprint_start_date': '01-01-26'},
+            'Team B': {'jira_project': 'B', 'sprint_length': 2,
+                       'jira_instance': 'stub', 'sprint_start_date': '01-01-26'},
+        },
+    }}
+
+
+@pytest.fixture
+def cargs():
+    """ Command line arguments of a plain 'spu -y' run. """
+    return argparse.Namespace(
+        yes=True, parallel=None, asyncio=False, reconcile=False, plan_out=None,
+        apply_plan=None, resume=False, journal=None, refresh_cache=False,
+        targeted_lookups=False, run_deadline=None, team_deadline=None, shards=None,
+        log_level='INFO', command=None)
+
+
+@pytest.fixture(autouse=True)
+def close_clients():
+    """ Forget the shared clients and schedulers after every test. """
+    yield
+    d.close_rest_api_clients()
@@ -0,0 +1,293 @@
+"""
+A stand-in JIRA server for the tests. It keeps the filters, boards,
+sprints and issues it is sent in memory, records every request and can be
+told to fail requests before answering them, or to only answer requests
+that carry a cookie from its step-auth site.
+"""
+# Build In Modules
+import hashlib
+import itertools
+import json
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubJira(ThreadingHTTPServer):
+
+    """ A JIRA server on a free local port. Start it with start() and
+        point the config at its url.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Returns a StubJira object
+        """
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_port}"
+        self.calls = []
+        self.queries = []
+        self.filters = {}
+        self.boards = {}
+        self.sprints = {}
+        self.issues = {}
+        self.swaps = []
+        self.not_modified = 0
+        self.failures = {}
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.delay = 0
+        # Step-auth cookies still accepted, None to accept every request
+        self.step_cookies = None
+        self.negotiations = 0
+        self._ids = itertools.count(100)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """ Serve requests on a background thread.
+        :return StubJira self: the running server
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """ Stop serving and close the socket.
+        """
+        self.shutdown()
+        self.server_close()
+
+    def next_id(self):
+        """ Get a new ID for a created resource.
+        :return int id: new ID
+        """
+        with self._lock:
+            return next(self._ids)
+
+    def fail(self, method, path, status, headers=None, times=1):
+        """ Answer the next requests to a path with an error.
+        :param string method : HTTP method to fail
+        :param string path : path to fail
+        :param int status : status code to answer with
+        :param dict headers : optional headers of the error
+        :param int times : how many requests to fail
+        """
+        self.failures.setdefault((method, path), []).extend([(status, headers or {})] * times)
+
+    def require_step_auth(self):
+        """ Turn down every request without a valid step-auth cookie with a 401.
+        """
+        self.step_cookies = set()
+
+    def expire_step_auth(self):
+        """ Stop accepting the step-auth cookies handed out so far.
+        """
+        with self._lock:
+            self.step_cookies.clear()
+
+    def made(self, method, path=None):
+        """ Get the requests made with a method, optionally to one path.
+        :param string method : HTTP method
+        :param string path : optional path
+        :return list calls: (method, path, body) of every matching request
+        """
+        return [call for call in self.calls
+                if call[0] == method and (path is None or call[1] == path)]
+
+    def sprint_order(self, board_id):
+        """ Get the names of a board's sprints in the order the board lists them.
+        :param int board_id : board ID
+        :return list names: sprint names
+        """
+        order = sorted(sprint_id for sprint_id, sprint in self.sprints.items()
+                       if sprint['originBoardId'] == board_id)
+        for sprint_id, other_id in self.swaps:
+            if sprint_id in order and other_id in order:
+                first, second = order.index(sprint_id), order.index(other_id)
+                order[first], order[second] = order[second], order[first]
+        return [self.sprints[sprint_id]['name'] for sprint_id in order]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    """ Answers the JIRA rest API calls SPU makes.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, body=None, status=200, headers=None):
+        """ Send a JSON response.
+        :param body : JSON body, None for an empty response
+        :param int status : status code
+        :param dict headers : optional extra headers
+        """
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def body(self):
+        """ Read the JSON body of the request.
+        :return : parsed body
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def handle_request(self, method):
+        """ Record a request, then fail or answer it.
+        :param string method : HTTP method
+        """
+        server = self.server
+        url = urlparse(self.path)
+        body = self.body() if method in ('POST', 'PUT') else None
+        with server._lock:
+            server.calls.append((method, url.path, body))
+            server.queries.append((method, url.path, parse_qs(url.query)))
+            failures = server.failures.get((method, url.path))
+            failure = failures.pop(0) if failures else None
+            server.in_flight += 1
+            server.most_in_flight = max(server.most_in_flight, server.in_flight)
+        try:
+            if server.delay:
+                threading.Event().wait(server.delay)
+            if failure is not None:
+                status, headers = failure
+                return self.send({'errorMessages': ['stub failure']}, status, headers)
+            if server.step_cookies is not None:
+                if url.path == '/step-auth-gss':
+                    return self.negotiate()
+                cookie = SimpleCookie(self.headers.get('Cookie', '')).get('step')
+                if cookie is None or cookie.value not in server.step_cookies:
+                    return self.send({'errorMessages': ['step-auth cookie expired']}, 401)
+            answer = getattr(self, method.lower() + '_answer')(url.path, parse_qs(url.query), body)
+            if method == 'GET':
+                # Every read carries an ETag and answers If-None-Match
+                etag = '"%s"' % hashlib.sha1(json.dumps(answer[0]).encode()).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    return self.send(None, 304, {'ETag': etag})
+                return self.send(answer[0], 200, {'ETag': etag})
+            self.send(*answer)
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def negotiate(self):
+        """ Hand out a new step-auth cookie, like the kerberos enabled
+        step site in front of JIRA.
+        """
+        server = self.server
+        with server._lock:
+            server.negotiations += 1
+            value = f"session-{server.negotiations}"
+            server.step_cookies.add(value)
+        self.send(None, 200, {'Set-Cookie': f"step={value}; Path=/"})
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def get_answer(self, path, query, body):
+        server = self.server
+        if path.endswith('/serverInfo'):
+            return {'version': '8.0.0', 'versionNumbers': [8, 0, 0],
+                    'deploymentType': 'Server', 'baseUrl': server.url},
+        if path.startswith('/rest/api/2/project/'):
+            key = path.rsplit('/', 1)[1]
+            return {'id': key, 'key': key, 'name': key},
+        if path == '/rest/api/2/filter/favourite':
+            return [fil for fil in server.filters.values() if fil['favourite']],
+        if path == '/rest/api/2/filter/search':
+            name = query.get('filterName', [''])[0]
+            return self.page([fil for fil in server.filters.values() if name in fil['name']],
+                             query)
+        if path == '/rest/agile/1.0/board':
+            name = query.get('name', [''])[0]
+            return self.page([board for board in server.boards.values() if name in board['name']],
+                             query)
+        if path.startswith('/rest/agile/1.0/board/') and path.endswith('/sprint'):
+            board_id = int(path.split('/')[-2])
+            return self.page([sprint for sprint in server.sprints.values()
+                              if sprint['originBoardId'] == board_id], query)
+        if path == '/rest/api/2/search':
+            issues = [{'id': key.split('-')[1], 'key': key, 'fields': fields}
+                      for key, fields in server.issues.items()]
+            start = int(query.get('startAt', ['0'])[0])
+            size = int(query.get('maxResults', ['50'])[0])
+            return {'startAt': start, 'maxResults': size, 'total': len(issues),
+                    'issues': issues[start:start + size]},
+        if path.startswith('/rest/api/2/issue/'):
+            key = path.rsplit('/', 1)[1]
+            return {'id': key.split('-')[1], 'key': key, 'self': server.url + path,
+                    'fields': server.issues[key]},
+        if path == '/rest/api/2/field':
+            return [],
+        return {},
+
+    @staticmethod
+    def page(values, query):
+        """ Build one page of an agile listing.
+        :param list values : every result
+        :param dict query : query of the request
+        :return tuple answer: the page
+        """
+        start = int(query.get('startAt', ['0'])[0])
+        size = int(query.get('maxResults', ['50'])[0])
+        return {'startAt': start, 'maxResults': size, 'total': len(values),
+                'values': values[start:start + size],
+                'isLast': start + size >= len(values)},
+
+    def post_answer(self, path, query, body):
+        server = self.server
+        if path == '/rest/api/2/filter':
+            fil = dict(body, id=str(server.next_id()))
+            server.filters[fil['id']] = fil
+            return fil,
+        if path == '/rest/agile/1.0/board':
+            board = dict(body, id=server.next_id())
+            server.boards[board['id']] = board
+            return board,
+        if path == '/rest/agile/1.0/sprint':
+            sprint = dict(body, id=server.next_id(), state='future')
+            server.sprints[sprint['id']] = sprint
+            return sprint,
+        if path.startswith('/rest/agile/1.0/sprint/') and path.endswith('/swap'):
+            server.swaps.append((int(path.split('/')[-2]), body['sprintToSwapWith']))
+            return None, 204
+        if path.startswith('/rest/agile/1.0/sprint/') and path.endswith('/issue'):
+            return None, 204
+        if path == '/rest/api/2/issue/bulk':
+            created = []
+            for update in body['issueUpdates']:
+                issue_id = server.next_id()
+                issue = {'id': str(issue_id), 'key': f"ISSUE-{issue_id}"}
+                server.issues[issue['key']] = update['fields']
+                created.append(issue)
+            return {'issues': created, 'errors': []}, 201
+        if path == '/rest/api/2/issue':
+            issue_id = server.next_id()
+            issue = {'id': str(issue_id), 'key': f"ISSUE-{issue_id}"}
+            server.issues[issue['key']] = body['fields']
+            return issue, 201
+        return None, 204
+
+    def put_answer(self, path, query, body):
+        server = self.server
+        if path.startswith('/rest/api/2/filter/'):
+            fil = server.filters.setdefault(path.rsplit('/', 1)[1], {'id': path.rsplit('/', 1)[1]})
+            fil.update(body)
+            return fil,
+        return body,
@@ -0,0 +1,227 @@
+"""
+Tests that the lazy calender gives the same sprints as the eager
+build_calender it replaced, which is kept here as the reference.
+"""
+# Build In Modules
+import json
+from datetime import datetime, timedelta
+
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+import SPU.main as m
+from SPU.calender import (Calender, CalenderCache, CalenderIndex, build_quarter_string,
+                          build_sprint, parse_date)
+
+# (global start, team start, sprint length) at and inside the start windows
+CALENDERS = [
+    ('01-01-19', '01-01-19', 2),
+    ('01-01-19', '12-25-18', 2),
+    ('01-01-19', '01-08-19', 2),
+    ('12-30-19', '01-03-20', 2),
+    ('01-01-19', '01-01-19', 3),
+    ('01-01-19', '12-22-18', 3),
+    ('01-01-19', '01-11-19', 3),
+    ('01-04-21', '12-28-20', 3),
+]
+
+
+def old_calender(global_start, start_date, sprint_length):
+    """ build_calender as it was before the lazy calender, with its two
+    near-duplicate branches folded into one. """
+    global_start_datetime = datetime.strptime(global_start, '%m-%d-%y')
+    current_datetime = datetime.strptime(start_date, '%m-%d-%y')
+    window = {2: timedelta(weeks=1), 3: timedelta(days=10)}[sprint_length]
+    if not global_start_datetime - window <= current_datetime <= global_start_datetime + window:
+        raise ValueError
+    current_year = current_datetime.year - 2000
+    calender = {}
+    index = 1
+    for year in range(1, 10):
+        for quarter in range(1, 5):
+            quarter_calender = []
+            for sprint_index in range(1, 12 // sprint_length + 1):
+                # 2 week sprints count the year in the loop, 3 week ones
+                # take it from the sprint's start date
+                sprint_year = current_year if sprint_length == 2 else current_datetime.year - 2000
+                quarter_calender.append(dict(
+                    index=sprint_index,
+                    quarter=quarter,
+                    start_date=current_datetime,
+                    # Both branches ended every sprint two weeks in
+                    end_date=current_datetime + timedelta(weeks=2),
+                    sprint_string=build_sprint(sprint_year, quarter, sprint_length, sprint_index),
+                    quarter_string=build_quarter_string(current_datetime.year - 2000, quarter),
+                ))
+                current_datetime += timedelta(weeks=sprint_length)
+            calender[index] = quarter_calender
+            index += 1
+            # Adding 13th week every quarter
+            current_datetime += timedelta(weeks=1)
+        current_year += 1
+    return calender
+
+
+def expected_calender(global_start, start_date, sprint_length):
+    """ The old calender with the one intended change: a 3 week sprint now
+    ends three weeks after it starts rather than two. """
+    calender = old_calender(global_start, start_date, sprint_length)
+    for sprints in calender.values():
+        for sprint in sprints:
+            assert sprint['end_date'] == sprint['start_date'] + timedelta(weeks=2)
+            sprint['end_date'] = sprint['start_date'] + timedelta(weeks=sprint_length)
+    return calender
+
+
+@pytest.mark.parametrize('global_start, start_date, sprint_length', CALENDERS)
+def test_calender_matches_the_old_build_calender(global_start, start_date, sprint_length):
+    expected = expected_calender(global_start, start_date, sprint_length)
+    calender = Calender(global_start, start_date, sprint_length).as_dict()
+
+    assert list(calender) == list(expected)
+    for index, sprints in expected.items():
+        assert [sprint.as_dict() for sprint in calender[index]] == sprints
+        # Sprints still read like the old dicts
+        assert calender[index] == sprints
+        assert calender[index][0]['quarter_string'] == sprints[0]['quarter_string']
+
+
+@pytest.mark.parametrize('global_start, start_date, sprint_length', CALENDERS)
+def test_quarters_are_found_like_the_old_scans(global_start, start_date, sprint_length):
+    expected = expected_calender(global_start, start_date, sprint_length)
+    calender = Calender(global_start, start_date, sprint_length)
+
+    # run_for_quarter took the first quarter carrying the label
+    for quarter_string in {sprints[0]['quarter_string'] for sprints in expected.values()}:
+        index = next(index for index, sprints in expected.items()
+                     if sprints[0]['quarter_string'] == quarter_string)
+        assert calender.find_quarter(quarter_string) == (index, expected[index])
+
+    # validate_calender took the first quarter starting after today
+    first = expected[1][0]['start_date']
+    for day in range(-20, 8 * 365, 5):
+        after = first + timedelta(days=day)
+        index = next(index for index, sprints in expected.items()
+                     if sprints[0]['start_date'] > after)
+        assert calender.next_quarter(after) == (index, expected[index])
+
+
+def test_out_of_window_start_dates_are_refused():
+    for start_date, sprint_length in (('12-24-18', 2), ('01-09-19', 2),
+                                      ('12-21-18', 3), ('01-12-19', 3)):
+        with pytest.raises(ValueError):
+            old_calender('01-01-19', start_date, sprint_length)
+        with pytest.raises(ValueError):
+            Calender('01-01-19', start_date, sprint_length)
+
+
+def test_shared_calenders_match_their_own():
+    cache = CalenderCache()
+    shared = cache.get('01-01-19', '01-1-19', 2)
+    assert cache.get('01-01-19', '01-01-19', 2) is shared
+    assert shared.as_dict() == expected_calender('01-01-19', '01-01-19', 2)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+
+
+def old_locate(calender, date):
+    """ Where a date falls in an old calender, by scanning every sprint.
+    :return tuple location: (quarter_string, sprint_string or None) or None """
+    location = None
+    for sprints in calender.values():
+        if sprints[0]['start_date'] > date:
+            break
+        location = sprints[0]['quarter_string'], None
+        for sprint in sprints:
+            if sprint['start_date'] <= date < sprint['end_date']:
+                location = sprints[0]['quarter_string'], sprint['sprint_string']
+    return location
+
+
+def index_config():
+    """ Config with a team for every calender, two teams sharing each. """
+    return {'SPU': {'operational_q1_start': '01-01-19', 'teams': {
+        f"Team {n}{copy}": {'sprint_start_date': start_date, 'sprint_length': sprint_length}
+        for n, (global_start, start_date, sprint_length) in enumerate(CALENDERS)
+        if global_start == '01-01-19'
+        for copy in 'ab'}}}
+
+
+def team_calenders(config):
+    """ The expected calender of every team in a config. """
+    return {team: expected_calender(config['SPU']['operational_q1_start'],
+                                    value['sprint_start_date'], value['sprint_length'])
+            for team, value in config['SPU']['teams'].items()}
+
+
+def expected_locations(calenders, date):
+    locations = []
+    for team, calender in calenders.items():
+        location = old_locate(calender, date)
+        if location is not None:
+            locations.append({'team': team, 'quarter_string': location[0],
+                              'sprint_string': location[1]})
+    return sorted(locations, key=lambda location: location['team'])
+
+
+@pytest.mark.parametrize('global_start, start_date, sprint_length', CALENDERS)
+def test_locate_matches_a_scan_of_the_old_calender(global_start, start_date, sprint_length):
+    expected = expected_calender(global_start, start_date, sprint_length)
+    calender = Calender(global_start, start_date, sprint_length)
+    first = expected[1][0]['start_date']
+    for day in range(-3, 9 * 364, 2):
+        date = first + timedelta(days=day)
+        location = calender.locate(date)
+        if location is not None:
+            index, sprint = location
+            location = (calender.quarter(index).quarter_string,
+                        sprint.sprint_string if sprint else None)
+        assert location == old_locate(expected, date), date
+
+
+def test_index_matches_a_scan_of_the_old_calenders():
+    config = index_config()
+    index = CalenderIndex(config)
+    calenders = team_calenders(config)
+    # The old calenders end 9 years after the earliest team start, 12-22-18
+    for day in range(-12, 9 * 364 - 10, 3):
+        date = datetime(2019, 1, 1) + timedelta(days=day)
+        assert sorted(index.at(date), key=lambda location: location['team']) == \
+            expected_locations(calenders, date), date
+
+    # Past the indexed years the index works the dates out instead
+    short = CalenderIndex(config, years=1)
+    for day in range(0, 3 * 364, 5):
+        date = datetime(2019, 1, 1) + timedelta(days=day)
+        assert short.at(date) == index.at(date)
+
+
+def test_index_lists_the_first_quarter_carrying_a_label():
+    config = index_config()
+    index = CalenderIndex(config)
+    for quarter_string in ('Y19-Q1', 'Y20-Q4', 'Y24-Q2', 'Y27-Q3'):
+        expected = {}
+        for team, calender in team_calenders(config).items():
+            sprints = next(sprints for sprints in calender.values()
+                           if sprints[0]['quarter_string'] == quarter_string)
+            expected[team] = [sprint['sprint_string'] for sprint in sprints]
+        assert index.sprints(quarter_string) == expected
+
+
+@pytest.mark.parametrize('date', ['12-20-18', '01-01-19', '01-14-19', '03-25-19',
+                                  '04-01-19', '12-31-19', '06-15-23'])
+def test_lookup_prints_the_old_calender_locations(capsys, date):
+    config = index_config()
+    m.lookup(config, date)
+    printed = json.loads(capsys.readouterr().out)
+    assert sorted(printed, key=lambda location: location['team']) == \
+        expected_locations(team_calenders(config), parse_date(date))
+
+
+def test_lookup_prints_the_sprints_of_a_quarter(capsys):
+    config = index_config()
+    m.lookup(config, quarter_string='Y20-Q2')
+    printed = json.loads(capsys.readouterr().out)
+    assert printed == CalenderIndex(config).sprints('Y20-Q2')
+    assert printed['Team 0a'] == [f"Y20-Q2-L2-S{n}" for n in range(1, 7)]
+    assert printed['Team 4a'] == [f"Y20-Q2-L3-S{n}" for n in range(1, 5)]
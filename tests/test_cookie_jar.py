@@ -0,0 +1,98 @@
+"""
+Tests of the step-auth cookie jar: cookies are negotiated once, reused by
+later clients and negotiated again when JIRA turns them down with a 401.
+"""
+# Build In Modules
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+import SPU.downstream as d
+from SPU.cookie_jar import StepAuthCookies
+from SPU.jira_client import JiraClient
+
+
+@pytest.fixture(autouse=True)
+def step_auth(jira, monkeypatch):
+    """ Put the stand-in server behind a step-auth site. It takes the place
+    of the kerberos one, so no kerberos auth object is needed to reach it. """
+    jira.require_step_auth()
+    monkeypatch.setattr(JiraClient, 'get_auth_object', lambda self: None)
+
+
+def kerberos_client(jira, path):
+    """ A kerberos rest API client keeping its cookies in a jar at path. """
+    jar = StepAuthCookies(str(path))
+    return JiraClient(jira.url, 'kerberos', cookie_jar=jar), jar
+
+
+def test_cookies_are_negotiated_once_and_reused(jira, tmp_path):
+    client, jar = kerberos_client(jira, tmp_path / 'cookies.json')
+    client.get_project('A')
+    client.get_project('B')
+    assert jira.negotiations == 1
+    assert os.stat(tmp_path / 'cookies.json').st_mode & 0o777 == 0o600
+
+    # A later run reads the cookies from disk rather than negotiating
+    client, jar = kerberos_client(jira, tmp_path / 'cookies.json')
+    assert client.get_project('A')['key'] == 'A'
+    assert jira.negotiations == 1
+    assert (jar.negotiated, jar.reused) == (0, 1)
+
+
+def test_a_rejected_cookie_is_negotiated_again(jira, tmp_path):
+    client, jar = kerberos_client(jira, tmp_path / 'cookies.json')
+    client.get_project('A')
+    jira.expire_step_auth()
+
+    # The 401 is answered by negotiating and sending the request once more
+    assert client.get_project('B')['key'] == 'B'
+    assert jira.negotiations == 2
+    assert [call[1] for call in jira.calls[-3:]] == [
+        '/rest/api/2/project/B', '/step-auth-gss', '/rest/api/2/project/B']
+
+    # The new cookie replaced the rejected one on disk
+    with open(tmp_path / 'cookies.json') as f:
+        entry = json.load(f)[jira.url]
+    assert [cookie['value'] for cookie in entry['cookies']] == ['session-2']
+
+
+def test_concurrent_401s_negotiate_once(jira, tmp_path):
+    client, jar = kerberos_client(jira, tmp_path / 'cookies.json')
+    client.get_project('A')
+    jira.expire_step_auth()
+    jira.delay = 0.05
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        projects = list(pool.map(client.get_project, 'ABCDEFGH'))
+    assert [project['key'] for project in projects] == list('ABCDEFGH')
+    assert jira.negotiations == 2
+
+
+def test_the_jira_client_shares_the_refreshed_cookies(jira, config, tmp_path):
+    instance = config['SPU']['jira']['stub']
+    del instance['basic_auth']
+    instance['kerberos'] = True
+    config['SPU']['cookie_jar'] = str(tmp_path / 'cookies.json')
+    client = d.build_jira_client('stub', config)
+    assert client.project('A').key == 'A'
+    jira.expire_step_auth()
+
+    # The jira.client.JIRA session negotiates through the rest API client
+    assert client.project('B').key == 'B'
+    assert d.get_rest_api_client('stub', config).get_project('A')['key'] == 'A'
+    assert jira.negotiations == 2
+
+
+def test_an_unreadable_jar_is_ignored(tmp_path):
+    path = tmp_path / 'cookies.json'
+    path.write_text('{"https://jira": {"cookies": [{"name": "step"}]}}')
+    assert StepAuthCookies(str(path)).entries == {}
+
+    path.write_text('not json')
+    jar = StepAuthCookies(str(path))
+    assert jar.get('https://jira') is None
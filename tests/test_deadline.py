@@ -0,0 +1,67 @@
+# Build In Modules
+import time
+
+# 3rd Party Modules
+import pytest
+import requests
+
+# Local Modules
+from SPU.deadline import MIN_TIMEOUT, Deadline, DeadlineExceeded
+from SPU.jira_client import JiraClient
+import SPU.main as m
+from SPU.scheduler import RequestScheduler
+
+
+def scheduled_client(jira):
+    """ A rest API client whose requests go through a scheduler. """
+    return JiraClient(jira.url, 'basic', 'user', 'password',
+                      scheduler=RequestScheduler('stub', max_retries=3))
+
+
+def test_clamp_keeps_requests_inside_the_deadline():
+    assert Deadline().clamp((5, 30)) == (5, 30)
+
+    deadline = Deadline(60).child(2)
+    connect, read = deadline.clamp((5, None))
+    assert 1.5 < connect <= 2 and 1.5 < read <= 2
+    assert deadline.clamp(1) == 1
+
+    deadline = Deadline(-1)
+    assert deadline.clamp(None) == MIN_TIMEOUT
+    with pytest.raises(DeadlineExceeded):
+        deadline.check('syncing')
+
+
+def test_a_slow_request_is_cut_short_at_the_deadline(jira):
+    client = scheduled_client(jira)
+    jira.delay = 2
+
+    start = time.monotonic()
+    with Deadline(0.3).active():
+        with pytest.raises(requests.Timeout):
+            client.get_project('A')
+    assert time.monotonic() - start < 1.5
+
+
+def test_a_retry_past_the_deadline_is_given_up(jira):
+    client = scheduled_client(jira)
+    jira.fail('GET', '/rest/api/2/project/A', 429, headers={'Retry-After': '30'})
+
+    start = time.monotonic()
+    with Deadline(2).active():
+        with pytest.raises(DeadlineExceeded):
+            client.get_project('A')
+    assert time.monotonic() - start < 1
+
+
+def test_work_past_the_run_deadline_is_deferred_and_resumed(jira, config, cargs):
+    cargs.run_deadline = 0.0001
+    # Both global boards and both teams are deferred, nothing is written
+    assert m.run(config, cargs, no_prompt=True) == 4
+    assert not jira.made('POST') and not jira.made('PUT')
+
+    cargs.run_deadline = None
+    cargs.resume = True
+    assert m.run(config, cargs, no_prompt=True) == 0
+    assert len(jira.boards) == 10
+    assert len(jira.issues) == 2
@@ -0,0 +1,98 @@
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+import SPU.downstream as d
+from SPU.global_filters import GlobalFilterIndex, GlobalFilterUpdates
+from SPU.journal import Journal
+import SPU.jql as jql
+import SPU.main as m
+
+
+def quarter_shards(jira, title, quarter_string):
+    """ Projects of every global filter shard of a quarter, by filter name. """
+    prefix = f"{title} stub - {quarter_string}"
+    return {fil['name']: jql.parse_projects(fil['jql']) for fil in jira.filters.values()
+            if fil['name'].startswith(prefix)}
+
+
+def test_assign_shards_respects_the_cap():
+    shards = jql.assign_shards([{'A', 'B'}, {'C'}], ['B', 'D', 'E', 'F'], 2)
+
+    assert shards == [{'A', 'B'}, {'C', 'D'}, {'E', 'F'}]
+
+
+@pytest.mark.parametrize('reconcile', [False, True])
+def test_each_project_joins_one_shard(jira, config, cargs, reconcile):
+    config['SPU']['global_board_max_projects'] = 2
+    config['SPU']['teams']['Team C'] = dict(config['SPU']['teams']['Team A'], jira_project='C')
+    cargs.reconcile = reconcile
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    for title in ('Global', 'Global Bad'):
+        shards = quarter_shards(jira, title, 'Y26-Q1')
+        assert sorted(shards) == [f"{title} stub - Y26-Q1 (2) filter",
+                                  f"{title} stub - Y26-Q1 filter"]
+        assert all(len(projects) <= 2 for projects in shards.values())
+        assert sorted(project for projects in shards.values() for project in projects) == \
+            ['A', 'B', 'C']
+        # The new shard gets a board of its own
+        assert any(board['name'] == f"{title} stub - Y26-Q1 (2) Board"
+                   for board in jira.boards.values())
+
+
+def test_immediate_updates_start_a_shard_when_full(jira, config):
+    config['SPU']['global_board_max_projects'] = 1
+    rest_api_client = d.get_rest_api_client('stub', config)
+    first = rest_api_client.create_filter('Global stub - Y26-Q1 filter',
+                                          jql.global_jql('Y26-Q1', ['A']), favorite=True)
+    global_filters = GlobalFilterIndex()
+    global_filters.add('stub', [first])
+
+    for project in ('A', 'B', 'B'):
+        d.add_to_global_filters(config, 'stub', global_filters, 'Y26-Q1', project,
+                                rest_api_client)
+
+    assert quarter_shards(jira, 'Global', 'Y26-Q1') == {
+        'Global stub - Y26-Q1 filter': {'A'},
+        'Global stub - Y26-Q1 (2) filter': {'B'},
+    }
+    assert not jira.made('PUT')
+    assert [shard['name'] for shard in global_filters.get('stub', 'Y26-Q1')] == \
+        ['Global stub - Y26-Q1 filter', 'Global stub - Y26-Q1 (2) filter']
+
+
+def test_a_failed_global_filter_is_counted_and_resumed(jira, config, cargs):
+    m.run(config, cargs, no_prompt=True)
+    config['SPU']['teams']['Team C'] = dict(config['SPU']['teams']['Team A'], jira_project='C')
+    good = next(fil for fil in jira.filters.values()
+                if fil['name'] == 'Global stub - Y26-Q1 filter')
+    jira.fail('PUT', f"/rest/api/2/filter/{good['id']}", 500, times=3)
+
+    # The bad board's filter and Team C's issue are still written
+    assert m.run(config, cargs, no_prompt=True) == 1
+    assert 'C' in quarter_shards(jira, 'Global Bad', 'Y26-Q1')['Global Bad stub - Y26-Q1 filter']
+    assert 'C' not in jql.parse_projects(good['jql'])
+    assert sum(fields['project'] == {'key': 'C'} for fields in jira.issues.values()) == 1
+
+    cargs.resume = True
+    assert m.run(config, cargs, no_prompt=True) == 0
+    assert jql.parse_projects(good['jql']) == {'A', 'B', 'C'}
+
+
+def test_flush_keeps_failed_quarters_queued(jira, config, tmp_path):
+    rest_api_client = d.get_rest_api_client('stub', config)
+    good = rest_api_client.create_filter('Global stub - Y26-Q1 filter',
+                                         jql.global_jql('Y26-Q1'), favorite=True)
+    updates = GlobalFilterUpdates()
+    updates.add('stub', good, 'Y26-Q1', 'A')
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+    jira.fail('PUT', f"/rest/api/2/filter/{good['id']}", 400)
+
+    assert updates.flush(config, journal=journal) == 0
+    assert len(updates.failed) == 1 and updates.pending
+
+    assert updates.flush(config, journal=journal) == 1
+    assert not updates.pending
+    assert journal.get('Global stub - Y26-Q1', 'Y26-Q1', 'update_filter') == \
+        {'id': good['id'], 'jql': jql.global_jql('Y26-Q1', ['A'])}
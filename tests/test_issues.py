@@ -0,0 +1,75 @@
+# Local Modules
+import SPU.downstream as d
+from SPU.issues import IssueBatch, chunks
+from SPU.journal import Journal
+import SPU.main as m
+
+
+def queue(batch, teams, sprint_id=None):
+    """ Queue the Y26-Q1 quarter issue of some teams. """
+    for name in teams:
+        batch.add('stub', name, 'Y26-Q1', d.quarter_issue_fields(1, 'Y26-Q1', name),
+                  sprint_id=sprint_id)
+
+
+def test_chunks_keep_order():
+    assert chunks(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert chunks([], 2) == []
+
+
+def test_issues_are_created_in_bulk_chunks(jira, config):
+    config['SPU']['issue_bulk_size'] = 2
+    batch = IssueBatch()
+    queue(batch, ['A', 'B', 'C'], sprint_id=7)
+    queue(batch, ['D', 'E'], sprint_id=8)
+
+    created = batch.flush(config)
+
+    bulk = jira.made('POST', '/rest/api/2/issue/bulk')
+    assert sorted(len(body['issueUpdates']) for _, _, body in bulk) == [1, 2, 2]
+    assert not jira.made('POST', '/rest/api/2/issue')
+    assert len(created) == 5 and not batch.failed
+    # The keys are mapped back to the team that queued each issue
+    for (_, name, _), key in created.items():
+        assert jira.issues[key]['project'] == {'key': name}
+    # One move per sprint
+    moves = {path: body['issues'] for _, path, body in jira.made('POST')
+             if path.startswith('/rest/agile/1.0/sprint/')}
+    assert sorted(moves) == ['/rest/agile/1.0/sprint/7/issue', '/rest/agile/1.0/sprint/8/issue']
+    assert sorted(moves['/rest/agile/1.0/sprint/8/issue']) == \
+        sorted(created[('stub', name, 'Y26-Q1')] for name in ('D', 'E'))
+
+
+def test_a_failed_chunk_only_fails_its_own_issues(jira, config):
+    config['SPU']['issue_bulk_size'] = 2
+    config['SPU']['jira']['stub']['max_in_flight'] = 1
+    jira.fail('POST', '/rest/api/2/issue/bulk', 400)
+    batch = IssueBatch()
+    queue(batch, ['A', 'B', 'C'])
+
+    created = batch.flush(config)
+
+    assert sorted(issue['name'] for issue in batch.failed) == ['A', 'B']
+    assert list(created) == [('stub', 'C', 'Y26-Q1')]
+
+
+def test_journaled_issues_are_not_created_again(jira, config, tmp_path):
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+    journal.record('A', 'Y26-Q1', 'create_issue', {'id': '1', 'key': 'ISSUE-1'})
+    batch = IssueBatch()
+    queue(batch, ['A', 'B'])
+
+    created = batch.flush(config, journal=journal)
+
+    bulk = jira.made('POST', '/rest/api/2/issue/bulk')
+    assert [len(body['issueUpdates']) for _, _, body in bulk] == [1]
+    assert created[('stub', 'A', 'Y26-Q1')] == 'ISSUE-1'
+    assert journal.get('B', 'Y26-Q1', 'create_issue')['key'] == created[('stub', 'B', 'Y26-Q1')]
+
+
+def test_a_batched_run_never_builds_the_jira_client(jira, config, cargs):
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    assert len(jira.issues) == 2
+    # jira.client.JIRA asks for the server info when it is built
+    assert not [path for _, path, _ in jira.made('GET') if path.endswith('/serverInfo')]
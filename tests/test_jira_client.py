@@ -0,0 +1,83 @@
+# Build In Modules
+import asyncio
+import threading
+
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+from SPU.jira_client import AsyncJiraClient, JiraClient
+
+
+def test_async_client_runs_calls_on_executor_threads(jira):
+    client = JiraClient(jira.url, 'basic', 'user', 'password')
+    async_client = AsyncJiraClient(client, max_in_flight=3)
+    threads = set()
+    send = client.session.send
+
+    def record_thread(*args, **kwargs):
+        threads.add(threading.current_thread())
+        return send(*args, **kwargs)
+    client.session.send = record_thread
+
+    async def create():
+        return await asyncio.gather(*(async_client.create_filter(f"Filter {n}", 'project = A')
+                                      for n in range(6)))
+    created = asyncio.run(create())
+
+    assert [fil['name'] for fil in created] == [f"Filter {n}" for n in range(6)]
+    assert len(jira.made('POST', '/rest/api/2/filter')) == 6
+    assert threading.main_thread() not in threads
+
+
+def test_async_client_bounds_requests_in_flight(jira):
+    jira.delay = 0.05
+    client = JiraClient(jira.url, 'basic', 'user', 'password', pool_size=8)
+    async_client = AsyncJiraClient(client, max_in_flight=2)
+
+    async def create():
+        await asyncio.gather(*(async_client.create_sprint(f"Sprint {n}", 1)
+                               for n in range(8)))
+    asyncio.run(create())
+
+    assert len(jira.sprints) == 8
+    assert jira.most_in_flight == 2
+
+
+def page_starts(jira, path):
+    return [int(query['startAt'][0]) for method, call_path, query in jira.queries
+            if method == 'GET' and call_path == path]
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+@pytest.mark.parametrize('count, starts', [(7, [0, 3, 6]), (6, [0, 3]), (0, [0])])
+def test_boards_are_paged_until_the_last_page(jira, prefetch, count, starts):
+    client = JiraClient(jira.url, 'basic', 'user', 'password')
+    for board_id in range(1, count + 1):
+        jira.boards[board_id] = {'id': board_id, 'name': f"Board {board_id}"}
+
+    boards = list(client.iter_boards(page_size=3, prefetch=prefetch))
+    assert [board['id'] for board in boards] == list(range(1, count + 1))
+    assert page_starts(jira, '/rest/agile/1.0/board') == starts
+
+
+@pytest.mark.parametrize('count, starts', [(5, [0, 2, 4]), (4, [0, 2])])
+def test_searches_are_paged_until_the_total(jira, count, starts):
+    client = JiraClient(jira.url, 'basic', 'user', 'password')
+    for issue_id in range(1, count + 1):
+        jira.issues[f"A-{issue_id}"] = {'summary': f"Issue {issue_id}"}
+
+    issues = list(client.iter_search('project = A', page_size=2))
+    assert [issue['key'] for issue in issues] == [f"A-{n}" for n in range(1, count + 1)]
+    assert page_starts(jira, '/rest/api/2/search') == starts
+
+
+def test_stopping_early_asks_for_no_more_pages(jira):
+    client = JiraClient(jira.url, 'basic', 'user', 'password')
+    for board_id in range(1, 8):
+        jira.boards[board_id] = {'id': board_id, 'name': f"Board {board_id}"}
+
+    boards = client.iter_boards(page_size=3)
+    assert [next(boards)['id'] for _ in range(4)] == [1, 2, 3, 4]
+    boards.close()
+    assert page_starts(jira, '/rest/agile/1.0/board') == [0, 3]
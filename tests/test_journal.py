@@ -0,0 +1,56 @@
+# Build In Modules
+from collections import Counter
+
+# 3rd Party Modules
+import pytest
+import requests
+
+# Local Modules
+from SPU.journal import Journal
+import SPU.main as m
+
+
+def test_journal_replays_completed_writes(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path)
+    journal.record('Team A', 'Y26-Q1', 'create_filter', {'id': '1', 'name': 'A filter'})
+    with open(path, 'a') as f:
+        f.write('{"team": "Team A", "quar')
+
+    resumed = Journal(path, resume=True)
+
+    assert resumed.get('Team A', 'Y26-Q1', 'create_filter') == {'id': '1', 'name': 'A filter'}
+    assert resumed.get('Team A', 'Y26-Q1', 'create_board') is None
+    assert resumed.teams == {'Team A'}
+    assert Journal(path).get('Team A', 'Y26-Q1', 'create_filter') is None
+
+
+def test_resume_finishes_a_failed_run_without_duplicates(jira, config, cargs):
+    # A sprint fails, stopping the run with a board that lacks a sprint
+    jira.fail('POST', '/rest/agile/1.0/sprint', 500, times=1)
+    with pytest.raises(requests.HTTPError):
+        m.run(config, cargs, no_prompt=True)
+    first_board = {board['name']: board_id for board_id, board in jira.boards.items()}
+    assert 'Y26-Q1 - Team A Board' in first_board
+    assert 'Y26-Q1 - Team B Board' not in first_board
+
+    cargs.resume = True
+    jira.calls.clear()
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    # Only the failed sprint and the team that never started are written
+    assert [body['name'] for _, _, body in jira.made('POST', '/rest/api/2/filter')] == \
+        ['Y26-Q1 - B filter']
+    assert [body['name'] for _, _, body in jira.made('POST', '/rest/agile/1.0/board')] == \
+        ['Y26-Q1 - Team B Board']
+    team_a = first_board['Y26-Q1 - Team A Board']
+    assert len([body for _, _, body in jira.made('POST', '/rest/agile/1.0/sprint')
+                if body['originBoardId'] == team_a]) == 1
+    for counts in (Counter(fil['name'] for fil in jira.filters.values()),
+                   Counter(board['name'] for board in jira.boards.values())):
+        assert max(counts.values()) == 1
+    for board_id in jira.boards:
+        sprints = Counter(sprint['name'] for sprint in jira.sprints.values()
+                          if sprint['originBoardId'] == board_id)
+        assert not sprints or max(sprints.values()) == 1
+    assert len(jira.issues) == 2
@@ -0,0 +1,65 @@
+# Local Modules
+import SPU.downstream as d
+from SPU.jira_client import JiraClient
+from SPU.metadata_cache import MetadataCache
+
+
+def cached_client(jira, path, **kwargs):
+    """ A rest API client with a metadata cache at path. """
+    cache = MetadataCache(str(path), **kwargs)
+    return JiraClient(jira.url, 'basic', 'user', 'password', metadata_cache=cache), cache
+
+
+def project_reads(jira):
+    return len(jira.made('GET', '/rest/api/2/project/A'))
+
+
+def test_fresh_entries_are_answered_from_disk(jira, tmp_path):
+    client, cache = cached_client(jira, tmp_path / 'cache.sqlite')
+    assert client.get_project('A')['key'] == 'A'
+    cache.close()
+
+    # A later run reads the project from disk without asking JIRA
+    client, cache = cached_client(jira, tmp_path / 'cache.sqlite')
+    assert client.get_project('A')['key'] == 'A'
+    assert project_reads(jira) == 1
+    assert (cache.hits, cache.revalidated, cache.misses) == (1, 0, 0)
+
+
+def test_stale_entries_are_revalidated_with_their_etag(jira, tmp_path):
+    client, cache = cached_client(jira, tmp_path / 'cache.sqlite', ttls={'boards': 0})
+    jira.boards[1] = {'id': 1, 'name': 'Board'}
+    assert [board['name'] for board in client.iter_boards()] == ['Board']
+
+    # Unchanged, so JIRA answers 304 and the cached page is used
+    assert [board['name'] for board in client.iter_boards()] == ['Board']
+    assert jira.not_modified == 1
+
+    # Changed, so the new page replaces the cached one
+    jira.boards[2] = {'id': 2, 'name': 'Other board'}
+    assert [board['name'] for board in client.iter_boards()] == ['Board', 'Other board']
+    assert jira.not_modified == 1
+    assert (cache.hits, cache.revalidated, cache.misses) == (0, 1, 2)
+
+
+def test_writes_invalidate_their_entity(jira, tmp_path):
+    client, cache = cached_client(jira, tmp_path / 'cache.sqlite')
+    assert list(client.iter_boards()) == []
+    client.create_board('Board', 'A', 1)
+
+    assert [board['name'] for board in client.iter_boards()] == ['Board']
+    assert len(jira.made('GET', '/rest/agile/1.0/board')) == 2
+
+
+def test_refresh_ignores_the_cache(jira, config, tmp_path):
+    config['SPU']['metadata_cache'] = str(tmp_path / 'cache.sqlite')
+    d.open_metadata_cache(config)
+    d.get_rest_api_client('stub', config).get_project('A')
+    d.close_rest_api_clients()
+
+    d.open_metadata_cache(config, refresh=True)
+    d.get_rest_api_client('stub', config).get_project('A')
+
+    assert project_reads(jira) == 2
+    # Nothing was sent for JIRA to revalidate
+    assert jira.not_modified == 0
@@ -0,0 +1,36 @@
+# Local Modules
+import SPU.downstream as d
+import SPU.main as m
+
+
+def test_find_board_matches_the_exact_name(jira, config):
+    rest_api_client = d.get_rest_api_client('stub', config)
+    jira.boards[1] = {'id': 1, 'name': 'Y26-Q1 - Team A Board (old)'}
+    assert d.find_board(rest_api_client, 'Y26-Q1 - Team A Board') is None
+
+    jira.boards[2] = {'id': 2, 'name': 'Y26-Q1 - Team A Board'}
+    assert d.find_board(rest_api_client, 'Y26-Q1 - Team A Board') == 2
+    assert all(query['name'] == ['Y26-Q1 - Team A Board']
+               for _, path, query in jira.queries if path == '/rest/agile/1.0/board')
+
+
+def test_targeted_lookups_only_ask_for_the_boards_and_filters_by_name(jira, config, cargs):
+    cargs.targeted_lookups = True
+    assert m.run(config, cargs, no_prompt=True) == 0
+    # Boards and filters nobody expects are never listed
+    jira.boards[1] = {'id': 1, 'name': 'Someone else\'s board'}
+
+    jira.calls.clear()
+    jira.queries.clear()
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    assert not jira.made('POST') and not jira.made('PUT')
+    lookups = [(path, query) for method, path, query in jira.queries if method == 'GET']
+    assert not [path for path, _ in lookups if path == '/rest/api/2/filter/favourite']
+    boards = [query['name'][0] for path, query in lookups if path == '/rest/agile/1.0/board']
+    assert sorted(boards) == sorted(
+        [f"Global stub - Y26-Q{quarter} Board" for quarter in range(1, 5)] +
+        [f"Global Bad stub - Y26-Q{quarter} Board" for quarter in range(1, 5)] +
+        ['Y26-Q1 - Team A Board', 'Y26-Q1 - Team B Board'])
+    assert [query['filterName'] for path, query in lookups
+            if path == '/rest/api/2/filter/search'] == [['stub - ']]
@@ -0,0 +1,46 @@
+# Local Modules
+import SPU.main as m
+import SPU.reconcile as r
+
+
+def test_reconcile_creates_everything_once(jira, config, cargs):
+    cargs.reconcile = True
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    boards = sorted(board['name'] for board in jira.boards.values())
+    assert 'Y26-Q1 - Team A Board' in boards
+    assert 'Y26-Q1 - Team B Board' in boards
+    assert len(boards) == len(set(boards))
+    assert len(jira.issues) == 2
+
+
+def test_reconcile_plans_nothing_when_up_to_date(jira, config, cargs, tmp_path):
+    cargs.reconcile = True
+    m.run(config, cargs, no_prompt=True)
+
+    cargs.plan_out = str(tmp_path / 'plan.json')
+    jira.calls.clear()
+    m.run(config, cargs, no_prompt=True)
+
+    assert r.load_plan(cargs.plan_out) == []
+    assert not jira.made('POST') and not jira.made('PUT')
+
+
+def test_reconcile_plans_only_the_missing_writes(jira, config, cargs, tmp_path):
+    cargs.reconcile = True
+    m.run(config, cargs, no_prompt=True)
+    # Lose one sprint of Team A, as a run that died partway would
+    board_id = next(board['id'] for board in jira.boards.values()
+                    if board['name'] == 'Y26-Q1 - Team A Board')
+    lost = max(sprint_id for sprint_id, sprint in jira.sprints.items()
+               if sprint['originBoardId'] == board_id)
+    name = jira.sprints.pop(lost)['name']
+
+    cargs.plan_out = str(tmp_path / 'plan.json')
+    m.run(config, cargs, no_prompt=True)
+    plan = r.load_plan(cargs.plan_out)
+
+    assert [(operation['op'], operation['team']) for operation in plan] == \
+        [('create_sprint', 'Team A')]
+    assert plan[0]['args']['name'] == name
+    assert plan[0]['args']['board_id'] == board_id
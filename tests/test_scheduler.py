@@ -0,0 +1,68 @@
+# Build In Modules
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import time
+
+# 3rd Party Modules
+import pytest
+import requests
+
+# Local Modules
+from SPU.jira_client import JiraClient
+from SPU.scheduler import RequestScheduler, retry_after
+
+
+def scheduled_client(jira, **kwargs):
+    """ A rest API client whose requests go through a new scheduler. """
+    scheduler = RequestScheduler('stub', **kwargs)
+    return JiraClient(jira.url, 'basic', 'user', 'password', scheduler=scheduler), scheduler
+
+
+def test_retry_after_reads_seconds_and_dates():
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert retry_after(requests.Response()) is None
+    for value, low, high in (('2', 2, 2), (format_datetime(later, usegmt=True), 28, 30)):
+        resp = requests.Response()
+        resp.headers['Retry-After'] = value
+        assert low <= retry_after(resp) <= high
+
+
+def test_throttled_requests_wait_for_retry_after(jira):
+    client, scheduler = scheduled_client(jira)
+    jira.fail('GET', '/rest/api/2/project/A', 429, headers={'Retry-After': '0.2'}, times=2)
+
+    start = time.monotonic()
+    assert client.get_project('A')['key'] == 'A'
+
+    assert time.monotonic() - start >= 0.4
+    assert len(jira.made('GET', '/rest/api/2/project/A')) == 3
+    stats = scheduler.stats()
+    assert (stats['throttled'], stats['retries']) == (2, 2)
+    # Each throttle halves the requests allowed in flight
+    assert stats['limit'] < scheduler.max_in_flight
+
+
+def test_throttled_writes_are_retried_but_failed_writes_are_not(jira):
+    client, _ = scheduled_client(jira)
+    jira.fail('POST', '/rest/api/2/filter', 429, headers={'Retry-After': '0'})
+    assert client.create_filter('Filter', 'project = A')['name'] == 'Filter'
+    assert len(jira.made('POST', '/rest/api/2/filter')) == 2
+
+    # A 500 may have created the filter, so it is not sent again
+    jira.fail('POST', '/rest/api/2/filter', 500)
+    with pytest.raises(requests.HTTPError):
+        client.create_filter('Filter', 'project = A')
+    assert len(jira.made('POST', '/rest/api/2/filter')) == 3
+
+
+def test_retries_give_up_after_max_retries(jira):
+    client, scheduler = scheduled_client(jira, max_retries=2)
+    jira.fail('GET', '/rest/api/2/project/A', 429, headers={'Retry-After': '0'}, times=5)
+
+    with pytest.raises(requests.HTTPError):
+        client.get_project('A')
+    assert len(jira.made('GET', '/rest/api/2/project/A')) == 3
+    # The last 429 is not retried but still counts as throttled
+    stats = scheduler.stats()
+    assert (stats['throttled'], stats['retries']) == (3, 2)
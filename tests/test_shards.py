@@ -0,0 +1,61 @@
+# Build In Modules
+import logging
+import socket
+
+# 3rd Party Modules
+import pytest
+
+# Local Modules
+import SPU.shards as sh
+from stub import StubJira
+
+
+@pytest.fixture
+def other():
+    """ A second stand-in JIRA server. """
+    server = StubJira().start()
+    yield server
+    server.stop()
+
+
+def add_instance(config, name, url):
+    """ Add a JIRA instance, and one team on it, to the config. """
+    config['SPU']['jira'][name] = dict(config['SPU']['jira']['stub'],
+                                       options={'server': url})
+    config['SPU']['teams'][f"Team {name}"] = dict(config['SPU']['teams']['Team A'],
+                                                  jira_project=name.upper(), jira_instance=name)
+
+
+def test_group_instances_spreads_the_instances():
+    config = {'SPU': {'jira': {name: {} for name in 'abcde'}}}
+
+    assert sh.group_instances(config, 2) == [['a', 'c', 'e'], ['b', 'd']]
+    assert sh.group_instances(config, 9) == [[name] for name in 'abcde']
+
+
+def test_shard_failures_are_counted_and_logs_relayed(jira, other, config, cargs, caplog):
+    add_instance(config, 'other', other.url)
+    # The quarter issue of the other instance cannot be created
+    other.fail('POST', '/rest/api/2/issue/bulk', 400)
+
+    with caplog.at_level(logging.INFO):
+        assert sh.run_shards(config, cargs, 2) == 1
+
+    assert len(jira.issues) == 2 and not other.issues
+    assert [board['name'] for board in other.boards.values()
+            if not board['name'].startswith('Global')] == ['Y26-Q1 - Team other Board']
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith('[stub] Synced 2 of 2 teams') for message in messages)
+    assert any(message.startswith('[other] Failed to create the Y26-Q1 issue for Team other')
+               for message in messages)
+    assert 'Shard other had 1 failures' in messages
+
+
+def test_a_shard_that_stops_counts_as_one_failure(jira, config, cargs):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    add_instance(config, 'gone', closed)
+
+    assert sh.run_shards(config, cargs, 2) == 1
+    assert len(jira.issues) == 2
@@ -0,0 +1,30 @@
+# Local Modules
+import SPU.downstream as d
+import SPU.main as m
+
+
+def test_sprint_swaps_restore_calender_order():
+    sprints = [{'id': id} for id in (13, 11, 14, 12)]
+    slots = sorted(sprint['id'] for sprint in sprints)
+    for sprint_id, other_id in d.sprint_swaps(sprints):
+        first, second = slots.index(sprint_id), slots.index(other_id)
+        slots[first], slots[second] = slots[second], slots[first]
+
+    assert slots == [13, 11, 14, 12]
+    assert d.sprint_swaps([{'id': id} for id in (11, 12, 13)]) == []
+
+
+def test_concurrent_sprints_end_up_in_calender_order(jira, config, cargs):
+    # Slow requests keep several sprints of a board in flight at once
+    jira.delay = 0.02
+    assert m.run(config, cargs, no_prompt=True) == 0
+
+    for name in ('Team A', 'Team B'):
+        board_id = next(board_id for board_id, board in jira.boards.items()
+                        if board['name'] == f"Y26-Q1 - {name} Board")
+        sprints = [sprint for sprint in jira.sprints.values()
+                   if sprint['originBoardId'] == board_id]
+        assert len(sprints) > 1
+        calender_order = [sprint['name'] for sprint in
+                          sorted(sprints, key=lambda sprint: sprint['startDate'])]
+        assert jira.sprint_order(board_id) == calender_order